@@ -0,0 +1,29 @@
+"""Add profile hash and model name to room embeddings
+
+Revision ID: 004_embedding_profile_hash
+Revises: 003_add_indexes
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_embedding_profile_hash'
+down_revision = '003_add_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Store which profile text and model produced each embedding."""
+    # Existing rows stay NULL, so the next regeneration re-encodes them once
+    op.add_column('room_embeddings', sa.Column('profile_hash', sa.String(64), nullable=True))
+    op.add_column('room_embeddings', sa.Column('model_name', sa.String(255), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove profile hash and model name columns."""
+    op.drop_column('room_embeddings', 'model_name')
+    op.drop_column('room_embeddings', 'profile_hash')
@@ -0,0 +1,36 @@
+"""Add user preference vectors
+
+Revision ID: 005_user_preference_vectors
+Revises: 004_embedding_profile_hash
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = '005_user_preference_vectors'
+down_revision = '004_embedding_profile_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create user_preference_vectors table."""
+    # Rows are built lazily from user_events on a user's first recommendation request
+    op.create_table(
+        'user_preference_vectors',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('embedding', Vector(384), nullable=True),
+        sa.Column('weight_sum', sa.Float, nullable=False, server_default='0'),
+        sa.Column('event_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop user_preference_vectors table."""
+    op.drop_table('user_preference_vectors')
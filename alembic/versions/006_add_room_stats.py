@@ -0,0 +1,57 @@
+"""Add room stats read model
+
+Revision ID: 006_room_stats
+Revises: 005_user_preference_vectors
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '006_room_stats'
+down_revision = '005_user_preference_vectors'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create room_stats table and backfill it from reviews and reservations."""
+    op.create_table(
+        'room_stats',
+        sa.Column('room_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('rooms.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('review_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('rating_sum', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('avg_rating', sa.Float, nullable=True),
+        sa.Column('reservation_count_30d', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    
+    op.execute("""
+        INSERT INTO room_stats (room_id, review_count, rating_sum, avg_rating, reservation_count_30d)
+        SELECT
+            r.id,
+            COALESCE(rv.review_count, 0),
+            COALESCE(rv.rating_sum, 0),
+            rv.rating_sum::float / NULLIF(rv.review_count, 0),
+            COALESCE(rs.reservation_count, 0)
+        FROM rooms r
+        LEFT JOIN (
+            SELECT room_id, COUNT(*) AS review_count, SUM(rating) AS rating_sum
+            FROM reviews GROUP BY room_id
+        ) rv ON rv.room_id = r.id
+        LEFT JOIN (
+            SELECT room_id, COUNT(*) AS reservation_count
+            FROM reservations
+            WHERE created_at >= now() - interval '30 days'
+              AND status IN ('CONFIRMED', 'COMPLETED')
+            GROUP BY room_id
+        ) rs ON rs.room_id = r.id
+    """)
+
+
+def downgrade() -> None:
+    """Drop room_stats table."""
+    op.drop_table('room_stats')
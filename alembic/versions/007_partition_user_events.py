@@ -0,0 +1,117 @@
+"""Partition user_events by month and add daily rollup
+
+Revision ID: 007_partition_user_events
+Revises: 006_room_stats
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '007_partition_user_events'
+down_revision = '006_room_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Rebuild user_events as a monthly range-partitioned table and add the rollup table."""
+    # Partitioned tables need the partition key in the primary key
+    op.execute("""
+        CREATE TABLE user_events_partitioned (
+            id UUID NOT NULL,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            room_id UUID NOT NULL REFERENCES rooms(id) ON DELETE CASCADE,
+            event_type eventtype NOT NULL,
+            rating_value INTEGER,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    
+    # One partition per month from the oldest event up to two months ahead;
+    # the retention job keeps creating future partitions from then on
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start DATE := date_trunc('month', COALESCE((SELECT min(created_at) FROM user_events), now()))::date;
+            last_month DATE := (date_trunc('month', now()) + interval '2 months')::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF user_events_partitioned FOR VALUES FROM (%L) TO (%L)',
+                    'user_events_' || to_char(month_start, 'YYYY_MM'),
+                    month_start,
+                    (month_start + interval '1 month')::date
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE user_events_default PARTITION OF user_events_partitioned DEFAULT")
+    
+    op.execute("""
+        INSERT INTO user_events_partitioned (id, user_id, room_id, event_type, rating_value, created_at)
+        SELECT id, user_id, room_id, event_type, rating_value, created_at FROM user_events
+    """)
+    
+    op.drop_table('user_events')
+    op.execute("ALTER TABLE user_events_partitioned RENAME TO user_events")
+    op.execute("ALTER TABLE user_events RENAME CONSTRAINT user_events_partitioned_pkey TO user_events_pkey")
+    
+    # Indexes on the parent are created on every partition
+    op.create_index('ix_user_events_user_id_created_at', 'user_events', ['user_id', 'created_at'])
+    op.create_index('ix_user_events_room_id', 'user_events', ['room_id'])
+    op.create_index('ix_user_events_created_at', 'user_events', ['created_at'])
+    
+    op.create_table(
+        'user_event_daily_counts',
+        sa.Column('day', sa.Date, primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('room_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('rooms.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('event_type', postgresql.ENUM('VIEW_ROOM', 'CLICK_ROOM', 'BOOK_ROOM', 'RATE_ROOM', name='eventtype', create_type=False), primary_key=True),
+        sa.Column('event_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('rating_sum', sa.Integer, nullable=False, server_default='0'),
+    )
+    op.create_index('ix_user_event_daily_counts_room_id', 'user_event_daily_counts', ['room_id'])
+    
+    op.execute("""
+        INSERT INTO user_event_daily_counts (day, user_id, room_id, event_type, event_count, rating_sum)
+        SELECT
+            (created_at AT TIME ZONE 'UTC')::date,
+            user_id,
+            room_id,
+            event_type,
+            COUNT(*),
+            COALESCE(SUM(rating_value), 0)
+        FROM user_events
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    """Restore a plain user_events table and drop the rollup table."""
+    op.drop_table('user_event_daily_counts')
+    
+    op.execute("ALTER TABLE user_events RENAME TO user_events_partitioned")
+    op.create_table(
+        'user_events',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('room_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('rooms.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('event_type', postgresql.ENUM('VIEW_ROOM', 'CLICK_ROOM', 'BOOK_ROOM', 'RATE_ROOM', name='eventtype', create_type=False), nullable=False),
+        sa.Column('rating_value', sa.Integer, nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.execute("""
+        INSERT INTO user_events (id, user_id, room_id, event_type, rating_value, created_at)
+        SELECT id, user_id, room_id, event_type, rating_value, created_at FROM user_events_partitioned
+    """)
+    op.execute("DROP TABLE user_events_partitioned CASCADE")
+    
+    op.create_index('ix_user_events_user_id', 'user_events', ['user_id'])
+    op.create_index('ix_user_events_room_id', 'user_events', ['room_id'])
+    op.create_index('ix_user_events_created_at', 'user_events', ['created_at'])
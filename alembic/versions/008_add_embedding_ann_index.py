@@ -0,0 +1,32 @@
+"""Add HNSW index on room embeddings
+
+Revision ID: 008_embedding_ann_index
+Revises: 007_partition_user_events
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008_embedding_ann_index'
+down_revision = '007_partition_user_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add an approximate nearest-neighbour index for cosine distance (pgvector >= 0.5)."""
+    op.create_index(
+        'ix_room_embeddings_embedding_hnsw',
+        'room_embeddings',
+        ['embedding'],
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Drop the HNSW index."""
+    op.drop_index('ix_room_embeddings_embedding_hnsw', table_name='room_embeddings')
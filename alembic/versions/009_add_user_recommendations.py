@@ -0,0 +1,37 @@
+"""Add precomputed user recommendations
+
+Revision ID: 009_user_recommendations
+Revises: 008_embedding_ann_index
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '009_user_recommendations'
+down_revision = '008_embedding_ann_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create user_recommendations table."""
+    op.create_table(
+        'user_recommendations',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('rank', sa.Integer, primary_key=True),
+        sa.Column('room_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('rooms.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('similarity_score', sa.Float, nullable=False),
+        sa.Column('final_score', sa.Float, nullable=False),
+        sa.Column('reason', sa.String(255), nullable=False),
+        sa.Column('event_count', sa.Integer, nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop user_recommendations table."""
+    op.drop_table('user_recommendations')
@@ -0,0 +1,68 @@
+"""Store room embeddings as halfvec
+
+Revision ID: 010_half_precision_embeddings
+Revises: 009_user_recommendations
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_half_precision_embeddings'
+down_revision = '009_user_recommendations'
+branch_labels = None
+depends_on = None
+
+
+def _embedding_type() -> str:
+    """Current type of room_embeddings.embedding, e.g. 'vector(384)'."""
+    return op.get_bind().execute(sa.text(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = 'room_embeddings'::regclass AND attname = 'embedding'"
+    )).scalar()
+
+
+def _convert(column_type: str, ops: str) -> None:
+    """Change the embedding column type, rebuilding the HNSW index around it."""
+    op.drop_index('ix_room_embeddings_embedding_hnsw', table_name='room_embeddings')
+    op.execute(
+        f"ALTER TABLE room_embeddings ALTER COLUMN embedding "
+        f"TYPE {column_type} USING embedding::{column_type}"
+    )
+    op.create_index(
+        'ix_room_embeddings_embedding_hnsw',
+        'room_embeddings',
+        ['embedding'],
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': ops},
+    )
+
+
+def _pgvector_version() -> tuple[int, ...]:
+    """Installed pgvector extension version, e.g. (0, 7, 4)."""
+    version = op.get_bind().execute(sa.text(
+        "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+    )).scalar()
+    return tuple(int(part) for part in version.split('.') if part.isdigit())
+
+
+def upgrade() -> None:
+    """Convert embeddings to halfvec when the server's pgvector supports it (>= 0.7).
+    
+    Older servers keep vector(384); scripts/convert_embedding_precision.py
+    switches either way later. The ORM reads and writes both column types.
+    """
+    if _pgvector_version() < (0, 7):
+        print("pgvector < 0.7, keeping room embeddings as vector(384)")
+        return
+    if _embedding_type().startswith('vector'):
+        _convert('halfvec(384)', 'halfvec_cosine_ops')
+
+
+def downgrade() -> None:
+    """Convert embeddings back to full-precision vector."""
+    if _embedding_type().startswith('halfvec'):
+        _convert('vector(384)', 'vector_cosine_ops')
@@ -0,0 +1,65 @@
+"""Add reservation period range with GiST exclusion constraint
+
+Revision ID: 011_reservation_period_exclusion
+Revises: 010_half_precision_embeddings
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '011_reservation_period_exclusion'
+down_revision = '010_half_precision_embeddings'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_STATUSES = "('CONFIRMED', 'PENDING_PAYMENT')"
+
+
+def upgrade() -> None:
+    """Add a generated tstzrange period and reject overlapping active reservations per room.
+    
+    btree_gist provides the GiST equality operator for room_id. The
+    constraint's GiST index on (room_id, period) also serves overlap queries.
+    """
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute("""
+        ALTER TABLE reservations
+        ADD COLUMN period tstzrange
+        GENERATED ALWAYS AS (tstzrange(start_time, end_time, '[)')) STORED
+    """)
+    
+    # Before this constraint PENDING_PAYMENT bookings could overlap each other and
+    # CONFIRMED ones. Which one to cancel (and refund) is a business decision, so
+    # fail and list them; scripts/resolve_overlapping_reservations.py resolves them.
+    op.execute(f"""
+        DO $$
+        DECLARE
+            conflicts text;
+        BEGIN
+            SELECT string_agg(a.id || ' & ' || b.id, ', ' ORDER BY a.id, b.id)
+            INTO conflicts
+            FROM reservations a
+            JOIN reservations b
+              ON a.room_id = b.room_id AND a.id < b.id AND a.period && b.period
+            WHERE a.status IN {ACTIVE_STATUSES} AND b.status IN {ACTIVE_STATUSES};
+            
+            IF conflicts IS NOT NULL THEN
+                RAISE EXCEPTION 'Overlapping CONFIRMED/PENDING_PAYMENT reservations (run scripts/resolve_overlapping_reservations.py first): %', conflicts;
+            END IF;
+        END $$;
+    """)
+    op.execute(f"""
+        ALTER TABLE reservations
+        ADD CONSTRAINT ex_reservations_room_period
+        EXCLUDE USING gist (room_id WITH =, period WITH &&)
+        WHERE (status IN {ACTIVE_STATUSES})
+    """)
+
+
+def downgrade() -> None:
+    """Drop the exclusion constraint and the period column."""
+    op.execute("ALTER TABLE reservations DROP CONSTRAINT ex_reservations_room_period")
+    op.drop_column('reservations', 'period')
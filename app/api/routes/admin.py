@@ -9,7 +9,7 @@ from app.models.user import User
 from app.schemas.reservation import ReservationResponse, ReservationStatusUpdate, ReservationUpdate
 from app.schemas.payment import PaymentResponse, PaymentConfirmRequest
 from app.schemas.fb_order import FbOrderResponse, FbOrderStatusUpdate
-from app.services.reservation import ReservationService
+from app.services.reservation import ReservationConflictError, ReservationService
 from app.services.payment import PaymentService
 from app.services.fb_order import FbOrderService
 from app.services.ai import AIService
@@ -67,9 +67,15 @@ async def update_reservation_status(
 ):
     """Update reservation status (admin only)."""
     reservation_service = ReservationService(db)
-    reservation = await reservation_service.update_reservation_status(
-        reservation_id, status_update.status
-    )
+    try:
+        reservation = await reservation_service.update_reservation_status(
+            reservation_id, status_update.status
+        )
+    except ReservationConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
     
     if not reservation:
         raise HTTPException(
@@ -144,11 +150,17 @@ async def confirm_payment(
 ):
     """Confirm a payment (admin/finance only)."""
     payment_service = PaymentService(db)
-    payment = await payment_service.confirm_payment(
-        payment_id,
-        admin_user.id,
-        reference=request.reference if request else None,
-    )
+    try:
+        payment = await payment_service.confirm_payment(
+            payment_id,
+            admin_user.id,
+            reference=request.reference if request else None,
+        )
+    except ReservationConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
     
     if not payment:
         raise HTTPException(
@@ -222,11 +234,12 @@ async def generate_room_embedding(
     """Generate embedding for a room (admin only)."""
     ai_service = AIService(db)
     try:
-        embedding = await ai_service.generate_room_embedding(room_id)
+        embedding, result_status = await ai_service.generate_room_embedding(room_id)
         return {
             "room_id": str(embedding.room_id),
             "updated_at": embedding.updated_at.isoformat(),
             "dimension": len(embedding.embedding),
+            "status": result_status,
         }
     except ValueError as e:
         raise HTTPException(
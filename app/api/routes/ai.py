@@ -7,9 +7,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.ai import UserEventCreate, RecommendationResponse
+from app.schemas.ai import UserEventCreate, UserEventBatchCreate, RecommendationResponse
 from app.services.ai import AIService
-from app.api.deps import get_current_user, get_optional_user
+from app.services.embedding import get_embedding_provider
+from app.services.event_buffer import EventBufferFullError, get_event_buffer
+from app.api.deps import get_admin_user, get_current_user, get_optional_user
 
 
 router = APIRouter(prefix="/ai", tags=["AI Recommendations"])
@@ -32,6 +34,39 @@ async def log_event(
     }
 
 
+@router.post("/events/batch", status_code=status.HTTP_202_ACCEPTED)
+async def log_events_batch(
+    batch: UserEventBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue several user events; they are written in bulk shortly after."""
+    # Reject unknown rooms now, the deferred insert can't report them to the client
+    unknown = await AIService(db).get_unknown_room_ids({event.room_id for event in batch.events})
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown room_id: {', '.join(sorted(str(room_id) for room_id in unknown))}",
+        )
+    
+    try:
+        get_event_buffer().add(current_user.id, batch.events)
+    except EventBufferFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    return {"accepted": len(batch.events)}
+
+
+@router.get("/events/buffer/status")
+async def get_event_buffer_status(
+    admin_user: User = Depends(get_admin_user),
+):
+    """Get write-behind event buffer metrics (admin only)."""
+    return get_event_buffer().stats()
+
+
 @router.get("/recommendations", response_model=RecommendationResponse)
 async def get_recommendations(
     limit: int = Query(8, ge=1, le=50),
@@ -50,9 +85,18 @@ async def get_recommendations(
     )
 
 
+@router.get("/embeddings/status")
+async def get_embedding_status(
+    admin_user: User = Depends(get_admin_user),
+):
+    """Get embedding model readiness, load time and memory size (admin only)."""
+    return get_embedding_provider().stats()
+
+
 @router.post("/embeddings/generate/{room_id}", status_code=status.HTTP_200_OK)
 async def generate_room_embedding(
     room_id: UUID,
+    force: bool = Query(False, description="Re-encode even if the room profile is unchanged"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -65,12 +109,17 @@ async def generate_room_embedding(
     
     ai_service = AIService(db)
     try:
-        embedding = await ai_service.generate_room_embedding(room_id)
+        embedding, result_status = await ai_service.generate_room_embedding(room_id, force=force)
         return {
             "room_id": str(embedding.room_id),
             "dimension": len(embedding.embedding),
             "updated_at": embedding.updated_at.isoformat(),
-            "message": "Embedding generated successfully",
+            "status": result_status,
+            "message": (
+                "Embedding is up to date"
+                if result_status == "skipped"
+                else "Embedding generated successfully"
+            ),
         }
     except ValueError as e:
         raise HTTPException(
@@ -86,6 +135,7 @@ async def generate_room_embedding(
 
 @router.post("/embeddings/generate-all", status_code=status.HTTP_200_OK)
 async def generate_all_room_embeddings(
+    force: bool = Query(False, description="Re-encode even if room profiles are unchanged"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -96,33 +146,22 @@ async def generate_all_room_embeddings(
             detail="Only admins can generate embeddings",
         )
     
-    from app.models.room import Room, RoomStatus
-    from sqlalchemy import select
-    
-    # Get all active rooms
-    query = select(Room).where(Room.status == RoomStatus.ACTIVE)
-    result = await db.execute(query)
-    rooms = result.scalars().all()
-    
     ai_service = AIService(db)
-    success_count = 0
-    error_count = 0
-    errors = []
-    
-    for room in rooms:
-        try:
-            await ai_service.generate_room_embedding(room.id)
-            success_count += 1
-        except Exception as e:
-            error_count += 1
-            errors.append({"room_id": str(room.id), "room_name": room.name, "error": str(e)})
+    result = await ai_service.generate_room_embeddings(force=force)
     
     await db.commit()
     
     return {
-        "total_rooms": len(rooms),
-        "success_count": success_count,
-        "error_count": error_count,
-        "errors": errors[:10],  # Return first 10 errors
-        "message": f"Generated embeddings for {success_count}/{len(rooms)} rooms",
+        "total_rooms": result.total_rooms,
+        "success_count": result.success_count,
+        "created_count": result.created_count,
+        "updated_count": result.updated_count,
+        "skipped_count": result.skipped_count,
+        "error_count": result.error_count,
+        "errors": result.errors[:10],  # Return first 10 errors
+        "message": (
+            f"Generated embeddings for {result.success_count}/{result.total_rooms} rooms "
+            f"({result.created_count} created, {result.updated_count} updated, "
+            f"{result.skipped_count} unchanged)"
+        ),
     }
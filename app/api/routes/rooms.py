@@ -3,9 +3,10 @@ from datetime import datetime, date
 from decimal import Decimal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.room import RoomCategory
 from app.schemas.room import (
@@ -14,8 +15,9 @@ from app.schemas.room import (
     RoomAvailabilityResponse,
     DailySlotResponse,
     AllRoomsSlotsResponse,
+    AvailabilityCalendarResponse,
 )
-from app.services.room import RoomService
+from app.services.room import MAX_CALENDAR_DAYS, RoomService
 
 
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
@@ -34,6 +36,51 @@ async def get_all_rooms_daily_slots(
     return await room_service.get_all_rooms_daily_slots(target_date)
 
 
+async def _get_availability_calendar(
+    db: AsyncSession,
+    response: Response,
+    start_date: date,
+    end_date: date,
+    room_id: UUID | None = None,
+) -> AvailabilityCalendarResponse:
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End date must not be before start date",
+        )
+    if (end_date - start_date).days + 1 > MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must not exceed {MAX_CALENDAR_DAYS} days",
+        )
+    
+    room_service = RoomService(db)
+    try:
+        calendar = await room_service.get_availability_calendar(start_date, end_date, room_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    
+    response.headers["Cache-Control"] = f"private, max-age={settings.CALENDAR_CACHE_MAX_AGE_SECONDS}"
+    return calendar
+
+
+@router.get("/all/calendar", response_model=AvailabilityCalendarResponse)
+async def get_all_rooms_calendar(
+    response: Response,
+    start_date: date = Query(..., alias="start", description="First date in YYYY-MM-DD format"),
+    end_date: date = Query(..., alias="end", description="Last date (inclusive) in YYYY-MM-DD format"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get hourly availability of ALL rooms for a date range.
+    Each day is a bitmap: bit i is set when hour opening_hour + i is available.
+    """
+    return await _get_availability_calendar(db, response, start_date, end_date)
+
+
 @router.get("", response_model=RoomListResponse)
 async def get_rooms(
     category: RoomCategory | None = None,
@@ -128,3 +175,18 @@ async def get_room_daily_slots(
         )
     
     return await room_service.get_daily_slots(room_id, target_date)
+
+
+@router.get("/{room_id}/calendar", response_model=AvailabilityCalendarResponse)
+async def get_room_calendar(
+    room_id: UUID,
+    response: Response,
+    start_date: date = Query(..., alias="start", description="First date in YYYY-MM-DD format"),
+    end_date: date = Query(..., alias="end", description="Last date (inclusive) in YYYY-MM-DD format"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get hourly availability of a room for a date range.
+    Each day is a bitmap: bit i is set when hour opening_hour + i is available.
+    """
+    return await _get_availability_calendar(db, response, start_date, end_date, room_id)
@@ -0,0 +1,76 @@
+"""Startup timing report: import time per module and startup phases."""
+import builtins
+import sys
+import time
+
+
+class StartupReport:
+    """Records how long the process spends importing modules and starting up.
+    
+    `track_imports()` wraps `__import__` so every module imported for the
+    first time is timed. Each entry keeps its own time (`self_ms`) and the
+    time including the modules it imported (`cumulative_ms`), like
+    `python -X importtime`.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: dict[str, tuple[float, float]] = {}
+        self.phases: dict[str, float] = {}
+        self._original_import = None
+        self._stack: list[float] = []
+    
+    def track_imports(self) -> None:
+        """Start timing first-time imports."""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+    
+    def stop_tracking_imports(self) -> None:
+        """Restore the default import function."""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+            self.mark("imports")
+    
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.imports[name] = (elapsed - children, elapsed)
+    
+    def mark(self, phase: str) -> None:
+        """Record the time since process start at which a phase finished."""
+        self.phases[phase] = time.perf_counter() - self.started
+    
+    def summary(self, top: int = 10) -> dict:
+        """Phase timings and the slowest imports by self time, in milliseconds."""
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            "modules_imported": len(self.imports),
+            "slowest_imports": [
+                {"module": name, "self_ms": round(own * 1000, 1), "cumulative_ms": round(total * 1000, 1)}
+                for name, (own, total) in slowest
+            ],
+        }
+    
+    def log(self, top: int = 10) -> None:
+        """Print the report to the application log."""
+        summary = self.summary(top)
+        phases = ", ".join(f"{phase} {ms:.0f}ms" for phase, ms in summary["phases_ms"].items())
+        print(f"🚀 Startup: {phases} ({summary['modules_imported']} modules imported)")
+        for entry in summary["slowest_imports"]:
+            print(f"   {entry['self_ms']:8.1f}ms self {entry['cumulative_ms']:8.1f}ms total  {entry['module']}")
+
+
+startup_report = StartupReport()
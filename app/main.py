@@ -1,5 +1,11 @@
 """Main FastAPI application."""
+from app.core.startup import startup_report
+
+# Time every import below, reported once the app has started
+startup_report.track_imports()
+
 from contextlib import asynccontextmanager
+import asyncio
 import time
 
 from fastapi import FastAPI, Request
@@ -17,14 +23,63 @@ from app.api.routes import (
     ai_router,
     admin_router,
 )
+from app.services.embedding import get_embedding_provider, shutdown_embedding_providers
+from app.services.event_buffer import get_event_buffer
+from app.services.cooccurrence import run_periodic_cooccurrence_refresh
+from app.services.reservation_index import run_periodic_reservation_index_reload
+from app.services.room_stats import run_periodic_reconciliation
+
+startup_report.stop_tracking_imports()
+
+
+async def warmup_embedding_model():
+    """Load the shared embedding model in the background so requests don't pay the cold start."""
+    try:
+        await get_embedding_provider().warmup()
+        startup_report.mark("embedding_warmup")
+        print(f"✓ Embedding model ready after {startup_report.phases['embedding_warmup']:.1f}s")
+    except Exception as e:
+        # Model will be loaded on first AI request
+        print(f"⚠️  Embedding model warmup failed: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
+    background_tasks = []
+    if settings.EMBEDDING_WARMUP_ON_STARTUP:
+        # Loading torch takes longer than the dyno boot timeout allows, so
+        # don't hold up binding the port for it
+        background_tasks.append(asyncio.create_task(warmup_embedding_model()))
+    if settings.ROOM_STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            run_periodic_reconciliation(settings.ROOM_STATS_RECONCILE_INTERVAL_SECONDS)
+        ))
+    if settings.RESERVATION_INDEX_ENABLED and settings.RESERVATION_INDEX_RELOAD_INTERVAL_SECONDS > 0:
+        # First iteration loads the index; availability reads use the database until then
+        background_tasks.append(asyncio.create_task(
+            run_periodic_reservation_index_reload(settings.RESERVATION_INDEX_RELOAD_INTERVAL_SECONDS)
+        ))
+    if settings.COOCCURRENCE_ENABLED:
+        # First iteration loads every interaction; recommendations skip co-occurrence until then
+        background_tasks.append(asyncio.create_task(
+            run_periodic_cooccurrence_refresh(settings.COOCCURRENCE_CHECK_INTERVAL_SECONDS)
+        ))
+    
+    get_event_buffer().start()
+    
+    startup_report.mark("ready")
+    startup_report.log(settings.STARTUP_REPORT_TOP_N)
+    
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    # Let cancelled tasks finish (and release their sessions) before tearing down
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await get_event_buffer().stop()
+    shutdown_embedding_providers()
 
 
 app = FastAPI(
@@ -85,3 +140,9 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/health/startup")
+async def startup_timing():
+    """Startup phase timings and the slowest module imports."""
+    return startup_report.summary(settings.STARTUP_REPORT_TOP_N)
@@ -5,10 +5,11 @@ from app.models.addon import Addon, AddonPriceType
 from app.models.promo import Promo, DiscountType
 from app.models.reservation import Reservation, ReservationStatus, ReservationAddon
 from app.models.review import Review
+from app.models.room_stats import RoomStats
 from app.models.payment import Payment, PaymentMethod, PaymentStatus
 from app.models.menu import MenuItem, MenuCategory
 from app.models.fb_order import FbOrder, FbOrderStatus, FbOrderItem
-from app.models.ai import UserEvent, EventType, RoomEmbedding
+from app.models.ai import UserEvent, EventType, RoomEmbedding, UserPreferenceVector, UserEventDailyCount, UserRecommendation
 
 __all__ = [
     "User", "UserRole",
@@ -17,8 +18,10 @@ __all__ = [
     "Promo", "DiscountType",
     "Reservation", "ReservationStatus", "ReservationAddon",
     "Review",
+    "RoomStats",
     "Payment", "PaymentMethod", "PaymentStatus",
     "MenuItem", "MenuCategory",
     "FbOrder", "FbOrderStatus", "FbOrderItem",
-    "UserEvent", "EventType", "RoomEmbedding",
+    "UserEvent", "EventType", "RoomEmbedding", "UserPreferenceVector", "UserEventDailyCount",
+    "UserRecommendation",
 ]
@@ -1,9 +1,9 @@
 """AI models for room recommendations."""
 import enum
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import Enum, DateTime, func, Integer, ForeignKey
+from sqlalchemy import Enum, Date, DateTime, func, Integer, ForeignKey, String, Float, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from pgvector.sqlalchemy import Vector
@@ -20,9 +20,17 @@ class EventType(str, enum.Enum):
 
 
 class UserEvent(Base):
-    """User event model for tracking interactions."""
+    """User event model for tracking interactions.
+    
+    In production the table is range-partitioned by month on `created_at`
+    (see migration 007); old partitions are rolled up into
+    `user_event_daily_counts` and dropped by the retention job.
+    """
     
     __tablename__ = "user_events"
+    __table_args__ = (
+        Index("ix_user_events_user_id_created_at", "user_id", "created_at"),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -33,7 +41,6 @@ class UserEvent(Base):
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     room_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -43,10 +50,11 @@ class UserEvent(Base):
     )
     event_type: Mapped[EventType] = mapped_column(Enum(EventType), nullable=False)
     rating_value: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Part of the primary key, as the partition key must be (see migration 007)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         server_default=func.now(),
-        nullable=False,
         index=True,
     )
     
@@ -70,14 +78,30 @@ class RoomEmbedding(Base):
     """
     
     __tablename__ = "room_embeddings"
+    __table_args__ = (
+        # Approximate nearest-neighbour index for cosine distance ordering
+        Index(
+            "ix_room_embeddings_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
     
     room_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("rooms.id", ondelete="CASCADE"),
         primary_key=True,
     )
-    # Using flexible dimension - update via migration if changing provider
+    # Using flexible dimension - update via migration if changing provider.
+    # The column may be halfvec(384) (scripts/convert_embedding_precision.py); vector
+    # and halfvec share a text format, so Vector binds and parses either one
     embedding = mapped_column(Vector(384), nullable=False)
+    # SHA-256 of the room profile text and the model that encoded it,
+    # used to skip re-encoding rooms whose profile has not changed
+    profile_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    model_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -90,3 +114,88 @@ class RoomEmbedding(Base):
         "Room",
         back_populates="embedding",
     )
+
+
+class UserPreferenceVector(Base):
+    """Per-user preference vector maintained incrementally on every event.
+    
+    `embedding` is the weighted mean of the embeddings of rooms the user
+    interacted with, `weight_sum` is the total event weight behind it, and
+    `event_count` counts all events (including rooms without embeddings).
+    """
+    
+    __tablename__ = "user_preference_vectors"
+    
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    embedding = mapped_column(Vector(384), nullable=True)
+    weight_sum: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    event_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class UserEventDailyCount(Base):
+    """Daily rollup of user events per (user, room, event type).
+    
+    Survives the retention job, so long-term interaction history stays
+    available after the raw monthly partitions are dropped.
+    """
+    
+    __tablename__ = "user_event_daily_counts"
+    
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    room_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("rooms.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    event_type: Mapped[EventType] = mapped_column(Enum(EventType), primary_key=True)
+    event_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Sum of rating_value for RATE_ROOM events, 0 otherwise
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class UserRecommendation(Base):
+    """Precomputed top-N recommendations per user, ranked by final score.
+    
+    Rebuilt by the nightly batch job; the endpoint serves from it and only
+    applies the availability filter live.
+    """
+    
+    __tablename__ = "user_recommendations"
+    
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+    room_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("rooms.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    similarity_score: Mapped[float] = mapped_column(Float, nullable=False)
+    final_score: Mapped[float] = mapped_column(Float, nullable=False)
+    reason: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Preference vector version (event_count) the ranking was computed from
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
@@ -4,8 +4,8 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import String, Text, Enum, DateTime, func, Integer, Numeric, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, Text, Enum, DateTime, func, Integer, Numeric, ForeignKey, Computed, text
+from sqlalchemy.dialects.postgresql import UUID, TSTZRANGE, ExcludeConstraint, Range
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.session import Base
@@ -19,10 +19,27 @@ class ReservationStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
 
 
+# Exclusion constraint rejecting overlapping CONFIRMED/PENDING_PAYMENT reservations of a room
+OVERLAP_CONSTRAINT_NAME = "ex_reservations_room_period"
+
+
 class Reservation(Base):
-    """Reservation model."""
+    """Reservation model.
+    
+    `period` is generated from start_time/end_time; overlap queries use its
+    GiST index (room_id, period), which also backs the exclusion constraint.
+    """
     
     __tablename__ = "reservations"
+    __table_args__ = (
+        ExcludeConstraint(
+            ("room_id", "="),
+            ("period", "&&"),
+            name=OVERLAP_CONSTRAINT_NAME,
+            using="gist",
+            where=text("status IN ('CONFIRMED', 'PENDING_PAYMENT')"),
+        ),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -41,6 +58,10 @@ class Reservation(Base):
     )
     start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    period: Mapped[Range[datetime]] = mapped_column(
+        TSTZRANGE,
+        Computed("tstzrange(start_time, end_time, '[)')", persisted=True),
+    )
     duration_hours: Mapped[Decimal] = mapped_column(Numeric(5, 2), nullable=False)
     subtotal: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
     discount_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)
@@ -0,0 +1,37 @@
+"""Room statistics read model."""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, func, Integer, Float, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+class RoomStats(Base):
+    """Precomputed rating and popularity stats per room.
+    
+    Kept current by review creation and reservation status changes, and
+    periodically reconciled against reviews/reservations to expire
+    reservations that fall out of the rolling window.
+    """
+    
+    __tablename__ = "room_stats"
+    
+    room_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("rooms.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    review_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    avg_rating: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # CONFIRMED/COMPLETED reservations created in the last 30 days
+    reservation_count_30d: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
@@ -38,3 +38,19 @@ class RecommendationResponse(BaseModel):
     recommendations: list[RecommendedRoom]
     is_cold_start: bool = False
     user_event_count: int = 0
+
+
+class EmbeddingGenerationResult(BaseModel):
+    """Schema for a bulk room embedding generation run."""
+    total_rooms: int = 0
+    success_count: int = 0
+    created_count: int = 0
+    updated_count: int = 0
+    skipped_count: int = 0
+    error_count: int = 0
+    errors: list[dict] = []
+
+
+class UserEventBatchCreate(BaseModel):
+    """Schema for logging several user events in one request."""
+    events: list[UserEventCreate] = Field(..., min_length=1, max_length=500)
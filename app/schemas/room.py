@@ -115,3 +115,20 @@ class AllRoomsSlotsResponse(BaseModel):
     """Schema for all rooms daily slots."""
     date: str  # YYYY-MM-DD
     rooms: list[DailySlotResponse]
+
+
+class RoomCalendar(BaseModel):
+    """Schema for one room's availability calendar."""
+    room_id: UUID
+    room_name: str
+    # One int per day; bit i is set when hour opening_hour + i is available
+    days: list[int]
+
+
+class AvailabilityCalendarResponse(BaseModel):
+    """Schema for multi-day availability bitmaps."""
+    start_date: str  # YYYY-MM-DD
+    end_date: str  # YYYY-MM-DD, inclusive
+    opening_hour: int = 10
+    closing_hour: int = 22
+    rooms: list[RoomCalendar]
@@ -8,7 +8,7 @@ from app.services.menu import MenuService
 from app.services.fb_order import FbOrderService
 from app.services.review import ReviewService
 from app.services.ai import AIService
-from app.services.embedding import HuggingFaceEmbeddingProvider
+from app.services.embedding import HuggingFaceEmbeddingProvider, OnnxEmbeddingProvider
 
 __all__ = [
     "AuthService",
@@ -21,4 +21,5 @@ __all__ = [
     "ReviewService",
     "AIService",
     "HuggingFaceEmbeddingProvider",
+    "OnnxEmbeddingProvider",
 ]
@@ -1,19 +1,42 @@
 """AI recommendation service for rooms."""
+import hashlib
+from collections.abc import Awaitable, Callable
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from typing import Any
 from uuid import UUID
 
 import numpy as np
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.ai import UserEvent, EventType, RoomEmbedding
+from app.models.ai import (
+    UserEvent,
+    EventType,
+    RoomEmbedding,
+    UserEventDailyCount,
+    UserPreferenceVector,
+    UserRecommendation,
+)
 from app.models.room import Room, RoomStatus
-from app.models.reservation import Reservation, ReservationStatus
-from app.models.review import Review
-from app.schemas.ai import UserEventCreate, RecommendationResponse, RecommendedRoom
+from app.models.reservation import Reservation
+from app.models.room_stats import RoomStats
+from app.core.config import settings
+from app.schemas.ai import (
+    UserEventCreate,
+    RecommendationResponse,
+    RecommendedRoom,
+    EmbeddingGenerationResult,
+)
+from app.services.cache import TTLCache
+from app.services.cooccurrence import get_cooccurrence_index, merge_candidates
 from app.services.embedding import HuggingFaceEmbeddingProvider, get_embedding_provider
+from app.services.ranking import score_candidates
+from app.services.room import RoomService
+from app.services.room_stats import RoomStatsService
+from app.services.vector_index import as_vector, get_room_vector_index
 
 
 # Event weights for user vector calculation
@@ -24,16 +47,39 @@ EVENT_WEIGHTS = {
     EventType.RATE_ROOM: 4.0,  # Base, adjusted by rating
 }
 
-# Re-ranking weights
-WEIGHT_SIMILARITY = 0.65
-WEIGHT_RATING = 0.10
-WEIGHT_POPULARITY = 0.10
-WEIGHT_PRICE_MATCH = 0.10
-WEIGHT_FRESHNESS = 0.05
-
 # Cold start threshold
 COLD_START_THRESHOLD = 3
 
+# Extra ANN candidates fetched from pgvector to survive the active-room filter
+ANN_OVERFETCH_FACTOR = 2
+
+# Availability changes independently of rankings, so both caches hold unfiltered
+# rankings and the availability filter is applied after the lookup
+
+# Trending rooms are identical for every cold-start user
+TRENDING_CACHE_KEY = "trending"
+trending_cache = TTLCache(ttl_seconds=settings.TRENDING_CACHE_TTL_SECONDS)
+
+# Personalized rankings keyed by (user_id, event_count)
+recommendation_cache = TTLCache(
+    ttl_seconds=settings.RECOMMENDATION_CACHE_TTL_SECONDS,
+    max_entries=settings.RECOMMENDATION_CACHE_MAX_ENTRIES,
+)
+
+
+async def set_ann_search_params(db: AsyncSession, limit: int) -> None:
+    """Apply the pgvector ANN tunables to the current transaction.
+    
+    HNSW returns at most ef_search rows, so it is raised to `limit` if needed.
+    """
+    await db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef_search, true), set_config('ivfflat.probes', :probes, true)"),
+        {
+            "ef_search": str(max(settings.PGVECTOR_HNSW_EF_SEARCH, limit)),
+            "probes": str(settings.PGVECTOR_IVFFLAT_PROBES),
+        },
+    )
+
 
 class AIService:
     """Service for AI room recommendations."""
@@ -53,10 +99,60 @@ class AIService:
         self.db.add(event)
         await self.db.flush()
         await self.db.refresh(event)
+        
+        await self._apply_events_to_preference(user_id, [event])
         return event
     
-    async def generate_room_embedding(self, room_id: UUID) -> RoomEmbedding:
-        """Generate and store embedding for a room."""
+    async def get_unknown_room_ids(self, room_ids: set[UUID]) -> set[UUID]:
+        """Get the IDs in `room_ids` that don't exist, in one query."""
+        if not room_ids:
+            return set()
+        result = await self.db.execute(select(Room.id).where(Room.id.in_(room_ids)))
+        return room_ids - set(result.scalars().all())
+    
+    async def ingest_events(
+        self,
+        events: list[tuple[UUID, UserEventCreate, datetime]],
+    ) -> None:
+        """Store many events with one multi-row INSERT and update preference vectors.
+        
+        `events` holds (user_id, event, created_at) tuples.
+        """
+        if not events:
+            return
+        
+        await self.db.execute(
+            insert(UserEvent),
+            [
+                {
+                    "user_id": user_id,
+                    "room_id": event.room_id,
+                    "event_type": event.event_type,
+                    "rating_value": event.rating_value,
+                    "created_at": created_at,
+                }
+                for user_id, event, created_at in events
+            ],
+        )
+        
+        events_by_user: dict[UUID, list[UserEventCreate]] = {}
+        for user_id, event, _ in events:
+            events_by_user.setdefault(user_id, []).append(event)
+        
+        embeddings = await self._get_room_vectors({event.room_id for _, event, _ in events})
+        for user_id, user_events in events_by_user.items():
+            await self._apply_events_to_preference(user_id, user_events, embeddings)
+    
+    async def generate_room_embedding(
+        self,
+        room_id: UUID,
+        force: bool = False,
+    ) -> tuple[RoomEmbedding, str]:
+        """Generate and store embedding for a room.
+        
+        Returns the embedding and whether it was "created", "updated" or
+        "skipped" (profile text and model unchanged since the last run).
+        """
         # Get room with units
         query = select(Room).where(Room.id == room_id).options(
             selectinload(Room.units),
@@ -69,30 +165,173 @@ class AIService:
         
         # Build room profile text
         profile_text = self._build_room_profile(room)
+        profile_hash = self._profile_hash(profile_text)
+        
+        # populate_existing: the upsert below bypasses the ORM, refresh any loaded instance
+        existing_query = (
+            select(RoomEmbedding)
+            .where(RoomEmbedding.room_id == room_id)
+            .execution_options(populate_existing=True)
+        )
+        existing_result = await self.db.execute(existing_query)
+        existing = existing_result.scalar_one_or_none()
+        
+        if existing and not force and self._is_embedding_current(
+            existing.profile_hash, existing.model_name, profile_hash
+        ):
+            return existing, "skipped"
         
         # Get embedding
         embedding_vector = await self.embedding_provider.get_embedding(profile_text)
         
-        # Check if embedding exists
-        existing_query = select(RoomEmbedding).where(RoomEmbedding.room_id == room_id)
-        existing_result = await self.db.execute(existing_query)
-        existing = existing_result.scalar_one_or_none()
+        await self._upsert_room_embeddings([(room_id, embedding_vector, profile_hash)])
+        await self._refresh_preferences_for_rooms([room_id])
         
-        if existing:
-            existing.embedding = embedding_vector
-            existing.updated_at = datetime.now(timezone.utc)
-            await self.db.flush()
-            await self.db.refresh(existing)
-            return existing
+        existing_result = await self.db.execute(existing_query)
+        return existing_result.scalar_one(), "updated" if existing else "created"
+    
+    async def generate_room_embeddings(
+        self,
+        room_ids: list[UUID] | None = None,
+        batch_size: int | None = None,
+        force: bool = False,
+    ) -> EmbeddingGenerationResult:
+        """Generate and store embeddings for many rooms (all active rooms by default).
+        
+        Rooms whose profile hash and model match the stored embedding are
+        skipped unless `force` is set. The rest are encoded in batches and each
+        batch is written with a single INSERT ... ON CONFLICT statement. Stored
+        preference vectors built on the old embeddings are rebuilt afterwards.
+        """
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        
+        query = select(Room).options(selectinload(Room.units))
+        if room_ids is None:
+            query = query.where(Room.status == RoomStatus.ACTIVE)
         else:
-            room_embedding = RoomEmbedding(
-                room_id=room_id,
-                embedding=embedding_vector,
-            )
-            self.db.add(room_embedding)
-            await self.db.flush()
-            await self.db.refresh(room_embedding)
-            return room_embedding
+            query = query.where(Room.id.in_(room_ids))
+        result = await self.db.execute(query)
+        rooms = list(result.scalars().all())
+        
+        summary = EmbeddingGenerationResult(total_rooms=len(rooms))
+        if not rooms:
+            return summary
+        
+        # Current hashes for all rooms in one query
+        existing_query = select(
+            RoomEmbedding.room_id,
+            RoomEmbedding.profile_hash,
+            RoomEmbedding.model_name,
+        ).where(RoomEmbedding.room_id.in_([room.id for room in rooms]))
+        existing_result = await self.db.execute(existing_query)
+        existing = {row.room_id: row for row in existing_result}
+        
+        pending = []
+        written_ids = []
+        for room in rooms:
+            profile_text = self._build_room_profile(room)
+            profile_hash = self._profile_hash(profile_text)
+            row = existing.get(room.id)
+            if row and not force and self._is_embedding_current(
+                row.profile_hash, row.model_name, profile_hash
+            ):
+                summary.skipped_count += 1
+                summary.success_count += 1
+                continue
+            pending.append((room, profile_text, profile_hash))
+        
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            profiles = [profile_text for _, profile_text, _ in batch]
+            
+            try:
+                vectors = await self.embedding_provider.get_embeddings(profiles, batch_size)
+                # Savepoint so one failed batch doesn't abort the whole transaction
+                async with self.db.begin_nested():
+                    await self._upsert_room_embeddings([
+                        (room.id, vector, profile_hash)
+                        for (room, _, profile_hash), vector in zip(batch, vectors)
+                    ])
+            except Exception as e:
+                summary.error_count += len(batch)
+                summary.errors.extend(
+                    {"room_id": str(room.id), "room_name": room.name, "error": str(e)}
+                    for room, _, _ in batch
+                )
+                continue
+            
+            for room, _, _ in batch:
+                if room.id in existing:
+                    summary.updated_count += 1
+                else:
+                    summary.created_count += 1
+                written_ids.append(room.id)
+            summary.success_count += len(batch)
+        
+        await self._refresh_preferences_for_rooms(written_ids)
+        return summary
+    
+    async def _refresh_preferences_for_rooms(self, room_ids: list[UUID]) -> int:
+        """Rebuild the stored preference vectors of users who interacted with these rooms.
+        
+        Preference vectors are means of room embeddings at event time, so they
+        go stale when a room is re-embedded, and events on a room that had no
+        embedding yet never contributed. Users without a stored vector are
+        built on demand anyway. Returns the number of users rebuilt.
+        """
+        if not room_ids:
+            return 0
+        
+        interacted = select(UserEvent.user_id).where(UserEvent.room_id.in_(room_ids)).union(
+            select(UserEventDailyCount.user_id).where(UserEventDailyCount.room_id.in_(room_ids))
+        )
+        query = select(UserPreferenceVector.user_id).where(UserPreferenceVector.user_id.in_(interacted))
+        result = await self.db.execute(query)
+        user_ids = result.scalars().all()
+        
+        for user_id in user_ids:
+            await self._rebuild_user_preference(user_id)
+        return len(user_ids)
+    
+    async def _upsert_room_embeddings(self, rows: list[tuple[UUID, list[float], str]]) -> None:
+        """Insert or update room embeddings with one statement."""
+        if not rows:
+            return
+        
+        model_name = self.embedding_provider.model_name
+        stmt = pg_insert(RoomEmbedding).values([
+            {
+                "room_id": room_id,
+                "embedding": vector,
+                "profile_hash": profile_hash,
+                "model_name": model_name,
+            }
+            for room_id, vector, profile_hash in rows
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RoomEmbedding.room_id],
+            set_={
+                "embedding": stmt.excluded.embedding,
+                "profile_hash": stmt.excluded.profile_hash,
+                "model_name": stmt.excluded.model_name,
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+    
+    @staticmethod
+    def _profile_hash(profile_text: str) -> str:
+        """Hash room profile text to detect unchanged rooms."""
+        return hashlib.sha256(profile_text.encode("utf-8")).hexdigest()
+    
+    def _is_embedding_current(
+        self,
+        stored_hash: str | None,
+        stored_model: str | None,
+        profile_hash: str,
+    ) -> bool:
+        """Check if a stored embedding was built from this profile by this model."""
+        return stored_hash == profile_hash and stored_model == self.embedding_provider.model_name
     
     async def get_recommendations(
         self,
@@ -102,18 +341,16 @@ class AIService:
         end: datetime | None = None,
     ) -> RecommendationResponse:
         """Get room recommendations for a user."""
-        # Get user event count
+        # Get user event count and preference vector (single row read)
         event_count = 0
+        preference = None
         if user_id:
-            count_query = select(func.count(UserEvent.id)).where(
-                UserEvent.user_id == user_id
-            )
-            count_result = await self.db.execute(count_query)
-            event_count = count_result.scalar() or 0
+            preference = await self._get_user_preference(user_id)
+            event_count = preference.event_count if preference else 0
         
         # Cold start handling
         if not user_id or event_count < COLD_START_THRESHOLD:
-            recommendations = await self._get_trending_rooms(limit, start, end)
+            recommendations = await self._get_trending_rooms_cached(limit, start, end)
             return RecommendationResponse(
                 recommendations=recommendations,
                 is_cold_start=True,
@@ -121,16 +358,56 @@ class AIService:
             )
         
         # Get user vector
-        user_vector = await self._compute_user_vector(user_id)
+        user_vector = self._normalize_preference(preference)
         
         if user_vector is None:
-            recommendations = await self._get_trending_rooms(limit, start, end)
+            recommendations = await self._get_trending_rooms_cached(limit, start, end)
             return RecommendationResponse(
                 recommendations=recommendations,
                 is_cold_start=True,
                 user_event_count=event_count,
             )
         
+        # event_count is bumped by every logged event, so it versions the cached ranking
+        ranking = await recommendation_cache.get_or_compute(
+            (user_id, event_count),
+            self._in_own_session(
+                AIService._get_personalized_ranking, user_id, user_vector, event_count,
+            ),
+        )
+        return RecommendationResponse(
+            recommendations=await self._filter_available_rooms(ranking, limit, start, end),
+            is_cold_start=False,
+            user_event_count=event_count,
+        )
+    
+    def _in_own_session(
+        self,
+        method: Callable[..., Awaitable[Any]],
+        *args: Any,
+    ) -> Callable[[], Awaitable[Any]]:
+        """Wrap a service method as a cache computation with its own session.
+        
+        The cache runs computations in their own task, which can outlive the
+        request (and session) of the caller that started it.
+        """
+        async def compute():
+            async with AsyncSession(self.db.bind, expire_on_commit=False) as db:
+                return await method(AIService(db, self.embedding_provider), *args)
+        return compute
+    
+    async def _get_personalized_ranking(
+        self,
+        user_id: UUID,
+        user_vector: np.ndarray,
+        event_count: int,
+    ) -> list[RecommendedRoom]:
+        """Rank every candidate room for the user, ignoring availability."""
+        if settings.RECOMMENDATION_PRECOMPUTE_ENABLED:
+            precomputed = await self._get_precomputed_ranking(user_id, event_count)
+            if precomputed is not None:
+                return precomputed
+        
         # Get user's recent interactions for explainability
         user_rooms = await self._get_user_interacted_rooms(user_id)
         user_avg_price = await self._get_user_avg_price(user_id)
@@ -139,46 +416,60 @@ class AIService:
         top_k = 50
         candidate_rooms = await self._get_similar_rooms(user_vector, top_k)
         
-        # Filter by availability if time range provided
-        if start and end:
-            candidate_rooms = await self._filter_available_rooms(candidate_rooms, start, end)
-        
-        # Get room stats
-        room_stats = await self._get_room_stats()
+        # Add rooms that users with similar history interacted with
+        if settings.COOCCURRENCE_ENABLED:
+            candidate_rooms = await self._merge_cooccurrence_candidates(candidate_rooms, user_rooms)
         
-        # Re-rank candidates
-        scored_rooms = []
-        for room, similarity in candidate_rooms:
-            final_score = self._compute_final_score(
-                room, similarity, room_stats, user_avg_price
+        # Re-rank all candidates; availability and the limit are applied per request
+        return await self._rerank(candidate_rooms, user_rooms, user_avg_price, len(candidate_rooms))
+    
+    async def _get_precomputed_ranking(
+        self,
+        user_id: UUID,
+        event_count: int,
+    ) -> list[RecommendedRoom] | None:
+        """Get the nightly precomputed ranking.
+        
+        Returns None when there is no fresh ranking, so the caller runs the
+        live pipeline instead. A ranking is fresh when it is recent and
+        computed from at most RECOMMENDATION_PRECOMPUTE_MAX_EVENT_LAG fewer
+        events than the user has now.
+        """
+        computed_after = datetime.now(timezone.utc) - timedelta(
+            hours=settings.RECOMMENDATION_PRECOMPUTE_MAX_AGE_HOURS
+        )
+        query = (
+            select(UserRecommendation, Room, RoomStats)
+            .join(Room, Room.id == UserRecommendation.room_id)
+            .outerjoin(RoomStats, RoomStats.room_id == Room.id)
+            .where(
+                UserRecommendation.user_id == user_id,
+                UserRecommendation.computed_at >= computed_after,
+                UserRecommendation.event_count >= event_count - settings.RECOMMENDATION_PRECOMPUTE_MAX_EVENT_LAG,
+                Room.status == RoomStatus.ACTIVE,
             )
-            reason = self._generate_explanation(room, user_rooms, similarity)
-            
-            avg_rating = room_stats.get(room.id, {}).get("avg_rating")
-            review_count = room_stats.get(room.id, {}).get("review_count", 0)
-            
-            scored_rooms.append(RecommendedRoom(
+            .order_by(UserRecommendation.rank)
+        )
+        result = await self.db.execute(query)
+        rows = result.all()
+        if not rows:
+            return None
+        
+        return [
+            RecommendedRoom(
                 room_id=room.id,
                 name=room.name,
                 category=room.category,
                 capacity=room.capacity,
                 base_price_per_hour=room.base_price_per_hour,
-                avg_rating=avg_rating,
-                review_count=review_count,
-                similarity_score=similarity,
-                final_score=final_score,
-                reason=reason,
-            ))
-        
-        # Sort by final score and take top limit
-        scored_rooms.sort(key=lambda x: x.final_score, reverse=True)
-        recommendations = scored_rooms[:limit]
-        
-        return RecommendationResponse(
-            recommendations=recommendations,
-            is_cold_start=False,
-            user_event_count=event_count,
-        )
+                avg_rating=stats.avg_rating if stats else None,
+                review_count=stats.review_count if stats else 0,
+                similarity_score=recommendation.similarity_score,
+                final_score=recommendation.final_score,
+                reason=recommendation.reason,
+            )
+            for recommendation, room, stats in rows
+        ]
     
     def _build_room_profile(self, room: Room) -> str:
         """Build text profile for room embedding."""
@@ -200,168 +491,318 @@ class AIService:
         
         return " | ".join(parts)
     
-    async def _compute_user_vector(self, user_id: UUID) -> np.ndarray | None:
-        """Compute weighted average of room embeddings based on user events."""
-        # Get last 50 events
-        query = select(UserEvent).where(
-            UserEvent.user_id == user_id
-        ).order_by(UserEvent.created_at.desc()).limit(50)
-        
-        result = await self.db.execute(query)
-        events = result.scalars().all()
-        
-        if not events:
-            return None
+    @staticmethod
+    def _event_weight(event_type: EventType, rating_value: int | None) -> float:
+        """Get the preference weight of a single event."""
+        # Adjust RATE_ROOM weight based on rating
+        if event_type == EventType.RATE_ROOM and rating_value:
+            return 4.0 + (rating_value - 3)  # 2-6 based on 1-5 rating
+        return EVENT_WEIGHTS.get(event_type, 1.0)
+    
+    @staticmethod
+    def _rollup_weight(event_type: EventType, event_count: int, rating_sum: int) -> float:
+        """Get the total preference weight of a daily rollup row."""
+        if event_type == EventType.RATE_ROOM and rating_sum:
+            # Each rated event weighs 4 + (rating - 3) = 1 + rating
+            return event_count + rating_sum
+        return event_count * EVENT_WEIGHTS.get(event_type, 1.0)
+    
+    async def _get_room_vectors(self, room_ids: set[UUID]) -> dict[UUID, np.ndarray]:
+        """Get embeddings for a set of rooms."""
+        if not room_ids:
+            return {}
         
-        # Get room embeddings for events
-        room_ids = list(set(e.room_id for e in events))
-        embedding_query = select(RoomEmbedding).where(
+        embedding_query = select(RoomEmbedding.room_id, RoomEmbedding.embedding).where(
             RoomEmbedding.room_id.in_(room_ids)
         )
         embedding_result = await self.db.execute(embedding_query)
-        embeddings = {e.room_id: np.array(e.embedding) for e in embedding_result.scalars().all()}
+        return {
+            row.room_id: as_vector(row.embedding)
+            for row in embedding_result
+        }
+    
+    async def _apply_events_to_preference(
+        self,
+        user_id: UUID,
+        events: list[UserEvent | UserEventCreate],
+        embeddings: dict[UUID, np.ndarray] | None = None,
+    ) -> None:
+        """Fold new, already stored events into the user's preference vector.
+        
+        The vector is a weighted mean, so each event costs O(dim):
+        mean' = (mean * W + w * e) / (W + w).
+        """
+        if not events:
+            return
         
-        if not embeddings:
-            return None
+        # Lock the row against concurrent event writes for this user
+        query = (
+            select(UserPreferenceVector)
+            .where(UserPreferenceVector.user_id == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(query)
+        preference = result.scalar_one_or_none()
         
-        # Compute weighted average
-        weighted_sum = np.zeros(self.embedding_provider.dimension)
-        total_weight = 0.0
+        if preference is None:
+            # No row yet: build it from the full history, which includes these events
+            await self._rebuild_user_preference(user_id)
+            return
+        
+        if embeddings is None:
+            embeddings = await self._get_room_vectors({e.room_id for e in events})
+        
+        total_weight = preference.weight_sum
+        weighted_sum = (
+            np.asarray(preference.embedding, dtype=np.float64) * total_weight
+            if preference.embedding is not None
+            else np.zeros(self.embedding_provider.dimension)
+        )
         
         for event in events:
             if event.room_id not in embeddings:
                 continue
-            
-            weight = EVENT_WEIGHTS.get(event.event_type, 1.0)
-            
-            # Adjust RATE_ROOM weight based on rating
-            if event.event_type == EventType.RATE_ROOM and event.rating_value:
-                weight = 4.0 + (event.rating_value - 3)  # 2-6 based on 1-5 rating
-            
+            weight = self._event_weight(event.event_type, event.rating_value)
             weighted_sum += weight * embeddings[event.room_id]
             total_weight += weight
         
-        if total_weight == 0:
+        if total_weight > 0:
+            preference.embedding = (weighted_sum / total_weight).tolist()
+        preference.weight_sum = total_weight
+        preference.event_count += len(events)
+        await self.db.flush()
+    
+    async def _get_user_preference(self, user_id: UUID) -> UserPreferenceVector | None:
+        """Get the user's preference vector, building it from history if missing."""
+        query = select(UserPreferenceVector).where(UserPreferenceVector.user_id == user_id)
+        result = await self.db.execute(query)
+        preference = result.scalar_one_or_none()
+        if preference is not None:
+            return preference
+        
+        return await self._rebuild_user_preference(user_id)
+    
+    async def _get_user_room_weights(self, user_id: UUID) -> tuple[dict[UUID, float], int]:
+        """Get the user's total event weight per room and their event count.
+        
+        Raw events only cover the retained partitions; days before the oldest
+        raw event come from the daily rollup, so history the retention job
+        dropped still counts.
+        """
+        weights: dict[UUID, float] = {}
+        event_count = 0
+        
+        raw_query = select(
+            UserEvent.room_id,
+            UserEvent.event_type,
+            UserEvent.rating_value,
+        ).where(UserEvent.user_id == user_id)
+        for event in await self.db.execute(raw_query):
+            weight = self._event_weight(event.event_type, event.rating_value)
+            weights[event.room_id] = weights.get(event.room_id, 0.0) + weight
+            event_count += 1
+        
+        # Partitions are dropped a whole month at a time, so every day before
+        # the oldest raw event is fully covered by the rollup
+        oldest_raw = (await self.db.execute(select(func.min(UserEvent.created_at)))).scalar()
+        rollup_query = select(
+            UserEventDailyCount.room_id,
+            UserEventDailyCount.event_type,
+            UserEventDailyCount.event_count,
+            UserEventDailyCount.rating_sum,
+        ).where(UserEventDailyCount.user_id == user_id)
+        if oldest_raw is not None:
+            rollup_query = rollup_query.where(
+                UserEventDailyCount.day < oldest_raw.astimezone(timezone.utc).date()
+            )
+        for row in await self.db.execute(rollup_query):
+            weight = self._rollup_weight(row.event_type, row.event_count, row.rating_sum)
+            weights[row.room_id] = weights.get(row.room_id, 0.0) + weight
+            event_count += row.event_count
+        
+        return weights, event_count
+    
+    async def _rebuild_user_preference(self, user_id: UUID) -> UserPreferenceVector | None:
+        """Recompute a user's preference vector from their full history and store it."""
+        weights, event_count = await self._get_user_room_weights(user_id)
+        if not event_count:
+            return None
+        
+        embeddings = await self._get_room_vectors(set(weights))
+        
+        weighted_sum = np.zeros(self.embedding_provider.dimension)
+        total_weight = 0.0
+        for room_id, weight in weights.items():
+            if room_id not in embeddings:
+                continue
+            weighted_sum += weight * embeddings[room_id]
+            total_weight += weight
+        
+        values = {
+            "user_id": user_id,
+            "embedding": (weighted_sum / total_weight).tolist() if total_weight > 0 else None,
+            "weight_sum": total_weight,
+            "event_count": event_count,
+        }
+        stmt = pg_insert(UserPreferenceVector).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserPreferenceVector.user_id],
+            set_={
+                "embedding": stmt.excluded.embedding,
+                "weight_sum": stmt.excluded.weight_sum,
+                "event_count": stmt.excluded.event_count,
+                "updated_at": func.now(),
+            },
+        ).returning(UserPreferenceVector)
+        result = await self.db.execute(stmt, execution_options={"populate_existing": True})
+        return result.scalar_one()
+    
+    @staticmethod
+    def _normalize_preference(preference: UserPreferenceVector | None) -> np.ndarray | None:
+        """Get the unit-length user vector from a stored preference."""
+        if preference is None or preference.embedding is None or preference.weight_sum <= 0:
             return None
         
-        user_vector = weighted_sum / total_weight
+        user_vector = np.asarray(preference.embedding, dtype=np.float32)
         
         # Normalize
         norm = np.linalg.norm(user_vector)
-        if norm > 0:
-            user_vector = user_vector / norm
-        
-        return user_vector
+        if norm == 0:
+            return None
+        return user_vector / norm
     
     async def _get_similar_rooms(
         self,
         user_vector: np.ndarray,
         top_k: int = 50,
     ) -> list[tuple[Room, float]]:
-        """Get top-k similar rooms using pgvector cosine similarity."""
+        """Get top-k similar rooms by cosine similarity.
+        
+        Uses the in-process vector index, falling back to pgvector when the
+        index is disabled or the catalog is too large to hold in memory.
+        """
+        index = get_room_vector_index()
+        if settings.VECTOR_INDEX_ENABLED and await index.ensure_fresh(self.db):
+            hits = index.search(user_vector, top_k)
+            if not hits:
+                return []
+            
+            room_query = select(Room).where(
+                Room.id.in_([room_id for room_id, _ in hits]),
+                Room.status == RoomStatus.ACTIVE,
+            )
+            room_result = await self.db.execute(room_query)
+            rooms_by_id = {room.id: room for room in room_result.scalars().all()}
+            
+            return [
+                (rooms_by_id[room_id], similarity)
+                for room_id, similarity in hits
+                if room_id in rooms_by_id
+            ]
+        
         # Convert user vector to list for query
         vector_list = user_vector.tolist()
         
+        # The inner query orders room_embeddings alone so it can use the HNSW index;
+        # it over-fetches to leave enough candidates after dropping inactive rooms
+        candidate_limit = top_k * ANN_OVERFETCH_FACTOR
+        await set_ann_search_params(self.db, candidate_limit)
+        
         # Query using pgvector cosine distance
         # Note: pgvector uses <=> for cosine distance, so similarity = 1 - distance
+        distance = RoomEmbedding.embedding.cosine_distance(vector_list)
+        nearest = (
+            select(RoomEmbedding.room_id, distance.label("distance"))
+            .order_by(distance)
+            .limit(candidate_limit)
+            .subquery()
+        )
         query = (
-            select(Room, RoomEmbedding)
-            .join(RoomEmbedding, Room.id == RoomEmbedding.room_id)
+            select(Room, nearest.c.distance)
+            .join(nearest, Room.id == nearest.c.room_id)
             .where(Room.status == RoomStatus.ACTIVE)
-            .order_by(RoomEmbedding.embedding.cosine_distance(vector_list))
+            .order_by(nearest.c.distance)
             .limit(top_k)
         )
         
         result = await self.db.execute(query)
-        rows = result.all()
-        
-        similar_rooms = []
-        for room, embedding in rows:
-            # Compute similarity (1 - cosine distance)
-            room_vec = np.array(embedding.embedding)
-            similarity = float(np.dot(user_vector, room_vec))
-            similar_rooms.append((room, similarity))
         
-        return similar_rooms
+        return [(room, 1.0 - float(dist)) for room, dist in result.all()]
     
-    async def _filter_available_rooms(
+    async def _merge_cooccurrence_candidates(
         self,
-        rooms: list[tuple[Room, float]],
-        start: datetime,
-        end: datetime,
+        candidate_rooms: list[tuple[Room, float]],
+        user_rooms: list[Room],
     ) -> list[tuple[Room, float]]:
-        """Filter rooms by availability."""
-        if not rooms:
-            return []
-        
-        room_ids = [r[0].id for r in rooms]
-        
-        # Get rooms with conflicting reservations
-        conflict_query = select(Reservation.room_id).where(
-            and_(
-                Reservation.room_id.in_(room_ids),
-                Reservation.status == ReservationStatus.CONFIRMED,
-                Reservation.start_time < end,
-                Reservation.end_time > start,
+        """Merge co-occurrence candidates of the user's rooms into the similarity candidates.
+        
+        A room found by both sources keeps the higher of its two scores.
+        Adds nothing until the background refresh has loaded the index.
+        """
+        index = get_cooccurrence_index()
+        if not index.is_ready:
+            return candidate_rooms
+        hits = index.candidates([room.id for room in user_rooms], settings.COOCCURRENCE_CANDIDATES)
+        if not hits:
+            return candidate_rooms
+        
+        rooms_by_id = {room.id: room for room, _ in candidate_rooms}
+        missing_ids = [room_id for room_id, _ in hits if room_id not in rooms_by_id]
+        if missing_ids:
+            room_query = select(Room).where(Room.id.in_(missing_ids), Room.status == RoomStatus.ACTIVE)
+            room_result = await self.db.execute(room_query)
+            rooms_by_id.update({room.id: room for room in room_result.scalars().all()})
+        
+        merged = merge_candidates(
+            [(room.id, similarity) for room, similarity in candidate_rooms],
+            [(room_id, score) for room_id, score in hits if room_id in rooms_by_id],
+        )
+        return [(rooms_by_id[room_id], score) for room_id, score in merged]
+    
+    async def _filter_available_rooms(
+        self,
+        ranking: list[RecommendedRoom],
+        limit: int,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[RecommendedRoom]:
+        """Get the top `limit` rooms of a ranking, skipping rooms booked in [start, end)."""
+        if start and end and ranking:
+            unavailable_ids = await RoomService(self.db).get_unavailable_room_ids(
+                [room.room_id for room in ranking], start, end
             )
-        ).distinct()
-        
-        result = await self.db.execute(conflict_query)
-        unavailable_ids = set(result.scalars().all())
-        
-        return [(room, sim) for room, sim in rooms if room.id not in unavailable_ids]
+            ranking = [room for room in ranking if room.room_id not in unavailable_ids]
+        return ranking[:limit]
     
-    async def _get_trending_rooms(
+    async def _get_trending_rooms_cached(
         self,
         limit: int,
         start: datetime | None = None,
         end: datetime | None = None,
     ) -> list[RecommendedRoom]:
-        """Get trending rooms for cold start."""
-        # Trending = most reserved in last 30 days + highest rating
-        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-        
-        # Get reservation counts
-        reservation_count_query = (
-            select(
-                Reservation.room_id,
-                func.count(Reservation.id).label("reservation_count"),
-            )
-            .where(
-                Reservation.created_at >= thirty_days_ago,
-                Reservation.status.in_([ReservationStatus.CONFIRMED, ReservationStatus.COMPLETED]),
-            )
-            .group_by(Reservation.room_id)
+        """Get trending rooms from the shared cache, computing the ranking once per TTL."""
+        ranking = await trending_cache.get_or_compute(
+            TRENDING_CACHE_KEY,
+            self._in_own_session(AIService._get_trending_rooms),
         )
-        
-        res_result = await self.db.execute(reservation_count_query)
-        reservation_counts = {row.room_id: row.reservation_count for row in res_result}
-        
-        # Get room stats
+        return await self._filter_available_rooms(ranking, limit, start, end)
+    
+    async def _get_trending_rooms(self) -> list[RecommendedRoom]:
+        """Rank all active rooms for cold start, ignoring availability."""
+        # Trending = most reserved in last 30 days + highest rating
         room_stats = await self._get_room_stats()
+        reservation_counts = {
+            room_id: stats["reservation_count"]
+            for room_id, stats in room_stats.items()
+            if stats["reservation_count"]
+        }
         
         # Get active rooms
         room_query = select(Room).where(Room.status == RoomStatus.ACTIVE)
         room_result = await self.db.execute(room_query)
         rooms = list(room_result.scalars().all())
         
-        # Filter by availability if needed
-        if start and end:
-            available_rooms = []
-            for room in rooms:
-                conflict_query = select(Reservation.id).where(
-                    and_(
-                        Reservation.room_id == room.id,
-                        Reservation.status == ReservationStatus.CONFIRMED,
-                        Reservation.start_time < end,
-                        Reservation.end_time > start,
-                    )
-                ).limit(1)
-                conflict_result = await self.db.execute(conflict_query)
-                if not conflict_result.scalar_one_or_none():
-                    available_rooms.append(room)
-            rooms = available_rooms
-        
         # Score rooms
         max_reservations = max(reservation_counts.values()) if reservation_counts else 1
         max_rating = 5.0
@@ -391,45 +832,13 @@ class AIService:
                 reason="Trending room: Popular choice with high ratings",
             ))
         
-        # Sort and return top
+        # Sort, the caller takes the top available rooms
         scored_rooms.sort(key=lambda x: x.final_score, reverse=True)
-        return scored_rooms[:limit]
+        return scored_rooms
     
     async def _get_room_stats(self) -> dict[UUID, dict]:
-        """Get rating and popularity stats for all rooms."""
-        query = select(
-            Review.room_id,
-            func.avg(Review.rating).label("avg_rating"),
-            func.count(Review.id).label("review_count"),
-        ).group_by(Review.room_id)
-        
-        result = await self.db.execute(query)
-        
-        stats = {}
-        for row in result:
-            stats[row.room_id] = {
-                "avg_rating": float(row.avg_rating) if row.avg_rating else None,
-                "review_count": row.review_count,
-            }
-        
-        # Get reservation counts for popularity
-        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-        pop_query = (
-            select(
-                Reservation.room_id,
-                func.count(Reservation.id).label("reservation_count"),
-            )
-            .where(Reservation.created_at >= thirty_days_ago)
-            .group_by(Reservation.room_id)
-        )
-        
-        pop_result = await self.db.execute(pop_query)
-        for row in pop_result:
-            if row.room_id not in stats:
-                stats[row.room_id] = {}
-            stats[row.room_id]["reservation_count"] = row.reservation_count
-        
-        return stats
+        """Get rating and popularity stats for all rooms from the room_stats read model."""
+        return await RoomStatsService(self.db).get_stats()
     
     async def _get_user_interacted_rooms(self, user_id: UUID) -> list[Room]:
         """Get rooms the user has interacted with."""
@@ -454,47 +863,60 @@ class AIService:
         avg = result.scalar()
         return Decimal(str(avg)) if avg else None
     
-    def _compute_final_score(
+    async def _rerank(
         self,
-        room: Room,
-        similarity: float,
-        room_stats: dict[UUID, dict],
+        candidate_rooms: list[tuple[Room, float]],
+        user_rooms: list[Room],
         user_avg_price: Decimal | None,
-    ) -> float:
-        """Compute final re-ranking score."""
-        stats = room_stats.get(room.id, {})
-        
-        # Rating normalized (0-1)
-        avg_rating = stats.get("avg_rating", 0) or 0
-        rating_norm = avg_rating / 5.0
-        
-        # Popularity normalized
-        all_counts = [s.get("reservation_count", 0) for s in room_stats.values()]
-        max_count = max(all_counts) if all_counts else 1
-        room_count = stats.get("reservation_count", 0)
-        popularity_norm = room_count / max_count if max_count > 0 else 0
-        
-        # Price match (how close to user's average price preference)
-        price_match = 1.0
-        if user_avg_price:
-            price_diff = abs(float(room.base_price_per_hour) - float(user_avg_price))
-            max_price_diff = float(user_avg_price) * 0.5  # 50% tolerance
-            price_match = max(0, 1 - price_diff / max_price_diff) if max_price_diff > 0 else 1.0
-        
-        # Freshness (newer rooms get slight boost)
-        days_since_creation = (datetime.now(timezone.utc) - room.created_at.replace(tzinfo=timezone.utc)).days
-        freshness = max(0, 1 - days_since_creation / 365)  # Decay over 1 year
-        
-        # Compute final score
-        final_score = (
-            WEIGHT_SIMILARITY * similarity +
-            WEIGHT_RATING * rating_norm +
-            WEIGHT_POPULARITY * popularity_norm +
-            WEIGHT_PRICE_MATCH * price_match +
-            WEIGHT_FRESHNESS * freshness
+        limit: int,
+    ) -> list[RecommendedRoom]:
+        """Score all candidates with one vectorized pass and return the top `limit`."""
+        if not candidate_rooms:
+            return []
+        
+        stats_service = RoomStatsService(self.db)
+        room_stats = await stats_service.get_stats([room.id for room, _ in candidate_rooms])
+        max_reservation_count = await stats_service.get_max_reservation_count()
+        
+        stats = [room_stats.get(room.id, {}) for room, _ in candidate_rooms]
+        avg_rating = np.array(
+            [s.get("avg_rating") if s.get("avg_rating") is not None else np.nan for s in stats],
+            dtype=np.float64,
         )
         
-        return final_score
+        scores = score_candidates(
+            similarity=np.array([sim for _, sim in candidate_rooms], dtype=np.float64),
+            avg_rating=avg_rating,
+            reservation_count=np.array([s.get("reservation_count", 0) for s in stats], dtype=np.float64),
+            max_reservation_count=float(max_reservation_count),
+            price=np.array([float(room.base_price_per_hour) for room, _ in candidate_rooms]),
+            user_avg_price=float(user_avg_price) if user_avg_price else None,
+            created_at=np.array([
+                room.created_at.replace(tzinfo=room.created_at.tzinfo or timezone.utc).timestamp()
+                for room, _ in candidate_rooms
+            ]),
+        )
+        
+        # Sort by final score and take top limit
+        order = np.argsort(-scores, kind="stable")[:limit]
+        
+        recommendations = []
+        for i in order:
+            room, similarity = candidate_rooms[i]
+            recommendations.append(RecommendedRoom(
+                room_id=room.id,
+                name=room.name,
+                category=room.category,
+                capacity=room.capacity,
+                base_price_per_hour=room.base_price_per_hour,
+                avg_rating=stats[i].get("avg_rating"),
+                review_count=stats[i].get("review_count", 0),
+                similarity_score=similarity,
+                final_score=float(scores[i]),
+                reason=self._generate_explanation(room, user_rooms, similarity),
+            ))
+        
+        return recommendations
     
     def _generate_explanation(
         self,
@@ -0,0 +1,93 @@
+"""In-process async caches."""
+import asyncio
+import functools
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class TTLCache:
+    """Async TTL cache with single-flight request coalescing.
+    
+    Concurrent misses for the same key share one computation instead of each
+    running it. The computation runs in its own task, so a cancelled caller
+    doesn't take it down for the others; it must not use the caller's
+    request-scoped resources (e.g. its database session). Entries expire `ttl_seconds` after they were computed; the
+    oldest entries are evicted beyond `max_entries`.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable) -> Any | None:
+        """Get a cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value for `ttl_seconds`."""
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        if len(self._entries) > self.max_entries:
+            self._evict()
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single key."""
+        self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+    
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Get a cached value, computing it at most once across concurrent callers."""
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            
+            task = self._inflight.get(key)
+            if task is None:
+                self.misses += 1
+                task = asyncio.create_task(compute())
+                self._inflight[key] = task
+                # Added before any caller awaits the task, so it runs first
+                task.add_done_callback(functools.partial(self._finish, key))
+            else:
+                self.hits += 1
+            
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # The computation itself was cancelled (not this caller): retry
+                if task.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+    
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:
+            self.set(key, task.result())
+    
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            # Dicts keep insertion order, so the first key is the oldest
+            del self._entries[next(iter(self._entries))]
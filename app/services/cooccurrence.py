@@ -0,0 +1,236 @@
+"""Item-item co-occurrence index built from user events and reservations."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Iterable
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.ai import UserEvent
+from app.models.reservation import Reservation
+
+
+# Rows stamped shortly before the watermark may commit after it (the event
+# buffer stamps created_at before flushing), so every refresh re-reads this window
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+# Interactions streamed from the database and folded in per chunk
+REFRESH_CHUNK_ROWS = 50_000
+
+
+def merge_candidates(primary: list[tuple], secondary: list[tuple]) -> list[tuple]:
+    """Union two (key, score) candidate lists, keeping the best score per key.
+    
+    Keys keep the order of `primary`, keys only in `secondary` are appended.
+    """
+    scores = dict(primary)
+    for key, score in secondary:
+        scores[key] = max(score, scores.get(key, score))
+    return list(scores.items())
+
+
+class CooccurrenceIndex:
+    """Sparse room x room co-occurrence matrix in CSR arrays.
+    
+    Two rooms co-occur when the same user viewed, clicked, rated or booked
+    both. Scores are cosine-normalized counts, count(i, j) / sqrt(n_i * n_j),
+    so popular rooms don't co-occur with everything. Each row of
+    (`indptr`, `indices`, `data`) is sorted by descending score.
+    
+    New (user, room) interactions are folded into the pair counts
+    incrementally; only the CSR arrays are rebuilt from the counts. The
+    first load reads every interaction, so the app runs it in the background
+    (`run_periodic_cooccurrence_refresh`) and requests get no candidates
+    until `is_ready`.
+    """
+    
+    def __init__(self, check_interval_seconds: float = 0.0):
+        self.check_interval_seconds = check_interval_seconds
+        self._room_ids: list[UUID] = []
+        self._positions: dict[UUID, int] = {}
+        self._user_rooms: dict[UUID, set[int]] = {}
+        self._room_users: list[int] = []
+        # Keyed by (i << 32) | j with i < j, so keys convert to one int64 array
+        self._pair_counts: dict[int, int] = {}
+        self._csr = (np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+        self._watermark: datetime | None = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+    
+    @property
+    def is_ready(self) -> bool:
+        return self._loaded
+    
+    @property
+    def nnz(self) -> int:
+        return len(self._csr[2])
+    
+    @property
+    def csr(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The (indptr, indices, data) arrays, swapped as one tuple on rebuild."""
+        return self._csr
+    
+    def _position(self, room_id: UUID) -> int:
+        position = self._positions.get(room_id)
+        if position is None:
+            position = len(self._room_ids)
+            self._positions[room_id] = position
+            self._room_ids.append(room_id)
+            self._room_users.append(0)
+        return position
+    
+    def add_interactions(self, pairs: Iterable[tuple[UUID, UUID]]) -> int:
+        """Fold (user_id, room_id) interactions into the matrix.
+        
+        Repeated pairs are ignored. Returns the number of new pairs.
+        """
+        added = self._count_interactions(pairs)
+        if added:
+            self._build()
+        return added
+    
+    def _count_interactions(self, pairs: Iterable[tuple[UUID, UUID]]) -> int:
+        added = 0
+        for user_id, room_id in pairs:
+            position = self._position(room_id)
+            rooms = self._user_rooms.setdefault(user_id, set())
+            if position in rooms:
+                continue
+            for other in rooms:
+                key = (other << 32) | position if other < position else (position << 32) | other
+                self._pair_counts[key] = self._pair_counts.get(key, 0) + 1
+            rooms.add(position)
+            self._room_users[position] += 1
+            added += 1
+        return added
+    
+    def _build(self) -> None:
+        """Rebuild the CSR arrays from the pair counts."""
+        n = len(self._room_ids)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        if not self._pair_counts:
+            self._csr = (indptr, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+            return
+        
+        size = len(self._pair_counts)
+        keys = np.fromiter(self._pair_counts.keys(), dtype=np.int64, count=size)
+        counts = np.fromiter(self._pair_counts.values(), dtype=np.float32, count=size)
+        first = (keys >> 32).astype(np.int32)
+        second = (keys & 0xFFFFFFFF).astype(np.int32)
+        room_users = np.array(self._room_users, dtype=np.float32)
+        scores = counts / np.sqrt(room_users[first] * room_users[second])
+        
+        # Symmetric: store (i, j) and (j, i)
+        rows = np.concatenate([first, second])
+        cols = np.concatenate([second, first])
+        values = np.concatenate([scores, scores])
+        
+        order = np.lexsort((-values, rows))
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        self._csr = (indptr, cols[order], values[order])
+    
+    def candidates(self, seed_room_ids: Iterable[UUID], k: int) -> list[tuple[UUID, float]]:
+        """Get the top-k rooms co-occurring with any seed room, best score per room."""
+        indptr, all_indices, all_data = self._csr
+        rows = [self._positions[room_id] for room_id in seed_room_ids if room_id in self._positions]
+        rows = [r for r in rows if r + 1 < len(indptr)]
+        if not rows or k <= 0 or len(all_data) == 0:
+            return []
+        
+        # Rows are sorted by score, so only the first k entries of each can make the top-k
+        slices = [slice(indptr[r], min(indptr[r + 1], indptr[r] + k)) for r in rows]
+        indices = np.concatenate([all_indices[s] for s in slices])
+        if len(indices) == 0:
+            return []
+        data = np.concatenate([all_data[s] for s in slices])
+        
+        # Best score per room: sort by room then score, keep each room's last entry
+        order = np.lexsort((data, indices))
+        indices, data = indices[order], data[order]
+        last = np.append(indices[1:] != indices[:-1], True)
+        indices, data = indices[last], data[last]
+        
+        top = np.argsort(-data, kind="stable")[:k]
+        return [(self._room_ids[indices[i]], float(data[i])) for i in top]
+    
+    def clear(self) -> None:
+        """Drop all interactions and force a full reload on next use."""
+        self.__init__(self.check_interval_seconds)
+    
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Fold in interactions recorded since the last refresh, at most every `check_interval_seconds`."""
+        if self._loaded and time.monotonic() - self._checked_at < self.check_interval_seconds:
+            return
+        
+        async with self._lock:
+            if self._loaded and time.monotonic() - self._checked_at < self.check_interval_seconds:
+                return
+            await self._refresh(db)
+    
+    async def refresh(self, db: AsyncSession) -> None:
+        """Fold in interactions recorded since the last refresh."""
+        async with self._lock:
+            await self._refresh(db)
+    
+    async def _refresh(self, db: AsyncSession) -> None:
+        events = select(UserEvent.user_id, UserEvent.room_id, UserEvent.created_at)
+        reservations = select(Reservation.user_id, Reservation.room_id, Reservation.created_at)
+        if self._watermark is not None:
+            since = self._watermark - REFRESH_OVERLAP
+            events = events.where(UserEvent.created_at > since)
+            reservations = reservations.where(Reservation.created_at > since)
+        
+        interactions = union_all(events, reservations).subquery()
+        query = (
+            select(interactions.c.user_id, interactions.c.room_id, func.max(interactions.c.created_at))
+            .group_by(interactions.c.user_id, interactions.c.room_id)
+        )
+        
+        # Folding and rebuilding are O(rows) and O(nnz) Python/numpy work, keep both off the event loop
+        added = 0
+        latest = self._watermark
+        result = await db.stream(query)
+        async for rows in result.partitions(REFRESH_CHUNK_ROWS):
+            added += await asyncio.to_thread(
+                self._count_interactions, [(user_id, room_id) for user_id, room_id, _ in rows]
+            )
+            chunk_latest = max(created_at for _, _, created_at in rows)
+            if latest is None or chunk_latest > latest:
+                latest = chunk_latest
+        if added:
+            await asyncio.to_thread(self._build)
+        
+        self._watermark = latest
+        self._loaded = True
+        self._checked_at = time.monotonic()
+
+
+_cooccurrence_index: CooccurrenceIndex | None = None
+
+
+def get_cooccurrence_index() -> CooccurrenceIndex:
+    """Get the process-wide co-occurrence index."""
+    global _cooccurrence_index
+    if _cooccurrence_index is None:
+        _cooccurrence_index = CooccurrenceIndex(
+            check_interval_seconds=settings.COOCCURRENCE_CHECK_INTERVAL_SECONDS,
+        )
+    return _cooccurrence_index
+
+
+async def run_periodic_cooccurrence_refresh(interval_seconds: float) -> None:
+    """Load the co-occurrence index, then fold in new interactions forever."""
+    while True:
+        try:
+            async with async_session_maker() as db:
+                await get_cooccurrence_index().refresh(db)
+        except Exception as e:
+            print(f"⚠️  Co-occurrence refresh failed: {e}")
+        
+        await asyncio.sleep(interval_seconds)
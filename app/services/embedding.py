@@ -1,6 +1,139 @@
 """Embedding provider for AI recommendations using Hugging Face."""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
 import numpy as np
 
+from app.core.config import settings
+
+
+DEFAULT_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# File written by scripts/download_model.py --onnx inside EMBEDDING_ONNX_MODEL_PATH
+ONNX_MODEL_FILE = "model_int8.onnx"
+
+# Appended to the model name stored with ONNX embeddings, so switching backends re-encodes rooms
+ONNX_MODEL_SUFFIX = "-onnx-int8"
+
+# Same truncation as the sentence-transformers model (max_seq_length)
+ONNX_MAX_SEQ_LENGTH = 128
+
+# Rounds of per-worker warmup calls before giving up on reaching every process worker
+WORKER_WARMUP_ROUNDS = 3
+
+
+class InferenceExecutor:
+    """Bounded pool for running blocking model inference off the event loop.
+    
+    `mode` is "thread" (shares the model loaded in this process) or "process"
+    (each worker process loads its own copy, so torch can't hold the GIL of
+    the API process). At most `max_concurrency` calls run at once; the rest
+    wait and are counted in `queue_depth`.
+    """
+    
+    def __init__(self, mode: str = "thread", max_workers: int = 1, max_concurrency: int = 1):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor mode: {mode}")
+        
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._pool: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        
+        # Metrics
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+    
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                # spawn: forking a process that may already hold torch threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="embedding",
+                )
+        return self._pool
+    
+    async def run(self, fn, *args):
+        """Run `fn(*args)` in the pool, waiting for a free slot first."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        queued_at = time.perf_counter()
+        self.queue_depth += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+        
+        started = time.perf_counter()
+        self.total_wait_seconds += started - queued_at
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_pool(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_run_seconds += time.perf_counter() - started
+            self._semaphore.release()
+    
+    async def run_on_workers(self, fn, *args) -> list:
+        """Run `fn(*args)` once per pool worker, bypassing the concurrency limit.
+        
+        The calls are submitted together, so each starts a worker of its own
+        and, as long as they don't finish instantly (loading a model), no
+        worker takes two. Meant for startup warmup.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        return await asyncio.gather(*[
+            loop.run_in_executor(pool, fn, *args) for _ in range(self.max_workers)
+        ])
+    
+    def stats(self) -> dict:
+        """Get executor queue and throughput metrics."""
+        finished = self.completed + self.failed
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 2) if finished else None,
+            "avg_run_ms": round(self.total_run_seconds / finished * 1000, 2) if finished else None,
+        }
+    
+    def shutdown(self) -> None:
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
 
 class HuggingFaceEmbeddingProvider:
     """Hugging Face embedding provider using sentence-transformers.
@@ -13,23 +146,62 @@ class HuggingFaceEmbeddingProvider:
     - Great for Indonesian language support
     """
     
-    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        executor: InferenceExecutor | None = None,
+    ):
         self._model = None
         self._dimension = 384
+        self._load_lock = threading.Lock()
+        self._worker_ready = False
+        # `base_model_name` is the Hugging Face model; `model_name` identifies its embeddings
+        self.base_model_name = model_name
         self.model_name = model_name
+        self.executor = executor or InferenceExecutor(
+            mode=settings.EMBEDDING_EXECUTOR,
+            max_workers=settings.EMBEDDING_EXECUTOR_WORKERS,
+            max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+        )
+        # Set when the model loads in this process (thread mode); in process
+        # mode each worker loads its own copy, reported in `worker_stats`
+        self.load_time_seconds: float | None = None
+        self.memory_bytes: int | None = None
+        self.worker_stats: dict[int, dict] = {}
     
     @property
     def dimension(self) -> int:
         return self._dimension
     
+    @property
+    def is_ready(self) -> bool:
+        """Whether the model is loaded and can encode without a cold start."""
+        return self._model is not None or self._worker_ready
+    
     def _load_model(self):
         """Lazy load the model on first use."""
-        if self._model is None:
+        if self._model is not None:
+            return
+        
+        # Concurrent first requests must not load the model twice
+        with self._load_lock:
+            if self._model is not None:
+                return
+            
             try:
                 from sentence_transformers import SentenceTransformer
                 print(f"Loading Hugging Face model: {self.model_name}...")
-                self._model = SentenceTransformer(self.model_name)
-                print(f"Model loaded successfully with dimension: {self._dimension}")
+                started = time.perf_counter()
+                model = SentenceTransformer(self.model_name)
+                self.load_time_seconds = time.perf_counter() - started
+                self.memory_bytes = sum(
+                    p.numel() * p.element_size() for p in model.parameters()
+                )
+                self._model = model
+                print(
+                    f"Model loaded successfully with dimension: {self._dimension} "
+                    f"({self.load_time_seconds:.2f}s, {self.memory_bytes / 1024 / 1024:.1f}MB)"
+                )
             except ImportError:
                 raise RuntimeError(
                     "sentence-transformers not installed. "
@@ -40,32 +212,301 @@ class HuggingFaceEmbeddingProvider:
                     f"Failed to load Hugging Face model '{self.model_name}': {e}"
                 )
     
+    async def warmup(self) -> None:
+        """Load the model and run one encode so the first request is not a cold start.
+        
+        In process mode every pool worker loads its own copy and reports its
+        load time and memory into `worker_stats`.
+        """
+        if self.executor.mode != "process":
+            await self.get_embedding("warmup")
+            return
+        
+        for _ in range(WORKER_WARMUP_ROUNDS):
+            for worker in await self.executor.run_on_workers(_warmup_in_worker, self.base_model_name):
+                self.worker_stats[worker["pid"]] = worker
+            if len(self.worker_stats) >= self.executor.max_workers:
+                break
+        self._worker_ready = True
+    
+    def stats(self) -> dict:
+        """Get model readiness and resource stats.
+        
+        In process mode the top-level load time and memory stay null, as the
+        model lives in the workers; `workers` has them per worker process.
+        """
+        return {
+            "model_name": self.model_name,
+            "dimension": self._dimension,
+            "is_ready": self.is_ready,
+            "load_time_seconds": _round_seconds(self.load_time_seconds),
+            "memory_mb": _to_mb(self.memory_bytes),
+            "workers": [
+                {
+                    "pid": pid,
+                    "load_time_seconds": _round_seconds(worker["load_time_seconds"]),
+                    "memory_mb": _to_mb(worker["memory_bytes"]),
+                }
+                for pid, worker in sorted(self.worker_stats.items())
+            ],
+            "executor": self.executor.stats(),
+        }
+    
+    def _encode_sync(self, texts: str | list[str], batch_size: int = 32) -> np.ndarray:
+        """Blocking encode, must run inside the inference executor."""
+        self._load_model()
+        
+        # Using show_progress_bar=False for cleaner API usage
+        return self._model.encode(
+            texts, 
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=True  # Built-in normalization
+        )
+    
+    async def _encode(self, texts: str | list[str], batch_size: int = 32) -> np.ndarray:
+        """Encode in the inference executor so torch never blocks the event loop."""
+        if self.executor.mode == "process":
+            embeddings = await self.executor.run(_encode_in_worker, self.base_model_name, texts, batch_size)
+            self._worker_ready = True
+            return embeddings
+        return await self.executor.run(self._encode_sync, texts, batch_size)
+    
     async def get_embedding(self, text: str) -> list[float]:
         """Get embedding using Hugging Face model."""
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
-        self._load_model()
-        
         try:
-            # sentence-transformers encode is synchronous but fast
-            # Using show_progress_bar=False for cleaner API usage
-            embedding = self._model.encode(
-                text, 
-                convert_to_numpy=True,
-                show_progress_bar=False,
-                normalize_embeddings=True  # Built-in normalization
-            )
-            
+            embedding = await self._encode(text)
             return embedding.tolist()
+        except RuntimeError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Failed to get embedding from Hugging Face: {e}")
+    
+    async def get_embeddings(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        """Get embeddings for many texts with batched forward passes."""
+        if not texts:
+            return []
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Text cannot be empty")
+        
+        try:
+            embeddings = await self._encode(list(texts), batch_size)
+            return embeddings.tolist()
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to get embeddings from Hugging Face: {e}")
+
+
+class OnnxEmbeddingProvider(HuggingFaceEmbeddingProvider):
+    """Int8-quantized ONNX Runtime version of the Hugging Face provider.
+    
+    Runs the same MiniLM model exported by `scripts/download_model.py --onnx`
+    on the CPU execution provider, without loading torch. Mean pooling and
+    L2 normalization match sentence-transformers, so output is the same
+    384-dimensional normalized vector.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        model_path: str | None = None,
+        executor: InferenceExecutor | None = None,
+    ):
+        super().__init__(model_name, executor)
+        # Int8 vectors differ slightly from torch ones, so they are stored as a different model
+        self.model_name = f"{model_name}{ONNX_MODEL_SUFFIX}"
+        self.model_path = Path(model_path or settings.EMBEDDING_ONNX_MODEL_PATH)
+        self._tokenizer = None
+        self._input_names: list[str] = []
+    
+    def _load_model(self):
+        """Lazy load the ONNX session and tokenizer on first use."""
+        if self._model is not None:
+            return
+        
+        with self._load_lock:
+            if self._model is not None:
+                return
+            
+            model_file = self.model_path / ONNX_MODEL_FILE
+            if not model_file.exists():
+                raise RuntimeError(
+                    f"ONNX model not found at {model_file}. "
+                    "Prepare it with: python scripts/download_model.py --onnx"
+                )
+            
+            try:
+                import onnxruntime
+                from transformers import AutoTokenizer
+                print(f"Loading ONNX model: {model_file}...")
+                started = time.perf_counter()
+                self._tokenizer = AutoTokenizer.from_pretrained(str(self.model_path))
+                session = onnxruntime.InferenceSession(
+                    str(model_file), providers=["CPUExecutionProvider"]
+                )
+                self._input_names = [i.name for i in session.get_inputs()]
+                self.load_time_seconds = time.perf_counter() - started
+                self.memory_bytes = model_file.stat().st_size
+                self._model = session
+                print(
+                    f"ONNX model loaded successfully with dimension: {self._dimension} "
+                    f"({self.load_time_seconds:.2f}s, {self.memory_bytes / 1024 / 1024:.1f}MB)"
+                )
+            except ImportError:
+                raise RuntimeError(
+                    "onnxruntime not installed. "
+                    "Install with: pip install onnxruntime transformers"
+                )
+            except Exception as e:
+                raise RuntimeError(f"Failed to load ONNX model from '{self.model_path}': {e}")
+    
+    def stats(self) -> dict:
+        """Get model readiness and resource stats."""
+        return {**super().stats(), "backend": "onnx", "model_path": str(self.model_path)}
+    
+    def _encode_sync(self, texts: str | list[str], batch_size: int = 32) -> np.ndarray:
+        """Blocking encode, must run inside the inference executor."""
+        self._load_model()
+        
+        single = isinstance(texts, str)
+        batch_texts = [texts] if single else texts
+        
+        batches = []
+        for i in range(0, len(batch_texts), batch_size):
+            encoded = self._tokenizer(
+                batch_texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=ONNX_MAX_SEQ_LENGTH,
+                return_tensors="np",
+            )
+            inputs = {
+                name: encoded[name].astype(np.int64) if name in encoded
+                else np.zeros_like(encoded["input_ids"], dtype=np.int64)
+                for name in self._input_names
+            }
+            token_embeddings = self._model.run(None, inputs)[0]
+            
+            # Mean pooling over real tokens, then L2 normalize
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        
+        embeddings = np.concatenate(batches)
+        return embeddings[0] if single else embeddings
+
+
+@lru_cache(maxsize=65536)
+def _fake_word_vector(word: str, dimension: int) -> np.ndarray:
+    """Fixed pseudo-random direction for a word, seeded from its SHA-256."""
+    seed = int.from_bytes(hashlib.sha256(word.encode("utf-8")).digest()[:8], "big")
+    return np.random.default_rng(seed).standard_normal(dimension)
+
+
+class FakeEmbeddingProvider:
+    """Deterministic embedding provider for tests and offline evaluation.
+    
+    Needs no model: each word maps to a fixed random direction and a text's
+    embedding is the normalized sum of its word vectors, so texts sharing
+    words are similar. Same interface as HuggingFaceEmbeddingProvider.
+    """
+    
+    def __init__(self, dimension: int = 384):
+        self._dimension = dimension
+        self.model_name = "fake"
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    @property
+    def is_ready(self) -> bool:
+        return True
+    
+    async def warmup(self) -> None:
+        """Nothing to load."""
+        pass
+    
+    def stats(self) -> dict:
+        """Get provider stats."""
+        return {"model_name": self.model_name, "dimension": self._dimension, "is_ready": True}
+    
+    def _encode(self, text: str) -> np.ndarray:
+        words = re.findall(r"\w+", text.lower()) or [text]
+        vector = np.sum([_fake_word_vector(word, self._dimension) for word in words], axis=0)
+        return (vector / np.linalg.norm(vector)).astype(np.float32)
+    
+    async def get_embedding(self, text: str) -> list[float]:
+        """Get a deterministic embedding for text."""
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty")
+        return self._encode(text).tolist()
+    
+    async def get_embeddings(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        """Get deterministic embeddings for many texts."""
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Text cannot be empty")
+        return [self._encode(text).tolist() for text in texts]
+
+
+def _round_seconds(seconds: float | None) -> float | None:
+    return round(seconds, 3) if seconds is not None else None
+
+
+def _to_mb(size_bytes: int | None) -> float | None:
+    return round(size_bytes / 1024 / 1024, 1) if size_bytes is not None else None
+
 
+def _encode_in_worker(model_name: str, texts: str | list[str], batch_size: int) -> np.ndarray:
+    """Process pool entry point, each worker keeps its own provider registry."""
+    return get_embedding_provider(model_name)._encode_sync(texts, batch_size)
 
-def get_embedding_provider() -> HuggingFaceEmbeddingProvider:
-    """Get Hugging Face embedding provider.
+
+def _warmup_in_worker(model_name: str) -> dict:
+    """Process pool entry point: load the model in this worker and report its cost."""
+    provider = get_embedding_provider(model_name)
+    provider._encode_sync("warmup")
+    return {
+        "pid": os.getpid(),
+        "load_time_seconds": provider.load_time_seconds,
+        "memory_bytes": provider.memory_bytes,
+    }
+
+
+# Process-wide provider registry, keyed by model name.
+# Loading the model costs seconds and ~100MB, so every AIService shares one instance.
+_providers: dict[str, HuggingFaceEmbeddingProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_embedding_provider(model_name: str | None = None) -> HuggingFaceEmbeddingProvider:
+    """Get the shared Hugging Face embedding provider.
     
     Uses sentence-transformers with paraphrase-multilingual-MiniLM-L12-v2 model.
-    Free, offline, and supports Indonesian language.
+    Free, offline, and supports Indonesian language. With EMBEDDING_BACKEND=onnx
+    the same model runs int8-quantized on ONNX Runtime instead of torch.
     """
-    return HuggingFaceEmbeddingProvider()
+    model_name = model_name or settings.EMBEDDING_MODEL_NAME
+    provider = _providers.get(model_name)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(model_name)
+            if provider is None:
+                if settings.EMBEDDING_BACKEND == "onnx":
+                    provider = OnnxEmbeddingProvider(model_name)
+                else:
+                    provider = HuggingFaceEmbeddingProvider(model_name)
+                _providers[model_name] = provider
+    return provider
+
+
+def shutdown_embedding_providers() -> None:
+    """Shut down the inference pools of all shared providers."""
+    for provider in _providers.values():
+        provider.executor.shutdown()
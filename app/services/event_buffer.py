@@ -0,0 +1,181 @@
+"""Write-behind buffer for user event ingestion."""
+import asyncio
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.schemas.ai import UserEventCreate
+from app.services.ai import AIService
+
+
+class EventBufferFullError(Exception):
+    """Raised when the event buffer has no room for more events."""
+    pass
+
+
+class EventBuffer:
+    """Bounded in-process queue of user events, bulk-inserted in the background.
+    
+    Events are flushed every `flush_interval_ms` or as soon as `flush_batch_size`
+    are pending, whichever comes first. Call `stop()` on shutdown to flush the rest.
+    
+    A failed bulk insert is retried per user. Events the database rejects are
+    dropped and counted in `rejected` rather than blocking every later flush.
+    """
+    
+    def __init__(
+        self,
+        max_size: int,
+        flush_interval_ms: int,
+        flush_batch_size: int,
+        session_factory=async_session_maker,
+    ):
+        self.max_size = max_size
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_batch_size = flush_batch_size
+        self._session_factory = session_factory
+        self._pending: list[tuple[UUID, UserEventCreate, datetime]] = []
+        self._flush_lock: asyncio.Lock | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.flushed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+    
+    @property
+    def size(self) -> int:
+        """Number of events waiting to be written."""
+        return len(self._pending)
+    
+    def add(self, user_id: UUID, events: list[UserEventCreate]) -> None:
+        """Queue events for a user. All or none are accepted."""
+        if len(self._pending) + len(events) > self.max_size:
+            raise EventBufferFullError("Event buffer is full")
+        
+        # Stamp at enqueue so stored times reflect when the event happened
+        created_at = datetime.now(timezone.utc)
+        self._pending.extend((user_id, event, created_at) for event in events)
+        
+        if self._wake is not None and len(self._pending) >= self.flush_batch_size:
+            self._wake.set()
+    
+    async def flush(self) -> int:
+        """Write all pending events in one transaction. Returns the number written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            
+            try:
+                await self._write(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                print(f"⚠️  Event buffer flush failed, retrying per user: {e}")
+                return await self._write_per_user(batch)
+            
+            self.flushed += len(batch)
+            return len(batch)
+    
+    async def _write(self, events: list[tuple[UUID, UserEventCreate, datetime]]) -> None:
+        async with self._session_factory() as db:
+            try:
+                await AIService(db).ingest_events(events)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+    
+    async def _write_per_user(self, batch: list[tuple[UUID, UserEventCreate, datetime]]) -> int:
+        """Write each user's events in its own transaction after a failed bulk insert.
+        
+        Groups the database rejects are dropped. On any other error (e.g. the
+        database is down) the remaining events go back in front of newer ones,
+        as far as the bound allows.
+        """
+        by_user: dict[UUID, list[tuple[UUID, UserEventCreate, datetime]]] = {}
+        for item in batch:
+            by_user.setdefault(item[0], []).append(item)
+        
+        written = 0
+        groups = list(by_user.values())
+        for position, events in enumerate(groups):
+            try:
+                await self._write(events)
+            except (IntegrityError, DataError) as e:
+                self.rejected += len(events)
+                print(f"⚠️  Dropped {len(events)} events of user {events[0][0]}: {e.orig}")
+                continue
+            except Exception as e:
+                retry = [item for group in groups[position:] for item in group]
+                room = max(self.max_size - len(self._pending), 0)
+                self.dropped += max(len(retry) - room, 0)
+                self._pending = retry[:room] + self._pending
+                print(f"⚠️  Event buffer flush failed: {e}")
+                break
+            written += len(events)
+        
+        self.flushed += written
+        return written
+    
+    def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the background loop and flush whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+        await self.flush()
+    
+    async def _run(self) -> None:
+        """Flush on the interval, or early when a full batch is waiting."""
+        timeout = self.flush_interval_ms / 1000
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+    
+    def stats(self) -> dict:
+        """Get buffer metrics."""
+        return {
+            "pending": self.size,
+            "max_size": self.max_size,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed_flushes": self.failed_flushes,
+            "running": self._task is not None,
+        }
+
+
+_event_buffer: EventBuffer | None = None
+
+
+def get_event_buffer() -> EventBuffer:
+    """Get the shared event buffer."""
+    global _event_buffer
+    if _event_buffer is None:
+        _event_buffer = EventBuffer(
+            max_size=settings.EVENT_BUFFER_MAX_SIZE,
+            flush_interval_ms=settings.EVENT_BUFFER_FLUSH_INTERVAL_MS,
+            flush_batch_size=settings.EVENT_BUFFER_FLUSH_BATCH_SIZE,
+        )
+    return _event_buffer
@@ -0,0 +1,250 @@
+"""User event partition maintenance: rollup, future partitions and retention.
+
+Run from scripts/maintain_user_events.py, never from the web process.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import select, func, text, cast, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.db.session import engine as default_engine
+from app.models.ai import UserEvent, UserEventDailyCount
+
+
+# Partitions are named user_events_YYYY_MM
+PARTITION_PREFIX = "user_events_"
+
+# Days re-aggregated on every run, so late events and missed runs are picked up
+ROLLUP_LOOKBACK_DAYS = 3
+
+# pg advisory lock key held for the whole run, so only one process does maintenance
+MAINTENANCE_LOCK_ID = 7_007_001
+
+# DETACH/DROP give up instead of queueing behind (and blocking) event writes
+PARTITION_LOCK_TIMEOUT = "5s"
+
+
+def month_start(day: date) -> date:
+    """First day of the month containing `day`."""
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` after the month of `day`."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding events of `month`."""
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+
+def parse_partition_name(name: str) -> date | None:
+    """Month covered by a partition, or None for the default partition."""
+    try:
+        year, month = name.removeprefix(PARTITION_PREFIX).split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+class EventPartitionService:
+    """Service maintaining the monthly user_events partitions and daily rollup."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def is_partitioned(self) -> bool:
+        """Check whether user_events is a partitioned table."""
+        result = await self.db.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = 'user_events'")
+        )
+        return result.scalar() == "p"
+    
+    async def get_partitions(self) -> dict[date, str]:
+        """Get the monthly partitions of user_events, keyed by month."""
+        result = await self.db.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'user_events'
+        """))
+        partitions = {}
+        for name in result.scalars().all():
+            month = parse_partition_name(name)
+            if month is not None:
+                partitions[month] = name
+        return partitions
+    
+    async def ensure_partitions(self, months_ahead: int) -> list[str]:
+        """Create missing partitions from the current month to `months_ahead` months ahead."""
+        existing = await self.get_partitions()
+        current = month_start(datetime.now(timezone.utc).date())
+        
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            name = partition_name(month)
+            await self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF user_events "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        return created
+    
+    async def rollup(self, start_day: date, end_day: date) -> None:
+        """Recompute daily counts for days in [start_day, end_day).
+        
+        Idempotent: counts for a day are replaced, not added to.
+        """
+        start = datetime.combine(start_day, time.min, tzinfo=timezone.utc)
+        end = datetime.combine(end_day, time.min, tzinfo=timezone.utc)
+        day = cast(func.timezone("UTC", UserEvent.created_at), Date)
+        
+        source = (
+            select(
+                day,
+                UserEvent.user_id,
+                UserEvent.room_id,
+                UserEvent.event_type,
+                func.count(),
+                func.coalesce(func.sum(UserEvent.rating_value), 0),
+            )
+            .where(UserEvent.created_at >= start, UserEvent.created_at < end)
+            .group_by(day, UserEvent.user_id, UserEvent.room_id, UserEvent.event_type)
+        )
+        
+        stmt = pg_insert(UserEventDailyCount).from_select(
+            ["day", "user_id", "room_id", "event_type", "event_count", "rating_sum"],
+            source,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                UserEventDailyCount.day,
+                UserEventDailyCount.user_id,
+                UserEventDailyCount.room_id,
+                UserEventDailyCount.event_type,
+            ],
+            set_={
+                "event_count": stmt.excluded.event_count,
+                "rating_sum": stmt.excluded.rating_sum,
+            },
+        )
+        await self.db.execute(stmt)
+    
+    async def get_expired_partitions(self, retention_months: int) -> dict[date, str]:
+        """Get the partitions entirely older than `retention_months` months."""
+        cutoff = add_months(month_start(datetime.now(timezone.utc).date()), -retention_months)
+        partitions = await self.get_partitions()
+        return {
+            month: name
+            for month, name in sorted(partitions.items())
+            if add_months(month, 1) <= cutoff
+        }
+    
+    async def has_default_partition(self) -> bool:
+        """Check whether user_events has a DEFAULT partition (blocks DETACH CONCURRENTLY)."""
+        result = await self.db.execute(text("""
+            SELECT 1
+            FROM pg_partitioned_table
+            JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid
+            WHERE pg_class.relname = 'user_events' AND partdefid <> 0
+        """))
+        return result.scalar() is not None
+    
+    async def run_maintenance(self) -> dict:
+        """Roll up recent days and expired months, and create upcoming partitions.
+        
+        Returns the created partitions and the expired ones, which are fully
+        rolled up once this transaction commits and can then be detached.
+        """
+        today = datetime.now(timezone.utc).date()
+        await self.rollup(today - timedelta(days=ROLLUP_LOOKBACK_DAYS), today + timedelta(days=1))
+        
+        created, expired = [], []
+        if await self.is_partitioned():
+            created = await self.ensure_partitions(settings.USER_EVENTS_PARTITIONS_AHEAD)
+            if settings.USER_EVENTS_RETENTION_MONTHS > 0:
+                for month, name in (
+                    await self.get_expired_partitions(settings.USER_EVENTS_RETENTION_MONTHS)
+                ).items():
+                    # Make sure the rollup is complete before the raw rows go away
+                    await self.rollup(month, add_months(month, 1))
+                    expired.append(name)
+        
+        return {"created_partitions": created, "expired_partitions": expired}
+
+
+async def detach_and_drop_partition(engine: AsyncEngine, name: str, concurrently: bool) -> None:
+    """Detach an expired partition from user_events, then drop it.
+    
+    DETACH CONCURRENTLY only takes a SHARE UPDATE EXCLUSIVE lock on the parent
+    but can't run inside a transaction; the plain DETACH briefly takes an
+    ACCESS EXCLUSIVE lock, so it runs alone with a lock timeout.
+    """
+    if concurrently:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"SET lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            # An interrupted concurrent detach leaves the partition pending until finalized
+            pending = (await conn.execute(
+                text("SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = to_regclass(:name)"),
+                {"name": name},
+            )).scalar()
+            mode = "FINALIZE" if pending else "CONCURRENTLY"
+            await conn.execute(text(f"ALTER TABLE user_events DETACH PARTITION {name} {mode}"))
+    else:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            await conn.execute(text(f"ALTER TABLE user_events DETACH PARTITION {name}"))
+    
+    # Detached, the table is no longer read by event queries
+    async with engine.begin() as conn:
+        await conn.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+        await conn.execute(text(f"DROP TABLE {name}"))
+
+
+async def run_event_maintenance(engine: AsyncEngine | None = None) -> dict | None:
+    """Run event partition maintenance once, under an advisory lock.
+    
+    Returns the created and dropped partitions, or None if another process
+    holds the maintenance lock.
+    """
+    engine = engine or default_engine
+    async with engine.connect() as lock_conn:
+        acquired = (await lock_conn.execute(
+            select(func.pg_try_advisory_lock(MAINTENANCE_LOCK_ID))
+        )).scalar()
+        await lock_conn.commit()
+        if not acquired:
+            return None
+        
+        try:
+            async with AsyncSession(engine) as db:
+                service = EventPartitionService(db)
+                result = await service.run_maintenance()
+                concurrently = (
+                    engine.dialect.server_version_info >= (14,)
+                    and not await service.has_default_partition()
+                )
+                await db.commit()
+            
+            dropped = []
+            for name in result["expired_partitions"]:
+                try:
+                    await detach_and_drop_partition(engine, name, concurrently)
+                    dropped.append(name)
+                except Exception as e:
+                    # Kept until the next run; its rows are already rolled up
+                    print(f"⚠️  Could not drop user event partition {name}: {e}")
+            
+            return {"created_partitions": result["created_partitions"], "dropped_partitions": dropped}
+        finally:
+            await lock_conn.execute(select(func.pg_advisory_unlock(MAINTENANCE_LOCK_ID)))
+            await lock_conn.commit()
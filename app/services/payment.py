@@ -10,6 +10,9 @@ from app.core.config import settings
 from app.models.payment import Payment, PaymentStatus
 from app.models.reservation import Reservation, ReservationStatus
 from app.schemas.payment import PaymentResponse, PaymentInstructionsResponse
+from app.services.reservation import flush_checking_overlap
+from app.services.reservation_index import track_reservation_change
+from app.services.room_stats import RoomStatsService
 
 
 class PaymentService:
@@ -102,9 +105,15 @@ class PaymentService:
         reservation = result.scalar_one_or_none()
         
         if reservation:
+            old_status = reservation.status
             reservation.status = ReservationStatus.CONFIRMED
+            await RoomStatsService(self.db).record_reservation_status_change(
+                reservation, old_status, reservation.status
+            )
+            track_reservation_change(self.db, reservation)
         
-        await self.db.flush()
+        # A cancelled reservation being re-confirmed may now clash with another booking
+        await flush_checking_overlap(self.db)
         
         # Re-query with eager loading to avoid lazy loading issues
         query = select(Payment).where(Payment.id == payment_id).options(
@@ -136,7 +145,12 @@ class PaymentService:
         reservation = result.scalar_one_or_none()
         
         if reservation:
+            old_status = reservation.status
             reservation.status = ReservationStatus.CANCELLED
+            await RoomStatsService(self.db).record_reservation_status_change(
+                reservation, old_status, reservation.status
+            )
+            track_reservation_change(self.db, reservation)
         
         await self.db.flush()
         
@@ -0,0 +1,72 @@
+"""Vectorized re-ranking for room recommendations."""
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.core.config import settings
+
+
+# Newer rooms get a boost that decays to zero over this many days
+FRESHNESS_DECAY_DAYS = 365
+
+# Price match drops to zero at this fraction away from the user's average price
+PRICE_TOLERANCE = 0.5
+
+
+def get_ranking_weights() -> dict[str, float]:
+    """Get re-ranking weights from settings."""
+    return {
+        "similarity": settings.RECOMMENDATION_WEIGHT_SIMILARITY,
+        "rating": settings.RECOMMENDATION_WEIGHT_RATING,
+        "popularity": settings.RECOMMENDATION_WEIGHT_POPULARITY,
+        "price_match": settings.RECOMMENDATION_WEIGHT_PRICE_MATCH,
+        "freshness": settings.RECOMMENDATION_WEIGHT_FRESHNESS,
+    }
+
+
+def score_candidates(
+    similarity: np.ndarray,
+    avg_rating: np.ndarray,
+    reservation_count: np.ndarray,
+    max_reservation_count: float,
+    price: np.ndarray,
+    user_avg_price: float | None,
+    created_at: np.ndarray,
+    weights: dict[str, float] | None = None,
+    now: datetime | None = None,
+) -> np.ndarray:
+    """Compute final re-ranking scores for a whole candidate set at once.
+    
+    All arrays are aligned by candidate. `avg_rating` may contain NaN for
+    rooms without reviews, `created_at` holds POSIX timestamps.
+    """
+    weights = weights or get_ranking_weights()
+    now = now or datetime.now(timezone.utc)
+    
+    # Rating normalized (0-1)
+    rating_norm = np.nan_to_num(avg_rating, nan=0.0) / 5.0
+    
+    # Popularity normalized against the most reserved room
+    if max_reservation_count > 0:
+        popularity_norm = reservation_count / max_reservation_count
+    else:
+        popularity_norm = np.zeros_like(similarity)
+    
+    # Price match (how close to user's average price preference)
+    max_price_diff = user_avg_price * PRICE_TOLERANCE if user_avg_price else 0.0
+    if max_price_diff > 0:
+        price_match = np.maximum(0.0, 1.0 - np.abs(price - user_avg_price) / max_price_diff)
+    else:
+        price_match = np.ones_like(similarity)
+    
+    # Freshness (newer rooms get slight boost), in whole days like timedelta.days
+    days_since_creation = np.floor((now.timestamp() - created_at) / 86400.0)
+    freshness = np.maximum(0.0, 1.0 - days_since_creation / FRESHNESS_DECAY_DAYS)
+    
+    return (
+        weights["similarity"] * similarity +
+        weights["rating"] * rating_norm +
+        weights["popularity"] * popularity_norm +
+        weights["price_match"] * price_match +
+        weights["freshness"] * freshness
+    )
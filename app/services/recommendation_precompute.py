@@ -0,0 +1,227 @@
+"""Nightly batch computation of top-N recommendations for every active user."""
+from datetime import timezone
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, func, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.ai import RoomEmbedding, UserEvent, UserPreferenceVector, UserRecommendation
+from app.models.room import Room, RoomStatus
+from app.models.reservation import Reservation
+from app.services.ai import AIService, COLD_START_THRESHOLD
+from app.services.cooccurrence import CooccurrenceIndex, get_cooccurrence_index, merge_candidates
+from app.services.ranking import score_candidates
+from app.services.room_stats import RoomStatsService
+from app.services.vector_index import as_vector
+
+
+# Candidates retrieved by similarity before re-ranking, as in the live pipeline
+CANDIDATE_COUNT = 50
+
+# Interacted rooms considered per user when writing explanations
+EXPLANATION_ROOM_COUNT = 10
+
+
+class RoomCatalog:
+    """Active rooms with embeddings and the per-room ranking features, aligned by row."""
+    
+    def __init__(self, rooms: list[Room], matrix: np.ndarray, stats: dict, max_reservation_count: int):
+        self.rooms = rooms
+        self.rooms_by_id = {room.id: room for room in rooms}
+        self.positions = {room.id: i for i, room in enumerate(rooms)}
+        self.matrix = matrix
+        self.max_reservation_count = max_reservation_count
+        
+        room_stats = [stats.get(room.id, {}) for room in rooms]
+        self.avg_rating = np.array(
+            [s.get("avg_rating") if s.get("avg_rating") is not None else np.nan for s in room_stats],
+            dtype=np.float64,
+        )
+        self.reservation_count = np.array([s.get("reservation_count", 0) for s in room_stats], dtype=np.float64)
+        self.price = np.array([float(room.base_price_per_hour) for room in rooms])
+        self.created_at = np.array([
+            room.created_at.replace(tzinfo=room.created_at.tzinfo or timezone.utc).timestamp()
+            for room in rooms
+        ])
+    
+    @property
+    def size(self) -> int:
+        return len(self.rooms)
+
+
+class RecommendationPrecomputeService:
+    """Service writing ranked recommendations into user_recommendations."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.ai_service = AIService(db)
+    
+    async def load_catalog(self) -> RoomCatalog | None:
+        """Load active room embeddings and ranking features."""
+        query = (
+            select(Room, RoomEmbedding.embedding)
+            .join(RoomEmbedding, Room.id == RoomEmbedding.room_id)
+            .where(Room.status == RoomStatus.ACTIVE)
+        )
+        result = await self.db.execute(query)
+        rows = result.all()
+        if not rows:
+            return None
+        
+        rooms = [room for room, _ in rows]
+        matrix = np.ascontiguousarray(np.vstack([as_vector(e) for _, e in rows]))
+        stats_service = RoomStatsService(self.db)
+        return RoomCatalog(
+            rooms,
+            matrix,
+            await stats_service.get_stats([room.id for room in rooms]),
+            await stats_service.get_max_reservation_count(),
+        )
+    
+    async def precompute_batch(
+        self,
+        catalog: RoomCatalog,
+        after_user_id: UUID | None,
+        batch_size: int,
+        cooccurrence: CooccurrenceIndex | None = None,
+    ) -> list[UUID]:
+        """Rank rooms for the next batch of users and store the top N.
+        
+        Similarity for the whole batch is one (users x dim) @ (dim x rooms)
+        product. Candidates from `cooccurrence` are merged in as in the live
+        pipeline. Returns the user IDs processed, empty when done.
+        """
+        query = (
+            select(UserPreferenceVector.user_id, UserPreferenceVector.embedding, UserPreferenceVector.event_count)
+            .where(
+                UserPreferenceVector.event_count >= COLD_START_THRESHOLD,
+                UserPreferenceVector.embedding.is_not(None),
+            )
+            .order_by(UserPreferenceVector.user_id)
+            .limit(batch_size)
+        )
+        if after_user_id is not None:
+            query = query.where(UserPreferenceVector.user_id > after_user_id)
+        result = await self.db.execute(query)
+        users = result.all()
+        if not users:
+            return []
+        
+        user_ids = [user_id for user_id, _, _ in users]
+        user_matrix = np.vstack([np.asarray(e, dtype=np.float32) for _, e, _ in users])
+        norms = np.linalg.norm(user_matrix, axis=1, keepdims=True)
+        user_matrix /= np.where(norms > 0, norms, 1.0)
+        
+        similarity = user_matrix @ catalog.matrix.T
+        k = min(CANDIDATE_COUNT, catalog.size)
+        if k < catalog.size:
+            candidates = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(catalog.size), (len(users), 1))
+        
+        user_rooms = await self._get_interacted_rooms(user_ids, catalog)
+        avg_prices = await self._get_avg_prices(user_ids)
+        
+        top_n = settings.RECOMMENDATION_PRECOMPUTE_TOP_N
+        rows = []
+        for i, (user_id, _, event_count) in enumerate(users):
+            candidate_idx = candidates[i]
+            candidate_sim = similarity[i, candidate_idx].astype(np.float64)
+            if cooccurrence is not None:
+                hits = cooccurrence.candidates(
+                    [room.id for room in user_rooms.get(user_id, [])], settings.COOCCURRENCE_CANDIDATES
+                )
+                merged = merge_candidates(
+                    list(zip(candidate_idx.tolist(), candidate_sim.tolist())),
+                    [(catalog.positions[room_id], score) for room_id, score in hits if room_id in catalog.positions],
+                )
+                candidate_idx = np.array([j for j, _ in merged])
+                candidate_sim = np.array([score for _, score in merged])
+            scores = score_candidates(
+                similarity=candidate_sim,
+                avg_rating=catalog.avg_rating[candidate_idx],
+                reservation_count=catalog.reservation_count[candidate_idx],
+                max_reservation_count=float(catalog.max_reservation_count),
+                price=catalog.price[candidate_idx],
+                user_avg_price=avg_prices.get(user_id),
+                created_at=catalog.created_at[candidate_idx],
+            )
+            for rank, j in enumerate(np.argsort(-scores, kind="stable")[:top_n]):
+                room = catalog.rooms[candidate_idx[j]]
+                reason = self.ai_service._generate_explanation(
+                    room, user_rooms.get(user_id, []), float(candidate_sim[j])
+                )
+                rows.append({
+                    "user_id": user_id,
+                    "rank": rank,
+                    "room_id": room.id,
+                    "similarity_score": float(candidate_sim[j]),
+                    "final_score": float(scores[j]),
+                    "reason": reason[:255],
+                    "event_count": event_count,
+                })
+        
+        await self.db.execute(delete(UserRecommendation).where(UserRecommendation.user_id.in_(user_ids)))
+        if rows:
+            await self.db.execute(insert(UserRecommendation), rows)
+        return user_ids
+    
+    async def _get_interacted_rooms(self, user_ids: list[UUID], catalog: RoomCatalog) -> dict[UUID, list[Room]]:
+        """Get up to a few interacted catalog rooms per user, for explanations."""
+        query = (
+            select(UserEvent.user_id, UserEvent.room_id)
+            .where(UserEvent.user_id.in_(user_ids))
+            .distinct()
+        )
+        result = await self.db.execute(query)
+        
+        user_rooms: dict[UUID, list[Room]] = {}
+        for user_id, room_id in result.all():
+            rooms = user_rooms.setdefault(user_id, [])
+            room = catalog.rooms_by_id.get(room_id)
+            if room is not None and len(rooms) < EXPLANATION_ROOM_COUNT:
+                rooms.append(room)
+        return user_rooms
+    
+    async def _get_avg_prices(self, user_ids: list[UUID]) -> dict[UUID, float]:
+        """Get the average booked room price per user."""
+        query = (
+            select(Reservation.user_id, func.avg(Room.base_price_per_hour))
+            .join(Room, Room.id == Reservation.room_id)
+            .where(Reservation.user_id.in_(user_ids))
+            .group_by(Reservation.user_id)
+        )
+        result = await self.db.execute(query)
+        return {user_id: float(avg) for user_id, avg in result.all() if avg}
+
+
+async def run_precompute(batch_size: int | None = None) -> dict:
+    """Recompute recommendations for all users with enough events, one transaction per batch."""
+    batch_size = batch_size or settings.RECOMMENDATION_PRECOMPUTE_BATCH_SIZE
+    
+    cooccurrence = None
+    async with async_session_maker() as db:
+        catalog = await RecommendationPrecomputeService(db).load_catalog()
+        if catalog is not None and settings.COOCCURRENCE_ENABLED:
+            cooccurrence = get_cooccurrence_index()
+            await cooccurrence.ensure_fresh(db)
+    if catalog is None:
+        return {"rooms": 0, "users": 0}
+    
+    users = 0
+    last_user_id = None
+    while True:
+        async with async_session_maker() as db:
+            user_ids = await RecommendationPrecomputeService(db).precompute_batch(
+                catalog, last_user_id, batch_size, cooccurrence
+            )
+            await db.commit()
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+        users += len(user_ids)
+    
+    return {"rooms": catalog.size, "users": users}
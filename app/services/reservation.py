@@ -4,10 +4,11 @@ from decimal import Decimal
 from uuid import UUID
 
 from sqlalchemy import select, and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.reservation import Reservation, ReservationStatus, ReservationAddon
+from app.models.reservation import OVERLAP_CONSTRAINT_NAME, Reservation, ReservationStatus, ReservationAddon
 from app.models.room import Room, RoomStatus
 from app.models.addon import Addon, AddonPriceType
 from app.models.payment import Payment, PaymentMethod, PaymentStatus
@@ -16,6 +17,26 @@ from app.models.user import User, UserRole
 from app.schemas.reservation import ReservationCreate, ReservationResponse, ReservationAddonResponse
 from app.services.room import RoomService
 from app.services.promo import PromoService
+from app.services.reservation_index import track_reservation_change
+from app.services.room_stats import RoomStatsService
+
+
+class ReservationConflictError(ValueError):
+    """Raised when a reservation would overlap an active one for the same room."""
+    pass
+
+
+async def flush_checking_overlap(db: AsyncSession, commit: bool = False) -> None:
+    """Flush (or commit) `db`, turning an exclusion constraint violation into ReservationConflictError."""
+    try:
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+    except IntegrityError as e:
+        if OVERLAP_CONSTRAINT_NAME in str(e.orig):
+            raise ReservationConflictError("Room is not available for the selected time slot") from e
+        raise
 
 
 class ReservationService:
@@ -25,6 +46,7 @@ class ReservationService:
         self.db = db
         self.room_service = RoomService(db)
         self.promo_service = PromoService(db)
+        self.room_stats_service = RoomStatsService(db)
     
     async def create_reservation(
         self,
@@ -39,15 +61,6 @@ class ReservationService:
         if room.status != RoomStatus.ACTIVE:
             raise ValueError("Room is not available")
         
-        # Check availability
-        availability = await self.room_service.check_availability(
-            reservation_data.room_id,
-            reservation_data.start_time,
-            reservation_data.end_time,
-        )
-        if not availability.is_available:
-            raise ValueError("Room is not available for the selected time slot")
-        
         # Calculate duration
         duration_delta = reservation_data.end_time - reservation_data.start_time
         duration_hours = Decimal(str(duration_delta.total_seconds() / 3600))
@@ -55,6 +68,17 @@ class ReservationService:
         if duration_hours <= 0:
             raise ValueError("End time must be after start time")
         
+        # Check availability against the database, the in-memory index may lag other workers.
+        # Concurrent bookings that both pass this check are rejected by the exclusion constraint on flush.
+        availability = await self.room_service.check_availability(
+            reservation_data.room_id,
+            reservation_data.start_time,
+            reservation_data.end_time,
+            use_index=False,
+        )
+        if not availability.is_available:
+            raise ReservationConflictError("Room is not available for the selected time slot")
+        
         # Calculate base subtotal
         subtotal = room.base_price_per_hour * duration_hours
         
@@ -108,7 +132,8 @@ class ReservationService:
             notes=reservation_data.notes,
         )
         self.db.add(reservation)
-        await self.db.flush()
+        await flush_checking_overlap(self.db)
+        track_reservation_change(self.db, reservation)
         
         # Create reservation addons
         for addon_data in addon_records:
@@ -219,8 +244,13 @@ class ReservationService:
         if not reservation:
             return None
         
+        old_status = reservation.status
         reservation.status = status
-        await self.db.flush()
+        await self.room_stats_service.record_reservation_status_change(
+            reservation, old_status, status
+        )
+        track_reservation_change(self.db, reservation)
+        await flush_checking_overlap(self.db)
         
         # Re-query with eager loading instead of refresh to avoid lazy loading issues
         query = select(Reservation).where(
@@ -319,7 +349,8 @@ class ReservationService:
             
             reservation.total_amount = reservation.subtotal + addon_total - reservation.discount_amount
         
-        await self.db.commit()
+        track_reservation_change(self.db, reservation)
+        await flush_checking_overlap(self.db, commit=True)
         await self.db.flush()
         
         # Reload reservation with all relationships using eager loading
@@ -365,7 +396,12 @@ class ReservationService:
             if not (is_admin and force and reservation.status == ReservationStatus.CANCELLED):
                 raise ValueError(f"Cannot cancel reservation with status: {reservation.status.value}")
         
+        old_status = reservation.status
         reservation.status = ReservationStatus.CANCELLED
+        await self.room_stats_service.record_reservation_status_change(
+            reservation, old_status, reservation.status
+        )
+        track_reservation_change(self.db, reservation)
         
         # Also update payment status if exists
         if reservation.payment and reservation.payment.status != PaymentStatus.CANCELLED:
@@ -389,6 +425,11 @@ class ReservationService:
             await self.db.delete(reservation.payment)
             await self.db.flush()
         
+        await self.room_stats_service.record_reservation_status_change(
+            reservation, reservation.status, None
+        )
+        track_reservation_change(self.db, reservation, deleted=True)
+        
         # Delete the reservation (cascade will delete addons and other related records)
         await self.db.delete(reservation)
         await self.db.commit()
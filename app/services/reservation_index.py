@@ -0,0 +1,241 @@
+"""In-process index of upcoming reservations per room, for availability reads."""
+import asyncio
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.reservation import Reservation, ReservationStatus
+
+
+# Statuses that hold a room; anything else is removed from the index
+INDEXED_STATUSES = {ReservationStatus.CONFIRMED, ReservationStatus.PENDING_PAYMENT}
+
+# Session.info key for changes applied to the index once the transaction commits
+PENDING_CHANGES_KEY = "reservation_index_changes"
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class RoomIntervals:
+    """One room's reservations as a list of (start, end, reservation_id, status) sorted by start.
+    
+    Overlap queries bisect on start. Only entries starting after
+    `start - max_length` can reach into the queried range, so the scan
+    is bounded by the longest reservation of the room.
+    """
+    
+    def __init__(self):
+        self.entries: list[tuple[datetime, datetime, UUID, ReservationStatus]] = []
+        self.starts: list[datetime] = []
+        self.max_length = timedelta(0)
+    
+    def add(self, start: datetime, end: datetime, reservation_id: UUID, status: ReservationStatus) -> None:
+        position = bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.entries.insert(position, (start, end, reservation_id, status))
+        self.max_length = max(self.max_length, end - start)
+    
+    def remove(self, start: datetime, reservation_id: UUID) -> None:
+        position = bisect_left(self.starts, start)
+        while position < len(self.entries) and self.starts[position] == start:
+            if self.entries[position][2] == reservation_id:
+                del self.starts[position]
+                del self.entries[position]
+                return
+            position += 1
+    
+    def overlapping(
+        self,
+        start: datetime,
+        end: datetime,
+        statuses: set[ReservationStatus] = INDEXED_STATUSES,
+    ) -> list[tuple[datetime, datetime, UUID, ReservationStatus]]:
+        """Get entries with entry.start < end and entry.end > start, sorted by start."""
+        low = bisect_left(self.starts, start - self.max_length)
+        high = bisect_left(self.starts, end)
+        return [
+            entry for entry in self.entries[low:high]
+            if entry[1] > start and entry[3] in statuses
+        ]
+
+
+class ReservationIntervalIndex:
+    """CONFIRMED and PENDING_PAYMENT reservations ending after `horizon`, per room.
+    
+    Loaded on startup and reloaded periodically so workers converge on
+    changes made by other processes. Reservation and payment services
+    queue their changes with `track_reservation_change`; they are applied
+    only after the session commits. Callers fall back to the database when
+    the index is not loaded or a query starts before the horizon.
+    """
+    
+    def __init__(self):
+        self._rooms: dict[UUID, RoomIntervals] = {}
+        self._by_id: dict[UUID, tuple[UUID, datetime]] = {}
+        self.horizon: datetime | None = None
+        self._changes_during_reload: list | None = None
+        self._lock = asyncio.Lock()
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.horizon is not None
+    
+    @property
+    def size(self) -> int:
+        return len(self._by_id)
+    
+    def covers(self, start: datetime) -> bool:
+        """Whether queries from `start` onwards can be answered from the index."""
+        return self.horizon is not None and _aware(start) >= self.horizon
+    
+    def clear(self) -> None:
+        """Drop all reservations and mark the index as not loaded."""
+        self._rooms = {}
+        self._by_id = {}
+        self.horizon = None
+    
+    def apply(
+        self,
+        reservation_id: UUID,
+        room_id: UUID,
+        start: datetime,
+        end: datetime,
+        status: ReservationStatus | None,
+    ) -> None:
+        """Insert, move or remove one reservation; status None means deleted."""
+        if self._changes_during_reload is not None:
+            self._changes_during_reload.append((reservation_id, room_id, start, end, status))
+        elif self.horizon is None:
+            # Not loaded yet, the first reload will read this from the database
+            return
+        
+        previous = self._by_id.pop(reservation_id, None)
+        if previous is not None:
+            self._rooms[previous[0]].remove(previous[1], reservation_id)
+        
+        start, end = _aware(start), _aware(end)
+        if status in INDEXED_STATUSES and (self.horizon is None or end > self.horizon):
+            self._rooms.setdefault(room_id, RoomIntervals()).add(start, end, reservation_id, status)
+            self._by_id[reservation_id] = (room_id, start)
+    
+    def overlapping(
+        self,
+        room_id: UUID,
+        start: datetime,
+        end: datetime,
+        statuses: set[ReservationStatus] = INDEXED_STATUSES,
+    ) -> list[tuple[datetime, datetime, UUID, ReservationStatus]]:
+        """Get a room's reservations overlapping [start, end)."""
+        intervals = self._rooms.get(room_id)
+        if intervals is None:
+            return []
+        return intervals.overlapping(_aware(start), _aware(end), statuses)
+    
+    async def reload(self, db: AsyncSession) -> None:
+        """Replace the index with reservations ending after the start of today (UTC)."""
+        async with self._lock:
+            now = datetime.now(timezone.utc)
+            horizon = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            query = (
+                select(
+                    Reservation.id,
+                    Reservation.room_id,
+                    Reservation.start_time,
+                    Reservation.end_time,
+                    Reservation.status,
+                )
+                .where(
+                    Reservation.status.in_(INDEXED_STATUSES),
+                    Reservation.end_time > horizon,
+                )
+                .order_by(Reservation.room_id, Reservation.start_time)
+            )
+            
+            # Commits landing while the query runs are replayed onto the new snapshot
+            self._changes_during_reload = []
+            try:
+                result = await db.execute(query)
+                rows = result.all()
+            except Exception:
+                self._changes_during_reload = None
+                raise
+            changes, self._changes_during_reload = self._changes_during_reload, None
+            
+            rooms: dict[UUID, RoomIntervals] = {}
+            by_id: dict[UUID, tuple[UUID, datetime]] = {}
+            for reservation_id, room_id, start, end, status in rows:
+                start, end = _aware(start), _aware(end)
+                intervals = rooms.setdefault(room_id, RoomIntervals())
+                intervals.entries.append((start, end, reservation_id, status))
+                intervals.starts.append(start)
+                intervals.max_length = max(intervals.max_length, end - start)
+                by_id[reservation_id] = (room_id, start)
+            
+            self._rooms, self._by_id, self.horizon = rooms, by_id, horizon
+            for change in changes:
+                self.apply(*change)
+
+
+_reservation_index: ReservationIntervalIndex | None = None
+
+
+def get_reservation_index() -> ReservationIntervalIndex:
+    """Get the process-wide reservation interval index."""
+    global _reservation_index
+    if _reservation_index is None:
+        _reservation_index = ReservationIntervalIndex()
+    return _reservation_index
+
+
+def get_loaded_reservation_index(start: datetime) -> ReservationIntervalIndex | None:
+    """Get the index if it is enabled, loaded and covers queries from `start`."""
+    index = get_reservation_index()
+    if settings.RESERVATION_INDEX_ENABLED and index.covers(start):
+        return index
+    return None
+
+
+def track_reservation_change(db: AsyncSession, reservation: Reservation, deleted: bool = False) -> None:
+    """Queue the reservation's current state for the index, applied when `db` commits."""
+    changes = db.sync_session.info.setdefault(PENDING_CHANGES_KEY, {})
+    changes[reservation.id] = (
+        reservation.id,
+        reservation.room_id,
+        reservation.start_time,
+        reservation.end_time,
+        None if deleted else reservation.status,
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session: Session) -> None:
+    changes = session.info.pop(PENDING_CHANGES_KEY, None)
+    if changes:
+        index = get_reservation_index()
+        for change in changes.values():
+            index.apply(*change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session: Session) -> None:
+    session.info.pop(PENDING_CHANGES_KEY, None)
+
+
+async def run_periodic_reservation_index_reload(interval_seconds: float) -> None:
+    """Reload the index forever, picking up changes committed by other workers."""
+    while True:
+        try:
+            async with async_session_maker() as db:
+                await get_reservation_index().reload(db)
+        except Exception as e:
+            print(f"⚠️  Reservation index reload failed: {e}")
+        
+        await asyncio.sleep(interval_seconds)
@@ -8,6 +8,7 @@ from sqlalchemy.orm import selectinload
 from app.models.review import Review
 from app.models.reservation import Reservation, ReservationStatus
 from app.schemas.review import ReviewCreate, ReviewResponse
+from app.services.room_stats import RoomStatsService
 
 
 class ReviewService:
@@ -56,6 +57,8 @@ class ReviewService:
         await self.db.flush()
         await self.db.refresh(review)
         
+        await RoomStatsService(self.db).record_review(review.room_id, review.rating)
+        
         return ReviewResponse(
             id=review.id,
             user_id=review.user_id,
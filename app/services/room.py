@@ -3,13 +3,14 @@ from datetime import datetime, date, timezone, timedelta
 from decimal import Decimal
 from uuid import UUID
 
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, false
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.room import Room, RoomCategory, RoomStatus
-from app.models.reservation import Reservation, ReservationStatus
-from app.models.review import Review
+from app.models.reservation import Reservation
+from app.services.reservation_index import INDEXED_STATUSES, get_loaded_reservation_index
+from app.services.room_stats import RoomStatsService
 from app.schemas.room import (
     RoomCreate, 
     RoomUpdate, 
@@ -18,9 +19,25 @@ from app.schemas.room import (
     DailySlotResponse,
     AllRoomsSlotsResponse,
     TimeSlot,
+    AvailabilityCalendarResponse,
+    RoomCalendar,
 )
 
 
+# Longest range served by the availability calendar (a month view spans up to 6 weeks)
+MAX_CALENDAR_DAYS = 42
+
+
+def overlaps(start: datetime, end: datetime):
+    """Reservations whose period overlaps [start, end), matched by the (room_id, period) GiST index.
+    
+    Same as start_time < end AND end_time > start for non-empty ranges.
+    """
+    if start >= end:
+        return false()
+    return Reservation.period.overlaps(func.tstzrange(start, end, "[)"))
+
+
 class RoomService:
     """Service for room operations."""
     
@@ -62,13 +79,7 @@ class RoomService:
         result = await self.db.execute(query)
         rooms = result.scalars().all()
         
-        # Get ratings for each room
-        room_responses = []
-        for room in rooms:
-            room_response = await self._room_to_response(room)
-            room_responses.append(room_response)
-        
-        return room_responses, total
+        return await self._rooms_to_responses(rooms), total
     
     async def get_room_by_id(self, room_id: UUID) -> RoomResponse | None:
         """Get room by ID."""
@@ -82,7 +93,7 @@ class RoomService:
         if not room:
             return None
         
-        return await self._room_to_response(room)
+        return (await self._rooms_to_responses([room]))[0]
     
     async def get_room_entity(self, room_id: UUID) -> Room | None:
         """Get room entity by ID."""
@@ -98,28 +109,40 @@ class RoomService:
         room_id: UUID,
         start: datetime,
         end: datetime,
+        use_index: bool = True,
     ) -> RoomAvailabilityResponse:
-        """Check room availability for a time range."""
-        # Get conflicting reservations
-        # Overlap condition: startA < endB AND endA > startB
-        query = select(Reservation).where(
-            and_(
-                Reservation.room_id == room_id,
-                Reservation.status == ReservationStatus.CONFIRMED,
-                Reservation.start_time < end,
-                Reservation.end_time > start,
+        """Check room availability for a time range.
+        
+        CONFIRMED and PENDING_PAYMENT reservations both hold the room, as
+        enforced by the exclusion constraint. Answered from the in-memory
+        reservation index when it is loaded; `use_index=False` always checks
+        the database (booking re-validation).
+        """
+        index = get_loaded_reservation_index(start) if use_index else None
+        if index is not None:
+            conflicts = [
+                (reservation_id, res_start, res_end)
+                for res_start, res_end, reservation_id, _ in index.overlapping(room_id, start, end)
+            ]
+        else:
+            # Get conflicting reservations
+            query = select(Reservation.id, Reservation.start_time, Reservation.end_time).where(
+                and_(
+                    Reservation.room_id == room_id,
+                    Reservation.status.in_(INDEXED_STATUSES),
+                    overlaps(start, end),
+                )
             )
-        )
-        result = await self.db.execute(query)
-        conflicts = result.scalars().all()
+            result = await self.db.execute(query)
+            conflicts = result.all()
         
         conflicting_data = [
             {
-                "reservation_id": str(r.id),
-                "start_time": r.start_time.isoformat(),
-                "end_time": r.end_time.isoformat(),
+                "reservation_id": str(reservation_id),
+                "start_time": res_start.isoformat(),
+                "end_time": res_end.isoformat(),
             }
-            for r in conflicts
+            for reservation_id, res_start, res_end in conflicts
         ]
         
         return RoomAvailabilityResponse(
@@ -130,6 +153,34 @@ class RoomService:
             conflicting_reservations=conflicting_data,
         )
     
+    async def get_unavailable_room_ids(
+        self,
+        room_ids: list[UUID],
+        start: datetime,
+        end: datetime,
+    ) -> set[UUID]:
+        """Get which of the given rooms have a conflicting reservation, in one query."""
+        if not room_ids:
+            return set()
+        
+        index = get_loaded_reservation_index(start)
+        if index is not None:
+            return {
+                room_id for room_id in room_ids
+                if index.overlapping(room_id, start, end)
+            }
+        
+        conflict_query = select(Reservation.room_id).where(
+            and_(
+                Reservation.room_id.in_(room_ids),
+                Reservation.status.in_(INDEXED_STATUSES),
+                overlaps(start, end),
+            )
+        ).distinct()
+        
+        result = await self.db.execute(conflict_query)
+        return set(result.scalars().all())
+    
     async def create_room(self, room_data: RoomCreate) -> Room:
         """Create a new room."""
         room = Room(**room_data.model_dump())
@@ -152,43 +203,28 @@ class RoomService:
         await self.db.refresh(room)
         return room
     
-    async def _room_to_response(self, room: Room) -> RoomResponse:
-        """Convert room entity to response with ratings."""
-        # Get average rating
-        rating_query = select(
-            func.avg(Review.rating).label("avg_rating"),
-            func.count(Review.id).label("review_count"),
-        ).where(Review.room_id == room.id)
+    async def _rooms_to_responses(self, rooms: list[Room]) -> list[RoomResponse]:
+        """Convert room entities to responses with ratings, in one room_stats query."""
+        # Ratings come from the room_stats read model, rooms without reviews have no row
+        stats = await RoomStatsService(self.db).get_stats([room.id for room in rooms]) if rooms else {}
         
-        rating_result = await self.db.execute(rating_query)
-        rating_row = rating_result.one()
-        
-        avg_rating = float(rating_row.avg_rating) if rating_row.avg_rating else None
-        review_count = rating_row.review_count or 0
-        
-        return RoomResponse(
-            id=room.id,
-            name=room.name,
-            description=room.description,
-            category=room.category,
-            capacity=room.capacity,
-            base_price_per_hour=room.base_price_per_hour,
-            status=room.status,
-            created_at=room.created_at,
-            images=room.images,
-            units=room.units,
-            avg_rating=avg_rating,
-            review_count=review_count,
-        )
-    
-    async def get_all_active_rooms(self) -> list[Room]:
-        """Get all active rooms."""
-        query = select(Room).where(Room.status == RoomStatus.ACTIVE).options(
-            selectinload(Room.images),
-            selectinload(Room.units),
-        )
-        result = await self.db.execute(query)
-        return list(result.scalars().all())
+        return [
+            RoomResponse(
+                id=room.id,
+                name=room.name,
+                description=room.description,
+                category=room.category,
+                capacity=room.capacity,
+                base_price_per_hour=room.base_price_per_hour,
+                status=room.status,
+                created_at=room.created_at,
+                images=room.images,
+                units=room.units,
+                avg_rating=stats[room.id]["avg_rating"] if room.id in stats else None,
+                review_count=stats[room.id]["review_count"] if room.id in stats else 0,
+            )
+            for room in rooms
+        ]
     
     async def get_daily_slots(
         self,
@@ -201,81 +237,208 @@ class RoomService:
         Get hourly time slots for a room on a specific date.
         Returns availability status for each hour.
         """
-        room = await self.get_room_entity(room_id)
+        result = await self.db.execute(select(Room.id, Room.name).where(Room.id == room_id))
+        room = result.one_or_none()
         if not room:
             raise ValueError("Room not found")
         
-        # Build datetime range for the date
+        return (await self._build_slot_grid([room], target_date, opening_hour, closing_hour))[0]
+    
+    async def get_all_rooms_daily_slots(
+        self,
+        target_date: date,
+        opening_hour: int = 10,
+        closing_hour: int = 22,
+    ) -> AllRoomsSlotsResponse:
+        """Get hourly time slots for all active rooms on a specific date, in two queries."""
+        result = await self.db.execute(select(Room.id, Room.name).where(Room.status == RoomStatus.ACTIVE))
+        rooms = result.all()
+        
+        return AllRoomsSlotsResponse(
+            date=target_date.isoformat(),
+            rooms=await self._build_slot_grid(rooms, target_date, opening_hour, closing_hour),
+        )
+    
+    async def _build_slot_grid(
+        self,
+        rooms: list,
+        target_date: date,
+        opening_hour: int,
+        closing_hour: int,
+    ) -> list[DailySlotResponse]:
+        """Build hourly slots for (id, name) rooms from one reservations query."""
         date_start = datetime(target_date.year, target_date.month, target_date.day, 0, 0, 0, tzinfo=timezone.utc)
-        date_end = date_start + timedelta(days=1)
+        slot_starts = [date_start + timedelta(hours=hour) for hour in range(opening_hour, closing_hour)]
+        if not rooms:
+            return []
         
-        # Get all reservations for this room on this date (CONFIRMED or PENDING_PAYMENT)
-        query = select(Reservation).where(
-            and_(
-                Reservation.room_id == room_id,
-                Reservation.status.in_([ReservationStatus.CONFIRMED, ReservationStatus.PENDING_PAYMENT]),
-                Reservation.start_time < date_end,
-                Reservation.end_time > date_start,
+        # opening_hour >= closing_hour leaves no slots and nothing to look up
+        intervals = {}
+        if slot_starts:
+            intervals = await self._get_booked_intervals(
+                [room.id for room in rooms], slot_starts[0], slot_starts[-1] + timedelta(hours=1)
             )
-        )
+        
+        responses = []
+        for room in rooms:
+            booked = mark_booked_slots(slot_starts, timedelta(hours=1), intervals.get(room.id, []))
+            responses.append(DailySlotResponse(
+                room_id=room.id,
+                room_name=room.name,
+                date=target_date.isoformat(),
+                slots=[
+                    TimeSlot(
+                        start_hour=slot_start.hour,
+                        end_hour=slot_start.hour + 1,
+                        start_time=slot_start,
+                        end_time=slot_start + timedelta(hours=1),
+                        is_available=not is_booked,
+                        status="booked" if is_booked else "available",
+                    )
+                    for slot_start, is_booked in zip(slot_starts, booked)
+                ],
+                opening_hour=opening_hour,
+                closing_hour=closing_hour,
+            ))
+        
+        return responses
+    
+    async def get_availability_calendar(
+        self,
+        start_date: date,
+        end_date: date,
+        room_id: UUID | None = None,
+        opening_hour: int = 10,
+        closing_hour: int = 22,
+    ) -> AvailabilityCalendarResponse:
+        """
+        Get per-day hourly availability bitmaps for one room, or all active rooms,
+        from start_date to end_date inclusive, in two queries.
+        """
+        days = (end_date - start_date).days + 1
+        if days < 1:
+            raise ValueError("End date must not be before start date")
+        if days > MAX_CALENDAR_DAYS:
+            raise ValueError(f"Date range must not exceed {MAX_CALENDAR_DAYS} days")
+        
+        query = select(Room.id, Room.name)
+        if room_id is not None:
+            query = query.where(Room.id == room_id)
+        else:
+            query = query.where(Room.status == RoomStatus.ACTIVE)
         result = await self.db.execute(query)
-        reservations = result.scalars().all()
+        rooms = result.all()
+        if room_id is not None and not rooms:
+            raise ValueError("Room not found")
         
-        # Generate time slots
-        slots = []
-        for hour in range(opening_hour, closing_hour):
-            slot_start = datetime(target_date.year, target_date.month, target_date.day, hour, 0, 0, tzinfo=timezone.utc)
-            slot_end = datetime(target_date.year, target_date.month, target_date.day, hour + 1, 0, 0, tzinfo=timezone.utc)
-            
-            # Check if this slot overlaps with any reservation
-            is_booked = False
-            for res in reservations:
-                # Ensure reservation times are timezone-aware for comparison
-                res_start = res.start_time
-                res_end = res.end_time
-                if res_start.tzinfo is None:
-                    res_start = res_start.replace(tzinfo=timezone.utc)
-                if res_end.tzinfo is None:
-                    res_end = res_end.replace(tzinfo=timezone.utc)
-                
-                # Overlap check: slotStart < resEnd AND slotEnd > resStart
-                if slot_start < res_end and slot_end > res_start:
-                    is_booked = True
-                    break
-            
-            slots.append(TimeSlot(
-                start_hour=hour,
-                end_hour=hour + 1,
-                start_time=slot_start,
-                end_time=slot_end,
-                is_available=not is_booked,
-                status="booked" if is_booked else "available",
+        first_day = datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc)
+        hours = closing_hour - opening_hour
+        slot_starts = [
+            first_day + timedelta(days=day, hours=hour)
+            for day in range(days)
+            for hour in range(opening_hour, closing_hour)
+        ]
+        intervals = {}
+        if rooms and slot_starts:
+            intervals = await self._get_booked_intervals(
+                [room.id for room in rooms], slot_starts[0], slot_starts[-1] + timedelta(hours=1)
+            )
+        
+        calendars = []
+        for room in rooms:
+            booked = mark_booked_slots(slot_starts, timedelta(hours=1), intervals.get(room.id, []))
+            calendars.append(RoomCalendar(
+                room_id=room.id,
+                room_name=room.name,
+                days=[
+                    availability_bitmap(booked[day * hours:(day + 1) * hours])
+                    for day in range(days)
+                ],
             ))
         
-        return DailySlotResponse(
-            room_id=room_id,
-            room_name=room.name,
-            date=target_date.isoformat(),
-            slots=slots,
+        return AvailabilityCalendarResponse(
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat(),
             opening_hour=opening_hour,
             closing_hour=closing_hour,
+            rooms=calendars,
         )
     
-    async def get_all_rooms_daily_slots(
+    async def _get_booked_intervals(
         self,
-        target_date: date,
-        opening_hour: int = 10,
-        closing_hour: int = 22,
-    ) -> AllRoomsSlotsResponse:
-        """Get hourly time slots for all active rooms on a specific date."""
-        rooms = await self.get_all_active_rooms()
+        room_ids: list[UUID],
+        start: datetime,
+        end: datetime,
+    ) -> dict[UUID, list[tuple[datetime, datetime]]]:
+        """Get CONFIRMED or PENDING_PAYMENT reservation intervals overlapping a range.
         
-        room_slots = []
-        for room in rooms:
-            slot_response = await self.get_daily_slots(room.id, target_date, opening_hour, closing_hour)
-            room_slots.append(slot_response)
+        One query for all rooms, or none when the reservation index is loaded;
+        each room's intervals are sorted by start for `mark_booked_slots`.
+        """
+        index = get_loaded_reservation_index(start)
+        if index is not None:
+            intervals = {}
+            for room_id in room_ids:
+                entries = index.overlapping(room_id, start, end)
+                if entries:
+                    intervals[room_id] = [(res_start, res_end) for res_start, res_end, _, _ in entries]
+            return intervals
         
-        return AllRoomsSlotsResponse(
-            date=target_date.isoformat(),
-            rooms=room_slots,
+        query = (
+            select(Reservation.room_id, Reservation.start_time, Reservation.end_time)
+            .where(
+                and_(
+                    Reservation.room_id.in_(room_ids),
+                    Reservation.status.in_(INDEXED_STATUSES),
+                    overlaps(start, end),
+                )
+            )
+            .order_by(Reservation.room_id, Reservation.start_time)
         )
+        result = await self.db.execute(query)
+        
+        intervals: dict[UUID, list[tuple[datetime, datetime]]] = {}
+        for room_id, res_start, res_end in result.all():
+            # Ensure reservation times are timezone-aware for comparison
+            if res_start.tzinfo is None:
+                res_start = res_start.replace(tzinfo=timezone.utc)
+            if res_end.tzinfo is None:
+                res_end = res_end.replace(tzinfo=timezone.utc)
+            intervals.setdefault(room_id, []).append((res_start, res_end))
+        return intervals
+
+
+def availability_bitmap(booked: list[bool]) -> int:
+    """Pack one day's slots into an int, bit i set when slot i (opening_hour + i) is free."""
+    bitmap = 0
+    for i, is_booked in enumerate(booked):
+        if not is_booked:
+            bitmap |= 1 << i
+    return bitmap
+
+
+def mark_booked_slots(
+    slot_starts: list[datetime],
+    slot_length: timedelta,
+    intervals: list[tuple[datetime, datetime]],
+) -> list[bool]:
+    """Mark which consecutive slots overlap any interval, in one sweep.
+    
+    `intervals` must be sorted by start. The first candidate slot only moves
+    forward, so each slot is skipped once and only overlapping slots are
+    revisited.
+    """
+    booked = [False] * len(slot_starts)
+    first = 0
+    for start, end in intervals:
+        # Slots ending at or before this start can't overlap it or any later interval
+        while first < len(slot_starts) and slot_starts[first] + slot_length <= start:
+            first += 1
+        
+        # Overlap check: slotStart < resEnd AND slotEnd > resStart
+        i = first
+        while i < len(slot_starts) and slot_starts[i] < end:
+            booked[i] = True
+            i += 1
+    
+    return booked
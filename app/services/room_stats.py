@@ -0,0 +1,177 @@
+"""Room stats service."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import select, func, cast, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import async_session_maker
+from app.models.room import Room
+from app.models.room_stats import RoomStats
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.review import Review
+
+
+# Rolling window for reservation popularity
+POPULARITY_WINDOW_DAYS = 30
+
+# Reservation statuses that count towards popularity
+COUNTED_RESERVATION_STATUSES = {ReservationStatus.CONFIRMED, ReservationStatus.COMPLETED}
+
+
+class RoomStatsService:
+    """Service for the room_stats read model."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_stats(self, room_ids: list[UUID] | None = None) -> dict[UUID, dict]:
+        """Get rating and popularity stats, keyed by room ID."""
+        query = select(RoomStats)
+        if room_ids is not None:
+            query = query.where(RoomStats.room_id.in_(room_ids))
+        
+        result = await self.db.execute(query)
+        
+        return {
+            row.room_id: {
+                "avg_rating": row.avg_rating,
+                "review_count": row.review_count,
+                "reservation_count": row.reservation_count_30d,
+            }
+            for row in result.scalars().all()
+        }
+    
+    async def get_max_reservation_count(self) -> int:
+        """Get the highest rolling reservation count across all rooms."""
+        query = select(func.max(RoomStats.reservation_count_30d))
+        result = await self.db.execute(query)
+        return result.scalar() or 0
+    
+    async def record_review(self, room_id: UUID, rating: int) -> None:
+        """Add a new review to the room's rating stats."""
+        stmt = pg_insert(RoomStats).values(
+            room_id=room_id,
+            review_count=1,
+            rating_sum=rating,
+            avg_rating=float(rating),
+            reservation_count_30d=0,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RoomStats.room_id],
+            set_={
+                "review_count": RoomStats.review_count + 1,
+                "rating_sum": RoomStats.rating_sum + stmt.excluded.rating_sum,
+                "avg_rating": (
+                    cast(RoomStats.rating_sum + stmt.excluded.rating_sum, Float)
+                    / (RoomStats.review_count + 1)
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+    
+    async def record_reservation_status_change(
+        self,
+        reservation: Reservation,
+        old_status: ReservationStatus | None,
+        new_status: ReservationStatus | None,
+    ) -> None:
+        """Update popularity when a reservation enters or leaves a counted status.
+        
+        `None` means the reservation does not exist (created or deleted).
+        """
+        delta = int(new_status in COUNTED_RESERVATION_STATUSES) - int(old_status in COUNTED_RESERVATION_STATUSES)
+        if delta == 0:
+            return
+        
+        # Reservations outside the window are expired by reconciliation, not counted
+        created_at = reservation.created_at
+        if created_at is not None:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            if created_at < datetime.now(timezone.utc) - timedelta(days=POPULARITY_WINDOW_DAYS):
+                return
+        
+        stmt = pg_insert(RoomStats).values(
+            room_id=reservation.room_id,
+            review_count=0,
+            rating_sum=0,
+            reservation_count_30d=max(delta, 0),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RoomStats.room_id],
+            set_={
+                "reservation_count_30d": func.greatest(RoomStats.reservation_count_30d + delta, 0),
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+    
+    async def reconcile(self) -> None:
+        """Recompute stats for every room from reviews and reservations."""
+        window_start = datetime.now(timezone.utc) - timedelta(days=POPULARITY_WINDOW_DAYS)
+        
+        review_agg = (
+            select(
+                Review.room_id,
+                func.count(Review.id).label("review_count"),
+                func.sum(Review.rating).label("rating_sum"),
+            )
+            .group_by(Review.room_id)
+            .subquery()
+        )
+        reservation_agg = (
+            select(
+                Reservation.room_id,
+                func.count(Reservation.id).label("reservation_count"),
+            )
+            .where(
+                Reservation.created_at >= window_start,
+                Reservation.status.in_(COUNTED_RESERVATION_STATUSES),
+            )
+            .group_by(Reservation.room_id)
+            .subquery()
+        )
+        
+        source = (
+            select(
+                Room.id,
+                func.coalesce(review_agg.c.review_count, 0),
+                func.coalesce(review_agg.c.rating_sum, 0),
+                cast(review_agg.c.rating_sum, Float) / func.nullif(review_agg.c.review_count, 0),
+                func.coalesce(reservation_agg.c.reservation_count, 0),
+            )
+            .outerjoin(review_agg, review_agg.c.room_id == Room.id)
+            .outerjoin(reservation_agg, reservation_agg.c.room_id == Room.id)
+        )
+        
+        stmt = pg_insert(RoomStats).from_select(
+            ["room_id", "review_count", "rating_sum", "avg_rating", "reservation_count_30d"],
+            source,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RoomStats.room_id],
+            set_={
+                "review_count": stmt.excluded.review_count,
+                "rating_sum": stmt.excluded.rating_sum,
+                "avg_rating": stmt.excluded.avg_rating,
+                "reservation_count_30d": stmt.excluded.reservation_count_30d,
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+
+
+async def run_periodic_reconciliation(interval_seconds: float) -> None:
+    """Reconcile room stats now and then every `interval_seconds`, until cancelled."""
+    while True:
+        try:
+            async with async_session_maker() as db:
+                await RoomStatsService(db).reconcile()
+                await db.commit()
+        except Exception as e:
+            print(f"⚠️  Room stats reconciliation failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,156 @@
+"""In-process vector index for room similarity search."""
+import asyncio
+import time
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, func, cast, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.ai import RoomEmbedding
+from app.models.room import Room, RoomStatus
+
+
+# Rows scored per block for float16 matrices, bounding the float32 temporary
+SEARCH_BLOCK_ROWS = 8192
+
+
+def as_vector(value, dtype=np.float32) -> np.ndarray:
+    """Convert a pgvector column value (vector or HalfVector) to a numpy array."""
+    if hasattr(value, "to_numpy"):
+        value = value.to_numpy()
+    return np.asarray(value, dtype=dtype)
+
+
+class RoomVectorIndex:
+    """Contiguous float32 or float16 matrix of active room embeddings plus a room id array.
+    
+    Top-k search is one matrix-vector product and an argpartition. The index
+    is reloaded when the (count, max updated_at, sum of id hashes) signature
+    of active room embeddings changes; the hash sum catches one room being
+    deactivated while another is reactivated. Catalogs larger than
+    `max_rooms` are not held in memory, callers fall back to pgvector.
+    """
+    
+    def __init__(self, max_rooms: int, check_interval_seconds: float = 0.0, dtype=np.float32):
+        self.max_rooms = max_rooms
+        self.check_interval_seconds = check_interval_seconds
+        self.dtype = np.dtype(dtype)
+        self._matrix = np.empty((0, 0), dtype=self.dtype)
+        self._room_ids = np.empty(0, dtype=object)
+        self._signature: tuple | None = None
+        self._checked_at = 0.0
+        self._too_large = False
+        self._lock = asyncio.Lock()
+    
+    @property
+    def size(self) -> int:
+        return len(self._room_ids)
+    
+    def load(self, room_ids: list[UUID], vectors: list) -> None:
+        """Replace the index contents."""
+        self._room_ids = np.array(room_ids, dtype=object)
+        if vectors:
+            self._matrix = np.ascontiguousarray(
+                np.vstack([as_vector(v) for v in vectors]), dtype=self.dtype
+            )
+        else:
+            self._matrix = np.empty((0, 0), dtype=self.dtype)
+    
+    def clear(self) -> None:
+        """Drop all vectors and force a reload on next use."""
+        self.load([], [])
+        self._signature = None
+        self._checked_at = 0.0
+        self._too_large = False
+    
+    def search(self, query: np.ndarray, k: int) -> list[tuple[UUID, float]]:
+        """Get the top-k rooms by dot product (cosine for normalized vectors)."""
+        n = self.size
+        if n == 0 or k <= 0:
+            return []
+        
+        scores = self._scores(np.asarray(query, dtype=np.float32))
+        if k < n:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        
+        return [(self._room_ids[i], float(scores[i])) for i in top]
+    
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Dot products with every row, accumulated in float32."""
+        if self._matrix.dtype == np.float32:
+            return self._matrix @ query
+        # numpy has no float16 BLAS, upcast block by block instead of the whole matrix
+        return np.concatenate([
+            self._matrix[i:i + SEARCH_BLOCK_ROWS].astype(np.float32) @ query
+            for i in range(0, self.size, SEARCH_BLOCK_ROWS)
+        ])
+    
+    async def ensure_fresh(self, db: AsyncSession) -> bool:
+        """Reload the index if room embeddings changed.
+        
+        Returns False when the catalog is too large to hold in memory.
+        """
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval_seconds:
+            return not self._too_large
+        
+        signature = await self._get_signature(db)
+        if signature != self._signature:
+            async with self._lock:
+                if signature != self._signature:
+                    await self._reload(db, signature)
+        self._checked_at = now
+        return not self._too_large
+    
+    async def _get_signature(self, db: AsyncSession) -> tuple:
+        query = (
+            select(
+                func.count(RoomEmbedding.room_id),
+                func.max(RoomEmbedding.updated_at),
+                func.sum(func.hashtext(cast(RoomEmbedding.room_id, String))),
+            )
+            .join(Room, Room.id == RoomEmbedding.room_id)
+            .where(Room.status == RoomStatus.ACTIVE)
+        )
+        result = await db.execute(query)
+        return tuple(result.one())
+    
+    async def _reload(self, db: AsyncSession, signature: tuple) -> None:
+        count = signature[0]
+        if count > self.max_rooms:
+            self.load([], [])
+            self._too_large = True
+            self._signature = signature
+            return
+        
+        query = (
+            select(RoomEmbedding.room_id, RoomEmbedding.embedding)
+            .join(Room, Room.id == RoomEmbedding.room_id)
+            .where(Room.status == RoomStatus.ACTIVE)
+        )
+        result = await db.execute(query)
+        rows = result.all()
+        
+        self.load([row.room_id for row in rows], [row.embedding for row in rows])
+        self._too_large = False
+        self._signature = signature
+
+
+_room_vector_index: RoomVectorIndex | None = None
+
+
+def get_room_vector_index() -> RoomVectorIndex:
+    """Get the process-wide room vector index."""
+    global _room_vector_index
+    if _room_vector_index is None:
+        _room_vector_index = RoomVectorIndex(
+            max_rooms=settings.VECTOR_INDEX_MAX_ROOMS,
+            check_interval_seconds=settings.VECTOR_INDEX_CHECK_INTERVAL_SECONDS,
+            dtype=settings.VECTOR_INDEX_DTYPE,
+        )
+    return _room_vector_index
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark pgvector HNSW recall and latency against the exact scan.
+
+Usage: python scripts/benchmark_ann.py [queries] [k] [ef_search,...]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.config import settings
+from app.models.ai import RoomEmbedding
+from app.services.vector_index import as_vector
+
+
+# HNSW returns at most ef_search rows, so values below k cap recall at ef_search / k
+DEFAULT_EF_SEARCH = [50, 100, 200, 400]
+
+
+def nearest_query(vector: list[float], k: int):
+    """Top-k room IDs by cosine distance."""
+    distance = RoomEmbedding.embedding.cosine_distance(vector)
+    return select(RoomEmbedding.room_id).order_by(distance).limit(k)
+
+
+async def run_queries(db, queries: np.ndarray, k: int, settings_sql: str, params: dict) -> tuple[list[set], list[float]]:
+    """Run every query in its own transaction with the given planner settings."""
+    results, latencies = [], []
+    for vector in queries:
+        async with db.begin():
+            await db.execute(text(settings_sql), params)
+            start = time.perf_counter()
+            result = await db.execute(nearest_query(vector.tolist(), k))
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append(set(result.scalars().all()))
+    return results, latencies
+
+
+async def benchmark(num_queries: int = 200, k: int = 50, ef_search_values: list[int] = DEFAULT_EF_SEARCH):
+    """Compare recall@k and latency of the HNSW index with the exact scan."""
+    database_url = settings.DATABASE_URL
+    if database_url.startswith("postgresql://"):
+        database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    engine = create_async_engine(database_url, echo=False)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+    
+    async with async_session() as db:
+        try:
+            result = await db.execute(select(RoomEmbedding.embedding))
+            matrix = np.array([as_vector(e) for e in result.scalars().all()])
+            await db.commit()
+            
+            if len(matrix) == 0:
+                print("No room embeddings found. Run generate_embeddings.py first.")
+                return
+            
+            # Queries are stored embeddings with noise, like blended user vectors
+            rng = np.random.default_rng(42)
+            picks = matrix[rng.integers(0, len(matrix), num_queries)]
+            queries = picks + rng.normal(0, 0.05, picks.shape).astype(np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+            
+            print(f"Rooms: {len(matrix)}, queries: {num_queries}, k: {k}")
+            print("-" * 60)
+            
+            exact, exact_latencies = await run_queries(
+                db, queries, k,
+                "SELECT set_config('enable_indexscan', 'off', true)", {},
+            )
+            print(
+                f"{'exact scan':>14}  recall 1.0000  "
+                f"p50 {np.percentile(exact_latencies, 50):7.2f} ms  "
+                f"p95 {np.percentile(exact_latencies, 95):7.2f} ms"
+            )
+            
+            for ef_search in ef_search_values:
+                approx, latencies = await run_queries(
+                    db, queries, k,
+                    "SELECT set_config('hnsw.ef_search', :ef_search, true)",
+                    {"ef_search": str(ef_search)},
+                )
+                recall = np.mean([
+                    len(a & e) / len(e) for a, e in zip(approx, exact) if e
+                ])
+                print(
+                    f"{'ef_search=' + str(ef_search):>14}  recall {recall:.4f}  "
+                    f"p50 {np.percentile(latencies, 50):7.2f} ms  "
+                    f"p95 {np.percentile(latencies, 95):7.2f} ms"
+                )
+            
+            print("-" * 60)
+            print(f"Current PGVECTOR_HNSW_EF_SEARCH: {settings.PGVECTOR_HNSW_EF_SEARCH}")
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(benchmark(
+        num_queries=int(args[0]) if len(args) > 0 else 200,
+        k=int(args[1]) if len(args) > 1 else 50,
+        ef_search_values=[int(v) for v in args[2].split(",")] if len(args) > 2 else DEFAULT_EF_SEARCH,
+    ))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Convert room_embeddings.embedding between vector (float32) and halfvec (float16).
+
+Migration 010 already stores halfvec when the server has pgvector >= 0.7;
+use this to switch back to full precision, or to halfvec after upgrading
+pgvector. The HNSW index is rebuilt with the matching operator class.
+
+Usage: python scripts/convert_embedding_precision.py [half|full]
+Without an argument, prints the current storage type.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+
+
+STORAGE = {
+    "half": ("halfvec(384)", "halfvec_cosine_ops"),
+    "full": ("vector(384)", "vector_cosine_ops"),
+}
+
+
+async def embedding_type(conn) -> str:
+    """Current type of room_embeddings.embedding, e.g. 'vector(384)'."""
+    result = await conn.execute(text(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = 'room_embeddings'::regclass AND attname = 'embedding'"
+    ))
+    return result.scalar()
+
+
+async def convert(precision: str | None = None):
+    """Change the embedding column type in one transaction, rebuilding the HNSW index around it."""
+    database_url = settings.DATABASE_URL
+    if database_url.startswith("postgresql://"):
+        database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    engine = create_async_engine(database_url, echo=False)
+    
+    try:
+        async with engine.begin() as conn:
+            current = await embedding_type(conn)
+            if precision is None:
+                print(f"room_embeddings.embedding is {current}")
+                return
+            
+            column_type, ops = STORAGE[precision]
+            if current == column_type:
+                print(f"room_embeddings.embedding is already {column_type}")
+                return
+            
+            await conn.execute(text("DROP INDEX IF EXISTS ix_room_embeddings_embedding_hnsw"))
+            await conn.execute(text(
+                f"ALTER TABLE room_embeddings ALTER COLUMN embedding "
+                f"TYPE {column_type} USING embedding::{column_type}"
+            ))
+            await conn.execute(text(
+                f"CREATE INDEX ix_room_embeddings_embedding_hnsw ON room_embeddings "
+                f"USING hnsw (embedding {ops}) WITH (m = 16, ef_construction = 64)"
+            ))
+            print(f"✅ Converted room_embeddings.embedding from {current} to {column_type}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] not in STORAGE:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(convert(args[0] if args else None))
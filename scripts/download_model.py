@@ -1,15 +1,64 @@
 #!/usr/bin/env python3
-"""Download Hugging Face model for embeddings."""
+"""Download Hugging Face model for embeddings.
+
+With --onnx, also export an int8-quantized ONNX copy to EMBEDDING_ONNX_MODEL_PATH
+for EMBEDDING_BACKEND=onnx.
+"""
 import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.embedding import ONNX_MODEL_FILE
+
+
+MODEL_NAME = settings.EMBEDDING_MODEL_NAME
+
+
+def export_onnx(output_dir: Path) -> None:
+    """Export the transformer to ONNX and quantize its weights to int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_dir / 'model_fp32.onnx'
+    
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME).eval()
+    model.config.return_dict = False
+    
+    dummy = tokenizer(['Test embedding untuk room VIP'], return_tensors='pt')
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy['input_ids'], dummy['attention_mask']),
+            str(fp32_path),
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['last_hidden_state'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'last_hidden_state': {0: 'batch', 1: 'sequence'},
+            },
+            opset_version=14,
+        )
+    
+    quantize_dynamic(str(fp32_path), str(output_dir / ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    tokenizer.save_pretrained(str(output_dir))
+
 
 print("Downloading Hugging Face model...")
-print("Model: paraphrase-multilingual-MiniLM-L12-v2")
+print(f"Model: {MODEL_NAME}")
 print("This may take a few minutes on first run...")
 
 try:
     from sentence_transformers import SentenceTransformer
     
-    model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+    model = SentenceTransformer(MODEL_NAME)
     print(f"✓ Model downloaded successfully!")
     print(f"  Dimension: {model.get_sentence_embedding_dimension()}")
     
@@ -22,4 +71,15 @@ except Exception as e:
     print(f"✗ Error downloading model: {e}")
     sys.exit(1)
 
+if '--onnx' in sys.argv:
+    output_dir = Path(settings.EMBEDDING_ONNX_MODEL_PATH)
+    print(f"\nExporting int8-quantized ONNX model to {output_dir}...")
+    try:
+        export_onnx(output_dir)
+        size_mb = (output_dir / ONNX_MODEL_FILE).stat().st_size / 1024 / 1024
+        print(f"✓ ONNX model exported! Size: {size_mb:.1f}MB")
+    except Exception as e:
+        print(f"✗ Error exporting ONNX model: {e}")
+        sys.exit(1)
+
 print("\n✅ Ready to use!")
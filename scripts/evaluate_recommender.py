@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
-"""Evaluate the room recommender system using HitRate@K and MRR@K metrics."""
+"""Evaluate the room recommender system using HitRate@K and MRR@K metrics.
+
+Also reports p50/p95/p99 latency and SQL queries per get_recommendations
+call, and can fail on thresholds to catch performance regressions:
+
+    python scripts/evaluate_recommender.py --sample 2000 --max-p95-ms 150 --max-queries 12
+"""
+import argparse
 import asyncio
+import json
 import sys
+import time
+from contextvars import ContextVar
 from pathlib import Path
 from uuid import UUID
 
@@ -9,37 +19,47 @@ from uuid import UUID
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import numpy as np
-from sqlalchemy import select
+from sqlalchemy import select, func, event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.core.config import settings
-from app.models.user import User
 from app.models.reservation import Reservation, ReservationStatus
 from app.services.ai import AIService
 from app.services.embedding import FakeEmbeddingProvider
 
 
-async def get_users_with_events(db) -> list[User]:
-    """Get users who have events."""
-    from app.models.ai import UserEvent
-    
-    query = (
-        select(User)
-        .join(UserEvent, User.id == UserEvent.user_id)
-        .distinct()
-    )
-    result = await db.execute(query)
-    return list(result.scalars().all())
+# Per-task SQL statement counter, set around each get_recommendations call
+query_counter: ContextVar[list[int] | None] = ContextVar("query_counter", default=None)
+
+
+def database_url() -> str:
+    """Database URL for the async driver."""
+    url = settings.DATABASE_URL
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
 
 
-async def get_user_actual_bookings(db, user_id: UUID) -> set[UUID]:
-    """Get rooms the user has actually booked."""
-    query = select(Reservation.room_id).where(
-        Reservation.user_id == user_id,
+async def get_evaluation_users(db, sample_size: int) -> dict[UUID, set[UUID]]:
+    """Sample users with bookings, mapped to the rooms they actually booked."""
+    sampled = (
+        select(Reservation.user_id)
+        .where(Reservation.status.in_([ReservationStatus.CONFIRMED, ReservationStatus.COMPLETED]))
+        .group_by(Reservation.user_id)
+        .order_by(func.random())
+        .limit(sample_size)
+        .subquery()
+    )
+    query = select(Reservation.user_id, Reservation.room_id).where(
+        Reservation.user_id.in_(select(sampled.c.user_id)),
         Reservation.status.in_([ReservationStatus.CONFIRMED, ReservationStatus.COMPLETED]),
     )
     result = await db.execute(query)
-    return set(result.scalars().all())
+    
+    bookings: dict[UUID, set[UUID]] = {}
+    for user_id, room_id in result.all():
+        bookings.setdefault(user_id, set()).add(room_id)
+    return bookings
 
 
 def compute_hit_rate_at_k(recommended_ids: list[UUID], actual_ids: set[UUID], k: int) -> float:
@@ -62,80 +82,103 @@ def compute_mrr_at_k(recommended_ids: list[UUID], actual_ids: set[UUID], k: int)
     return 0.0
 
 
-async def evaluate_recommender(k: int = 8):
-    """Evaluate the recommender system."""
+def install_query_counter(engine) -> None:
+    """Count SQL statements per task via a context variable."""
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = query_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+async def evaluate_recommender(
+    k: int = 8,
+    sample_size: int = 1000,
+    concurrency: int = 8,
+) -> dict | None:
+    """Evaluate ranking quality, latency and query counts of get_recommendations."""
     print("\n" + "=" * 60)
     print(f"BIG GAMES Recommender Evaluation (K={k})")
     print("=" * 60 + "\n")
     
     # Create engine and session
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    engine = create_async_engine(database_url(), echo=False, pool_size=concurrency)
     async_session = async_sessionmaker(engine, expire_on_commit=False)
+    install_query_counter(engine)
     
     # Use FakeEmbeddingProvider for deterministic evaluation
     embedding_provider = FakeEmbeddingProvider()
+    semaphore = asyncio.Semaphore(concurrency)
     
-    async with async_session() as db:
-        try:
-            # Get users with events
-            users = await get_users_with_events(db)
+    async def evaluate_user(user_id: UUID, actual_bookings: set[UUID]) -> dict:
+        async with semaphore, async_session() as db:
+            counter = [0]
+            query_counter.set(counter)
             
-            if not users:
-                print("No users with events found. Run seed_demo_data.py first.")
-                return
-            
-            print(f"Found {len(users)} users with events")
-            print("-" * 40)
-            
-            hit_rates = []
-            mrrs = []
-            
-            for user in users:
-                # Get actual bookings
-                actual_bookings = await get_user_actual_bookings(db, user.id)
-                
-                if not actual_bookings:
-                    print(f"  {user.name}: No bookings (skipped)")
-                    continue
-                
-                # Get recommendations
-                ai_service = AIService(db, embedding_provider)
-                recommendations = await ai_service.get_recommendations(
-                    user_id=user.id,
-                    limit=k,
-                )
-                
-                recommended_ids = [r.room_id for r in recommendations.recommendations]
-                
-                # Compute metrics
-                hit_rate = compute_hit_rate_at_k(recommended_ids, actual_bookings, k)
-                mrr = compute_mrr_at_k(recommended_ids, actual_bookings, k)
-                
-                hit_rates.append(hit_rate)
-                mrrs.append(mrr)
-                
-                print(f"  {user.name}:")
-                print(f"    - Actual bookings: {len(actual_bookings)}")
-                print(f"    - Recommendations: {len(recommended_ids)}")
-                print(f"    - Cold start: {recommendations.is_cold_start}")
-                print(f"    - Hit Rate @{k}: {hit_rate:.4f}")
-                print(f"    - MRR @{k}: {mrr:.4f}")
-            
-            if hit_rates:
-                print("\n" + "=" * 40)
-                print("AGGREGATE METRICS")
-                print("=" * 40)
-                print(f"  Hit Rate @{k}: {np.mean(hit_rates):.4f} (±{np.std(hit_rates):.4f})")
-                print(f"  MRR @{k}: {np.mean(mrrs):.4f} (±{np.std(mrrs):.4f})")
-                print(f"  Users evaluated: {len(hit_rates)}")
-            else:
-                print("\nNo users with bookings to evaluate.")
+            ai_service = AIService(db, embedding_provider)
+            started = time.perf_counter()
+            recommendations = await ai_service.get_recommendations(user_id=user_id, limit=k)
+            latency_ms = (time.perf_counter() - started) * 1000
             
-        except Exception as e:
-            print(f"\nError during evaluation: {e}")
-            raise
-        finally:
-            await engine.dispose()
+            recommended_ids = [r.room_id for r in recommendations.recommendations]
+            return {
+                "hit_rate": compute_hit_rate_at_k(recommended_ids, actual_bookings, k),
+                "mrr": compute_mrr_at_k(recommended_ids, actual_bookings, k),
+                "latency_ms": latency_ms,
+                "queries": counter[0],
+                "cold_start": recommendations.is_cold_start,
+            }
+    
+    try:
+        async with async_session() as db:
+            bookings = await get_evaluation_users(db, sample_size)
+        
+        if not bookings:
+            print("No users with bookings found. Run seed_demo_data.py or generate_synthetic_data.py first.")
+            return None
+        
+        print(f"Evaluating {len(bookings)} users with bookings (concurrency {concurrency})")
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            evaluate_user(user_id, actual) for user_id, actual in bookings.items()
+        ))
+        elapsed = time.perf_counter() - started
+        
+        latencies = np.array([r["latency_ms"] for r in results])
+        queries = np.array([r["queries"] for r in results])
+        report = {
+            "k": k,
+            "users": len(results),
+            "hit_rate": float(np.mean([r["hit_rate"] for r in results])),
+            "mrr": float(np.mean([r["mrr"] for r in results])),
+            "cold_start_share": float(np.mean([r["cold_start"] for r in results])),
+            "latency_p50_ms": float(np.percentile(latencies, 50)),
+            "latency_p95_ms": float(np.percentile(latencies, 95)),
+            "latency_p99_ms": float(np.percentile(latencies, 99)),
+            "queries_mean": float(queries.mean()),
+            "queries_max": int(queries.max()),
+            "throughput_rps": len(results) / elapsed,
+        }
+        
+        print("\n" + "=" * 40)
+        print("AGGREGATE METRICS")
+        print("=" * 40)
+        print(f"  Hit Rate @{k}: {report['hit_rate']:.4f}")
+        print(f"  MRR @{k}: {report['mrr']:.4f}")
+        print(f"  Users evaluated: {report['users']} ({report['cold_start_share']:.1%} cold start)")
+        print(
+            f"  Latency: p50 {report['latency_p50_ms']:.1f} ms, "
+            f"p95 {report['latency_p95_ms']:.1f} ms, p99 {report['latency_p99_ms']:.1f} ms"
+        )
+        print(f"  Queries per call: mean {report['queries_mean']:.1f}, max {report['queries_max']}")
+        print(f"  Throughput: {report['throughput_rps']:.1f} calls/s")
+        return report
+        
+    except Exception as e:
+        print(f"\nError during evaluation: {e}")
+        raise
+    finally:
+        await engine.dispose()
 
 
 async def test_cold_start():
@@ -144,7 +187,7 @@ async def test_cold_start():
     print("Cold Start Test")
     print("=" * 60 + "\n")
     
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    engine = create_async_engine(database_url(), echo=False)
     async_session = async_sessionmaker(engine, expire_on_commit=False)
     
     embedding_provider = FakeEmbeddingProvider()
@@ -207,8 +250,8 @@ async def test_determinism():
         print("\n✗ FakeEmbeddingProvider has issues!")
 
 
-async def main():
-    """Run all evaluations."""
+async def main(args) -> int:
+    """Run all evaluations, returning a non-zero exit code on regressions."""
     # Test determinism first
     await test_determinism()
     
@@ -216,12 +259,37 @@ async def main():
     await test_cold_start()
     
     # Run full evaluation
-    await evaluate_recommender(k=8)
+    report = await evaluate_recommender(k=args.k, sample_size=args.sample, concurrency=args.concurrency)
     
     print("\n" + "=" * 60)
     print("Evaluation Complete")
     print("=" * 60 + "\n")
+    
+    if report is None:
+        return 0
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    
+    failures = []
+    if args.max_p95_ms is not None and report["latency_p95_ms"] > args.max_p95_ms:
+        failures.append(f"p95 latency {report['latency_p95_ms']:.1f} ms > {args.max_p95_ms} ms")
+    if args.max_queries is not None and report["queries_max"] > args.max_queries:
+        failures.append(f"max queries per call {report['queries_max']} > {args.max_queries}")
+    if args.min_hit_rate is not None and report["hit_rate"] < args.min_hit_rate:
+        failures.append(f"Hit Rate @{args.k} {report['hit_rate']:.4f} < {args.min_hit_rate}")
+    
+    for failure in failures:
+        print(f"✗ {failure}")
+    return 1 if failures else 0
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Evaluate the room recommender.")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--sample", type=int, default=1000, help="users with bookings to evaluate")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", help="write the metrics report to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if p95 latency is above this")
+    parser.add_argument("--max-queries", type=int, help="fail if any call runs more queries than this")
+    parser.add_argument("--min-hit-rate", type=float, help="fail if Hit Rate @K is below this")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,44 +1,36 @@
 """Quick script to generate room embeddings after deployment."""
 import asyncio
+import sys
 from app.db.session import async_session_maker
 from app.services.ai import AIService
-from app.models.room import Room, RoomStatus
-from sqlalchemy import select
 
 
-async def generate_all_embeddings():
-    """Generate embeddings for all active rooms."""
+async def generate_all_embeddings(force: bool = False):
+    """Generate embeddings for all active rooms in batches.
+    
+    Rooms whose profile text has not changed are skipped unless force is set.
+    """
     async with async_session_maker() as db:
-        # Get all active rooms
-        query = select(Room).where(Room.status == RoomStatus.ACTIVE)
-        result = await db.execute(query)
-        rooms = result.scalars().all()
+        service = AIService(db)
+        result = await service.generate_room_embeddings(force=force)
         
-        print(f'🔍 Found {len(rooms)} active rooms')
+        print(f'🔍 Found {result.total_rooms} active rooms')
         
-        if not rooms:
+        if not result.total_rooms:
             print('⚠️  No active rooms found. Please seed data first.')
             return
         
-        service = AIService(db)
-        success = 0
-        failed = 0
-        
-        for i, room in enumerate(rooms, 1):
-            try:
-                print(f'[{i}/{len(rooms)}] Generating embedding for: {room.name}...')
-                await service.generate_room_embedding(room.id)
-                success += 1
-                print(f'  ✅ Success')
-            except Exception as e:
-                failed += 1
-                print(f'  ❌ Error: {str(e)[:100]}')
+        for error in result.errors[:10]:
+            print(f'  ❌ {error["room_name"]}: {error["error"][:100]}')
         
         await db.commit()
-        print(f'\n✅ Completed: {success} success, {failed} failed')
+        print(
+            f'\n✅ Completed: {result.created_count} created, {result.updated_count} updated, '
+            f'{result.skipped_count} unchanged, {result.error_count} failed'
+        )
 
 
 if __name__ == '__main__':
     print('🤖 Starting embedding generation...\n')
-    asyncio.run(generate_all_embeddings())
+    asyncio.run(generate_all_embeddings(force='--force' in sys.argv))
     print('\n🎉 Done!')
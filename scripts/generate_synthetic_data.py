@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Generate a large synthetic dataset for recommender benchmarks.
+
+Rooms belong to game themes, users prefer one or two themes, and events are
+drawn mostly from rooms of the preferred themes. Each evaluation user also
+gets one held-out COMPLETED reservation (not in their events) that
+scripts/evaluate_recommender.py uses as ground truth.
+
+Usage: python scripts/generate_synthetic_data.py --rooms 2000 --users 100000 --events 3000000
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncpg
+import numpy as np
+from pgvector.asyncpg import register_vector
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.ai import EventType
+from app.models.room import RoomCategory, ConsoleType
+from app.services.ai import AIService
+from app.services.embedding import FakeEmbeddingProvider
+from app.services.room_stats import RoomStatsService
+from app.services.vector_index import as_vector
+
+
+# Marks synthetic rows so --reset can remove them without touching real data
+EMAIL_DOMAIN = "synthetic.biggames.test"
+ROOM_PREFIX = "SYN"
+
+THEMES = [
+    "football fifa sports",
+    "racing wheel gran turismo",
+    "horror resident evil",
+    "fighting tekken street fighter",
+    "rpg final fantasy adventure",
+    "party mario kart family",
+    "shooter call of duty",
+    "open world gta action",
+]
+
+CATEGORY_PRICES = {
+    RoomCategory.VIP: 40000,
+    RoomCategory.REGULAR: 15000,
+    RoomCategory.PS_SERIES: 25000,
+    RoomCategory.SIMULATOR: 50000,
+}
+
+# VIEW, CLICK, BOOK, RATE
+EVENT_TYPES = [EventType.VIEW_ROOM, EventType.CLICK_ROOM, EventType.BOOK_ROOM, EventType.RATE_ROOM]
+EVENT_TYPE_PROBS = [0.60, 0.25, 0.10, 0.05]
+
+# Share of a user's events that come from their preferred themes
+THEME_AFFINITY = 0.8
+
+COPY_CHUNK_SIZE = 100_000
+
+
+def raw_database_url() -> str:
+    """Database URL for a plain asyncpg connection."""
+    return settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def async_database_url() -> str:
+    """Database URL for the SQLAlchemy async engine."""
+    database_url = settings.DATABASE_URL
+    if database_url.startswith("postgresql://"):
+        database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return database_url
+
+
+async def copy_in_chunks(conn, table: str, columns: list[str], records) -> int:
+    """COPY records into a table in fixed-size chunks."""
+    total = 0
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= COPY_CHUNK_SIZE:
+            await conn.copy_records_to_table(table, records=chunk, columns=columns)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        await conn.copy_records_to_table(table, records=chunk, columns=columns)
+        total += len(chunk)
+    return total
+
+
+async def reset(conn) -> None:
+    """Delete previously generated synthetic data (cascades to events and reservations)."""
+    print("Removing previous synthetic data...")
+    await conn.execute(f"DELETE FROM users WHERE email LIKE '%@{EMAIL_DOMAIN}'")
+    await conn.execute(f"DELETE FROM rooms WHERE name LIKE '{ROOM_PREFIX} %'")
+
+
+async def generate(num_rooms: int, num_users: int, num_events: int, eval_fraction: float, seed: int, clear: bool):
+    """Generate rooms, users, events, held-out reservations and derived tables."""
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    
+    conn = await asyncpg.connect(raw_database_url())
+    await register_vector(conn)
+    try:
+        if clear:
+            await reset(conn)
+        
+        # Rooms
+        categories = list(CATEGORY_PRICES)
+        room_ids = [uuid.uuid4() for _ in range(num_rooms)]
+        room_themes = rng.integers(0, len(THEMES), num_rooms)
+        room_categories = rng.integers(0, len(categories), num_rooms)
+        room_created = [now - timedelta(days=int(d)) for d in rng.integers(0, 730, num_rooms)]
+        # Zipf-like popularity so a few rooms dominate, as in real traffic
+        popularity = 1.0 / np.arange(1, num_rooms + 1) ** 0.8
+        popularity = popularity[rng.permutation(num_rooms)]
+        
+        await copy_in_chunks(
+            conn, "rooms",
+            ["id", "name", "description", "category", "capacity", "base_price_per_hour", "status", "created_at"],
+            (
+                (
+                    room_ids[i],
+                    f"{ROOM_PREFIX} {categories[room_categories[i]].value} {THEMES[room_themes[i]].split()[0].title()} {i}",
+                    f"Room for {THEMES[room_themes[i]]} fans",
+                    categories[room_categories[i]].value,
+                    int(rng.integers(2, 9)),
+                    Decimal(CATEGORY_PRICES[categories[room_categories[i]]] + 5000 * int(rng.integers(0, 3))),
+                    "ACTIVE",
+                    room_created[i],
+                )
+                for i in range(num_rooms)
+            ),
+        )
+        consoles = list(ConsoleType)
+        await copy_in_chunks(
+            conn, "units",
+            ["id", "room_id", "console_type", "jumlah_stick", "status"],
+            (
+                (uuid.uuid4(), room_id, consoles[int(rng.integers(0, len(consoles)))].value, 2, "ACTIVE")
+                for room_id in room_ids
+            ),
+        )
+        print(f"  Rooms: {num_rooms}")
+        
+        # Users (one bcrypt hash shared by all, hashing 100k passwords takes hours)
+        password_hash = get_password_hash("synthetic123")
+        user_ids = [uuid.uuid4() for _ in range(num_users)]
+        await copy_in_chunks(
+            conn, "users",
+            ["id", "email", "name", "password_hash", "role", "created_at"],
+            (
+                (user_ids[i], f"user{i}@{EMAIL_DOMAIN}", f"Synthetic User {i}", password_hash, "USER", now)
+                for i in range(num_users)
+            ),
+        )
+        print(f"  Users: {num_users}")
+        
+        # Per-theme room pools, weighted by popularity
+        theme_pools = []
+        for theme in range(len(THEMES)):
+            members = np.flatnonzero(room_themes == theme)
+            weights = popularity[members] / popularity[members].sum() if len(members) else members
+            theme_pools.append((members, weights))
+        global_weights = popularity / popularity.sum()
+        
+        # Each user prefers one or two themes
+        primary_theme = rng.integers(0, len(THEMES), num_users)
+        secondary_theme = np.where(rng.random(num_users) < 0.5, rng.integers(0, len(THEMES), num_users), primary_theme)
+        
+        # Events: per-user counts from a geometric-ish distribution summing to ~num_events
+        counts = rng.exponential(num_events / num_users, num_users).astype(np.int64) + 1
+        event_users = np.repeat(np.arange(num_users), counts)
+        total_events = len(event_users)
+        
+        from_theme = rng.random(total_events) < THEME_AFFINITY
+        use_secondary = rng.random(total_events) < 0.3
+        event_themes = np.where(use_secondary, secondary_theme[event_users], primary_theme[event_users])
+        event_rooms = rng.choice(num_rooms, total_events, p=global_weights)
+        for theme, (members, weights) in enumerate(theme_pools):
+            mask = from_theme & (event_themes == theme)
+            if len(members) and mask.any():
+                event_rooms[mask] = rng.choice(members, mask.sum(), p=weights)
+        
+        event_types = rng.choice(len(EVENT_TYPES), total_events, p=EVENT_TYPE_PROBS)
+        ratings = rng.integers(3, 6, total_events)
+        event_offsets = rng.integers(0, 90 * 24 * 3600, total_events)
+        
+        await copy_in_chunks(
+            conn, "user_events",
+            ["id", "user_id", "room_id", "event_type", "rating_value", "created_at"],
+            (
+                (
+                    uuid.uuid4(),
+                    user_ids[event_users[i]],
+                    room_ids[event_rooms[i]],
+                    EVENT_TYPES[event_types[i]].value,
+                    int(ratings[i]) if EVENT_TYPES[event_types[i]] == EventType.RATE_ROOM else None,
+                    now - timedelta(seconds=int(event_offsets[i])),
+                )
+                for i in range(total_events)
+            ),
+        )
+        print(f"  Events: {total_events}")
+        
+        # Held-out bookings for evaluation users, drawn from their primary theme
+        eval_users = np.flatnonzero(rng.random(num_users) < eval_fraction)
+        held_out = []
+        for user in eval_users:
+            members, weights = theme_pools[primary_theme[user]]
+            if not len(members):
+                continue
+            room = int(rng.choice(members, p=weights))
+            start = (now - timedelta(days=int(rng.integers(1, 7)))).replace(minute=0, second=0, microsecond=0)
+            price = Decimal(CATEGORY_PRICES[categories[room_categories[room]]] * 2)
+            held_out.append((
+                uuid.uuid4(), user_ids[user], room_ids[room], start, start + timedelta(hours=2),
+                Decimal("2"), price, Decimal("0"), price, "COMPLETED", start - timedelta(days=1),
+            ))
+        await copy_in_chunks(
+            conn, "reservations",
+            ["id", "user_id", "room_id", "start_time", "end_time", "duration_hours",
+             "subtotal", "discount_amount", "total_amount", "status", "created_at"],
+            held_out,
+        )
+        print(f"  Held-out reservations: {len(held_out)}")
+    finally:
+        await conn.close()
+    
+    # Room embeddings through the normal service path, so profiles match production
+    engine = create_async_engine(async_database_url(), echo=False)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+    provider = FakeEmbeddingProvider()
+    try:
+        async with async_session() as db:
+            result = await AIService(db, provider).generate_room_embeddings(room_ids=room_ids)
+            await RoomStatsService(db).reconcile()
+            await db.commit()
+            print(f"  Room embeddings: {result.success_count}")
+    finally:
+        await engine.dispose()
+    
+    # Preference vectors: weighted mean of room embeddings, vectorized over all events
+    conn = await asyncpg.connect(raw_database_url())
+    await register_vector(conn)
+    try:
+        rows = await conn.fetch(
+            "SELECT room_id, embedding FROM room_embeddings WHERE room_id = ANY($1::uuid[])",
+            room_ids,
+        )
+        index_of = {room_id: i for i, room_id in enumerate(room_ids)}
+        room_matrix = np.zeros((num_rooms, provider.dimension), dtype=np.float32)
+        for row in rows:
+            room_matrix[index_of[row["room_id"]]] = as_vector(row["embedding"])
+        
+        type_weights = np.array([AIService._event_weight(t, None) for t in EVENT_TYPES], dtype=np.float32)
+        rating_weights = np.array([AIService._event_weight(EventType.RATE_ROOM, r) for r in range(6)], dtype=np.float32)
+        is_rate = np.array(EVENT_TYPES)[event_types] == EventType.RATE_ROOM
+        weights = np.where(is_rate, rating_weights[ratings], type_weights[event_types])
+        
+        # Chunked so the gathered (events x dim) block stays small
+        weighted_sum = np.zeros((num_users, provider.dimension), dtype=np.float32)
+        for start in range(0, total_events, COPY_CHUNK_SIZE):
+            chunk = slice(start, start + COPY_CHUNK_SIZE)
+            np.add.at(weighted_sum, event_users[chunk], room_matrix[event_rooms[chunk]] * weights[chunk, None])
+        weight_sum = np.bincount(event_users, weights=weights, minlength=num_users)
+        preference = weighted_sum / np.maximum(weight_sum, 1e-9)[:, None]
+        
+        await copy_in_chunks(
+            conn, "user_preference_vectors",
+            ["user_id", "embedding", "weight_sum", "event_count", "updated_at"],
+            (
+                (user_ids[i], preference[i], float(weight_sum[i]), int(counts[i]), now)
+                for i in range(num_users)
+            ),
+        )
+        print(f"  Preference vectors: {num_users}")
+    finally:
+        await conn.close()
+    
+    print(f"\nDone in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--events", type=int, default=3_000_000)
+    parser.add_argument("--eval-fraction", type=float, default=0.1, help="share of users with a held-out booking")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="remove previous synthetic data first")
+    args = parser.parse_args()
+    
+    print("Generating synthetic recommender dataset...")
+    asyncio.run(generate(args.rooms, args.users, args.events, args.eval_fraction, args.seed, args.reset))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Daily job: roll up user events, create upcoming partitions and apply retention.
+
+Schedule once a day (e.g. Heroku Scheduler: python scripts/maintain_user_events.py).
+Raw partitions are only dropped when USER_EVENTS_RETENTION_MONTHS > 0.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.event_partitions import run_event_maintenance
+
+
+async def main():
+    result = await run_event_maintenance()
+    
+    if result is None:
+        print('⚠️  Another process is running user event maintenance, skipping.')
+        return
+    
+    print(
+        f'✅ User event partitions: created {result["created_partitions"]}, '
+        f'dropped {result["dropped_partitions"]}'
+    )
+
+
+if __name__ == '__main__':
+    print('🗂️  Maintaining user events...\n')
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Nightly job: precompute top-N recommendations into user_recommendations.
+
+Schedule once a day (e.g. Heroku Scheduler: python scripts/precompute_recommendations.py).
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.recommendation_precompute import run_precompute
+
+
+async def main():
+    started = time.perf_counter()
+    result = await run_precompute()
+    
+    if not result["rooms"]:
+        print('⚠️  No active rooms with embeddings. Run generate_embeddings.py first.')
+        return
+    
+    print(
+        f'✅ Precomputed recommendations for {result["users"]} users '
+        f'over {result["rooms"]} rooms in {time.perf_counter() - started:.1f}s'
+    )
+
+
+if __name__ == '__main__':
+    print('🤖 Precomputing recommendations...\n')
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Find (and with --apply, cancel) overlapping active reservations.
+
+Migration 011 refuses to add the (room_id, period) exclusion constraint
+while CONFIRMED/PENDING_PAYMENT reservations overlap. Run this before
+upgrading, review the plan, then run it again with --apply.
+
+Per room, CONFIRMED wins over PENDING_PAYMENT, then the oldest booking;
+every active booking overlapping one that is kept gets cancelled.
+Unpaid payments of cancelled bookings are cancelled too; PAID payments
+are left alone and listed for a manual refund.
+
+Usage: python scripts/resolve_overlapping_reservations.py [--apply]
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.db.session import async_session_maker
+from app.services.room_stats import RoomStatsService
+
+
+# Plain SQL on start_time/end_time: the period column only exists after migration 011
+ACTIVE_RESERVATIONS = text("""
+    SELECT r.id, r.room_id, r.status, r.start_time, r.end_time, p.status AS payment_status
+    FROM reservations r
+    LEFT JOIN payments p ON p.reservation_id = r.id
+    WHERE r.status IN ('CONFIRMED', 'PENDING_PAYMENT')
+    ORDER BY r.room_id, r.status = 'CONFIRMED' DESC, r.created_at, r.id
+""")
+
+NOTE = "Cancelled by resolve_overlapping_reservations.py: overlaps reservation {}"
+
+
+def plan_cancellations(rows) -> list[tuple]:
+    """Pick the reservations to cancel, as (row, id of the kept reservation it overlaps)."""
+    kept: dict = {}
+    cancel = []
+    for row in rows:
+        room_kept = kept.setdefault(row.room_id, [])
+        winner = next(
+            (k for k in room_kept if k.start_time < row.end_time and row.start_time < k.end_time),
+            None,
+        )
+        if winner is None:
+            room_kept.append(row)
+        else:
+            cancel.append((row, winner.id))
+    return cancel
+
+
+async def main(apply: bool):
+    async with async_session_maker() as db:
+        rows = (await db.execute(ACTIVE_RESERVATIONS)).all()
+        cancel = plan_cancellations(rows)
+        
+        if not cancel:
+            print('✅ No overlapping active reservations, migration 011 can run.')
+            return
+        
+        refunds = []
+        for row, winner_id in cancel:
+            print(
+                f'  {row.id} ({row.status}, {row.start_time:%Y-%m-%d %H:%M}-{row.end_time:%H:%M}, '
+                f'payment {row.payment_status or "none"}) overlaps kept {winner_id}'
+            )
+            if row.payment_status == 'PAID':
+                refunds.append(row.id)
+        
+        if not apply:
+            print(f'\n{len(cancel)} reservations would be cancelled. Re-run with --apply to cancel them.')
+            return
+        
+        for row, winner_id in cancel:
+            await db.execute(
+                text("""
+                    UPDATE reservations
+                    SET status = 'CANCELLED', notes = concat_ws(E'\\n', notes, :note)
+                    WHERE id = :id
+                """),
+                {"id": row.id, "note": NOTE.format(winner_id)},
+            )
+            await db.execute(
+                text("""
+                    UPDATE payments SET status = 'CANCELLED'
+                    WHERE reservation_id = :id AND status = 'WAITING_CONFIRMATION'
+                """),
+                {"id": row.id},
+            )
+        # Cancelled bookings no longer count towards popularity
+        await RoomStatsService(db).reconcile()
+        await db.commit()
+        
+        print(f'\n✅ Cancelled {len(cancel)} reservations.')
+        if refunds:
+            print(f'⚠️  Paid, refund manually: {", ".join(str(id) for id in refunds)}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args != ['--apply']:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(main(apply=bool(args)))
@@ -8,6 +8,7 @@ from uuid import uuid4
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from app.main import app
@@ -19,6 +20,10 @@ from app.models.addon import Addon, AddonPriceType
 from app.models.reservation import Reservation, ReservationStatus
 from app.models.payment import Payment, PaymentMethod, PaymentStatus
 from app.models.ai import RoomEmbedding
+from app.services.ai import recommendation_cache, trending_cache
+from app.services.cooccurrence import get_cooccurrence_index
+from app.services.reservation_index import get_reservation_index
+from app.services.vector_index import get_room_vector_index
 
 
 # Test database URL - use in-memory SQLite for tests
@@ -34,12 +39,25 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_in_process_caches():
+    """Reset process-wide caches so tests don't see each other's data."""
+    get_room_vector_index().clear()
+    get_cooccurrence_index().clear()
+    get_reservation_index().clear()
+    trending_cache.clear()
+    recommendation_cache.clear()
+    yield
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     """Create a test database session."""
     engine = create_async_engine(TEST_DATABASE_URL, echo=False)
     
     async with engine.begin() as conn:
+        # Needed by the reservations (room_id, period) exclusion constraint
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
     
@@ -1,4 +1,7 @@
 """Tests for AI recommendation system."""
+import asyncio
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from uuid import uuid4
@@ -14,10 +17,53 @@ from app.models.room import Room, RoomCategory, RoomStatus
 from app.models.reservation import Reservation, ReservationStatus
 from app.models.payment import Payment, PaymentMethod, PaymentStatus
 from app.models.review import Review
-from app.models.ai import UserEvent, EventType, RoomEmbedding
+from app.models.ai import UserEvent, EventType, RoomEmbedding, UserEventDailyCount, UserPreferenceVector
 from app.core.security import get_password_hash
-from app.services.ai import AIService
-from app.services.embedding import HuggingFaceEmbeddingProvider
+from app.services.ai import AIService, recommendation_cache
+from app.services.room_stats import RoomStatsService
+from app.services.embedding import (
+    FakeEmbeddingProvider,
+    HuggingFaceEmbeddingProvider,
+    InferenceExecutor,
+    OnnxEmbeddingProvider,
+    get_embedding_provider,
+)
+from app.services.event_buffer import EventBuffer, EventBufferFullError, get_event_buffer
+from app.services.ranking import score_candidates
+from app.services.cooccurrence import CooccurrenceIndex, get_cooccurrence_index, merge_candidates
+from app.services.vector_index import RoomVectorIndex, as_vector
+
+
+class TestFakeEmbeddingProvider:
+    """Tests for the deterministic FakeEmbeddingProvider."""
+    
+    @pytest.mark.asyncio
+    async def test_deterministic_across_instances(self):
+        """Test that the same text gives the same embedding from any instance."""
+        emb1 = await FakeEmbeddingProvider().get_embedding("VIP Room with PS5 Pro")
+        emb2 = await FakeEmbeddingProvider().get_embedding("VIP Room with PS5 Pro")
+        
+        assert emb1 == emb2
+        assert len(emb1) == 384
+        assert np.isclose(np.linalg.norm(emb1), 1.0)
+    
+    @pytest.mark.asyncio
+    async def test_shared_words_are_more_similar(self):
+        """Test that texts sharing words are closer than unrelated texts."""
+        provider = FakeEmbeddingProvider()
+        base, related, unrelated = np.array(await provider.get_embeddings([
+            "VIP Room PS5 premium",
+            "VIP Room PS5 budget",
+            "Racing simulator wheel",
+        ]))
+        
+        assert base @ related > base @ unrelated
+    
+    @pytest.mark.asyncio
+    async def test_rejects_empty_text(self):
+        """Test that empty text is rejected like the real provider."""
+        with pytest.raises(ValueError):
+            await FakeEmbeddingProvider().get_embedding("  ")
 
 
 class TestHuggingFaceEmbeddingProvider:
@@ -75,6 +121,453 @@ class TestHuggingFaceEmbeddingProvider:
         
         assert len(emb) == 384
         assert np.isclose(np.linalg.norm(emb), 1.0)
+    
+    @pytest.mark.asyncio
+    async def test_batch_embedding_rejects_empty_text(self):
+        """Test that a batch containing empty text is rejected before encoding."""
+        provider = HuggingFaceEmbeddingProvider()
+        
+        assert await provider.get_embeddings([]) == []
+        with pytest.raises(ValueError):
+            await provider.get_embeddings(["VIP Room", "  "])
+    
+    def test_provider_is_shared(self):
+        """Test that the registry returns one provider instance per model."""
+        assert get_embedding_provider() is get_embedding_provider()
+    
+    def test_stats_before_load(self):
+        """Test that a fresh provider reports it is not ready yet."""
+        provider = HuggingFaceEmbeddingProvider()
+        
+        stats = provider.stats()
+        
+        assert stats["is_ready"] is False
+        assert stats["load_time_seconds"] is None
+        assert stats["workers"] == []
+        assert stats["dimension"] == 384
+    
+    @pytest.mark.asyncio
+    async def test_process_warmup_reaches_every_worker(self, monkeypatch):
+        """Test that process-mode warmup retries until each worker reported its load."""
+        executor = InferenceExecutor(mode="process", max_workers=2, max_concurrency=1)
+        provider = HuggingFaceEmbeddingProvider(executor=executor)
+        rounds = iter([[1, 1], [1, 2]])
+        
+        async def run_on_workers(fn, *args):
+            return [
+                {"pid": pid, "load_time_seconds": 1.5, "memory_bytes": 100 * 1024 * 1024}
+                for pid in next(rounds)
+            ]
+        
+        monkeypatch.setattr(executor, "run_on_workers", run_on_workers)
+        await provider.warmup()
+        
+        stats = provider.stats()
+        assert stats["is_ready"] is True
+        assert [w["pid"] for w in stats["workers"]] == [1, 2]
+        assert stats["workers"][0] == {"pid": 1, "load_time_seconds": 1.5, "memory_mb": 100.0}
+
+
+class TestOnnxEmbeddingProvider:
+    """Tests for the int8 ONNX provider against the torch backend."""
+    
+    @pytest.fixture
+    def onnx_provider(self):
+        from pathlib import Path
+        from app.core.config import settings
+        from app.services.embedding import ONNX_MODEL_FILE
+        
+        if not (Path(settings.EMBEDDING_ONNX_MODEL_PATH) / ONNX_MODEL_FILE).exists():
+            pytest.skip("ONNX model not exported, run scripts/download_model.py --onnx")
+        return OnnxEmbeddingProvider()
+    
+    @pytest.mark.asyncio
+    async def test_parity_with_torch_backend(self, onnx_provider):
+        """Test that quantized ONNX embeddings match sentence-transformers closely."""
+        texts = [
+            "VIP Room with PS5 Pro",
+            "Ruangan VIP dengan PS5 dan 4 controller",
+            "Regular Room budget gaming",
+            "Racing simulator with steering wheel",
+        ]
+        torch_embs = np.array(await HuggingFaceEmbeddingProvider().get_embeddings(texts))
+        onnx_embs = np.array(await onnx_provider.get_embeddings(texts))
+        
+        assert onnx_embs.shape == (4, 384)
+        assert np.allclose(np.linalg.norm(onnx_embs, axis=1), 1.0, atol=1e-5)
+        # Int8 weights shift values slightly but keep the direction
+        assert np.all(np.sum(torch_embs * onnx_embs, axis=1) > 0.98)
+        # Nearest neighbours are preserved
+        assert np.array_equal(
+            np.argsort(-(torch_embs @ torch_embs.T), axis=1)[:, 1],
+            np.argsort(-(onnx_embs @ onnx_embs.T), axis=1)[:, 1],
+        )
+    
+    @pytest.mark.asyncio
+    async def test_single_text_matches_batch(self, onnx_provider):
+        """Test that padding in a batch doesn't change a text's embedding."""
+        single = await onnx_provider.get_embedding("VIP Room with PS5 Pro")
+        batch = await onnx_provider.get_embeddings(["VIP Room with PS5 Pro", "A much longer room description text"])
+        
+        assert np.allclose(single, batch[0], atol=1e-5)
+    
+    def test_model_name_differs_from_torch_backend(self, tmp_path):
+        """Test that ONNX embeddings aren't mistaken for current torch ones."""
+        provider = OnnxEmbeddingProvider(model_path=str(tmp_path))
+        
+        assert provider.model_name == f"{HuggingFaceEmbeddingProvider().model_name}-onnx-int8"
+        assert provider.base_model_name == HuggingFaceEmbeddingProvider().model_name
+    
+    def test_missing_model_path_raises(self, tmp_path):
+        """Test that a missing export gives an actionable error."""
+        provider = OnnxEmbeddingProvider(model_path=str(tmp_path))
+        
+        with pytest.raises(RuntimeError, match="download_model.py --onnx"):
+            provider._load_model()
+
+
+class TestInferenceExecutor:
+    """Tests for the bounded inference executor."""
+    
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop_thread(self):
+        """Test that work runs in a pool thread, not the event loop thread."""
+        executor = InferenceExecutor(mode="thread", max_workers=1, max_concurrency=1)
+        
+        worker_thread = await executor.run(threading.get_ident)
+        
+        assert worker_thread != threading.get_ident()
+        executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Test that no more than max_concurrency calls run at once."""
+        executor = InferenceExecutor(mode="thread", max_workers=4, max_concurrency=2)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        
+        def work():
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+        
+        await asyncio.gather(*[executor.run(work) for _ in range(6)])
+        
+        stats = executor.stats()
+        assert peak <= 2
+        assert stats["completed"] == 6
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
+        executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_run_on_workers_uses_every_worker(self):
+        """Test that per-worker calls each get their own worker despite the concurrency limit."""
+        executor = InferenceExecutor(mode="thread", max_workers=3, max_concurrency=1)
+        
+        def work():
+            time.sleep(0.05)
+            return threading.get_ident()
+        
+        assert len(set(await executor.run_on_workers(work))) == 3
+        executor.shutdown()
+
+
+class TestEmbeddingSkipCache:
+    """Tests for skipping unchanged room profiles."""
+    
+    def test_unchanged_profile_is_current(self):
+        """Test that the same profile and model are detected as current."""
+        provider = HuggingFaceEmbeddingProvider()
+        ai_service = AIService(None, provider)
+        profile_hash = ai_service._profile_hash("Room: VIP 1 | Category: VIP")
+        
+        assert ai_service._is_embedding_current(profile_hash, provider.model_name, profile_hash)
+    
+    def test_changed_profile_or_model_is_stale(self):
+        """Test that a changed profile, other model or missing hash forces re-encoding."""
+        provider = HuggingFaceEmbeddingProvider()
+        ai_service = AIService(None, provider)
+        old_hash = ai_service._profile_hash("Price: 30000 IDR per hour")
+        new_hash = ai_service._profile_hash("Price: 35000 IDR per hour")
+        
+        assert old_hash != new_hash
+        assert not ai_service._is_embedding_current(old_hash, provider.model_name, new_hash)
+        assert not ai_service._is_embedding_current(new_hash, "other-model", new_hash)
+        assert not ai_service._is_embedding_current(None, None, new_hash)
+
+
+class TestRoomVectorIndex:
+    """Tests for the in-memory room vector index."""
+    
+    def _random_index(self, n: int, dim: int = 384, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        vectors = rng.normal(size=(n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        room_ids = [uuid4() for _ in range(n)]
+        index = RoomVectorIndex(max_rooms=1000)
+        index.load(room_ids, list(vectors))
+        return index, room_ids, vectors
+    
+    def test_search_matches_exact_ranking(self):
+        """Test that top-k equals a full sort of dot products."""
+        index, room_ids, vectors = self._random_index(200)
+        query = vectors[7]
+        
+        hits = index.search(query, 10)
+        
+        expected = np.argsort(-(vectors @ query))[:10]
+        assert [room_id for room_id, _ in hits] == [room_ids[i] for i in expected]
+        assert hits[0][0] == room_ids[7]
+        assert np.isclose(hits[0][1], 1.0, atol=1e-5)
+    
+    def test_search_k_larger_than_index(self):
+        """Test that asking for more rooms than indexed returns all, sorted."""
+        index, _, vectors = self._random_index(5)
+        
+        hits = index.search(vectors[0], 50)
+        
+        scores = [score for _, score in hits]
+        assert len(hits) == 5
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_empty_index(self):
+        """Test that an empty index returns no rooms."""
+        index = RoomVectorIndex(max_rooms=1000)
+        
+        assert index.search(np.ones(384, dtype=np.float32), 10) == []
+    
+    def test_float16_index_ranking_matches_float32(self):
+        """Test that a float16 matrix ranks rooms like the float32 one."""
+        index, room_ids, vectors = self._random_index(500)
+        half_index = RoomVectorIndex(max_rooms=1000, dtype=np.float16)
+        half_index.load(room_ids, list(vectors))
+        rng = np.random.default_rng(1)
+        
+        for i in rng.integers(0, 500, 20):
+            query = vectors[i] + rng.normal(0, 0.05, 384).astype(np.float32)
+            query /= np.linalg.norm(query)
+            
+            hits = index.search(query, 50)
+            half_hits = half_index.search(query, 50)
+            
+            overlap = {r for r, _ in hits} & {r for r, _ in half_hits}
+            assert len(overlap) >= 48
+            assert half_hits[0][0] == hits[0][0]
+            scores = dict(hits)
+            assert all(abs(scores[r] - s) < 1e-3 for r, s in half_hits if r in scores)
+    
+    @pytest.mark.asyncio
+    async def test_halfvec_column_ranking_matches_vector(self, db_session: AsyncSession):
+        """Test that pgvector ranks halfvec-stored embeddings like vector-stored ones."""
+        from pgvector.sqlalchemy import HALFVEC, Vector
+        from sqlalchemy import Column, Integer, MetaData, Table, insert
+        
+        table = Table(
+            "embedding_precision_check", MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("full", Vector(384)),
+            Column("half", HALFVEC(384)),
+            prefixes=["TEMPORARY"],
+        )
+        await db_session.run_sync(lambda session: table.create(session.connection()))
+        _, _, vectors = self._random_index(300)
+        await db_session.execute(insert(table), [
+            {"id": i, "full": vector.tolist(), "half": vector.tolist()} for i, vector in enumerate(vectors)
+        ])
+        rng = np.random.default_rng(2)
+        
+        for i in rng.integers(0, 300, 10):
+            query = (vectors[i] + rng.normal(0, 0.05, 384).astype(np.float32)).tolist()
+            full = await db_session.execute(
+                select(table.c.id).order_by(table.c.full.cosine_distance(query)).limit(20)
+            )
+            half = await db_session.execute(
+                select(table.c.id).order_by(table.c.half.cosine_distance(query)).limit(20)
+            )
+            full_ids, half_ids = full.scalars().all(), half.scalars().all()
+            
+            assert half_ids[0] == full_ids[0]
+            assert len(set(full_ids) & set(half_ids)) >= 19
+    
+    def test_as_vector_accepts_halfvec(self):
+        """Test that halfvec column values convert to float32 arrays."""
+        from pgvector.utils import HalfVector
+        
+        vector = as_vector(HalfVector([0.5, -0.25, 1.0]))
+        
+        assert vector.dtype == np.float32
+        assert vector.tolist() == [0.5, -0.25, 1.0]
+    
+    @pytest.mark.asyncio
+    async def test_reloads_when_active_set_swaps(self, db_session: AsyncSession, personalized_setup):
+        """Test that deactivating one room while reactivating another triggers a reload."""
+        rooms, _ = personalized_setup
+        index = RoomVectorIndex(max_rooms=1000)
+        rooms[0].status = RoomStatus.INACTIVE
+        await db_session.commit()
+        await index.ensure_fresh(db_session)
+        assert rooms[0].id not in set(index._room_ids)
+        
+        # Same count and embedding timestamps, different rooms
+        rooms[0].status = RoomStatus.ACTIVE
+        rooms[1].status = RoomStatus.INACTIVE
+        await db_session.commit()
+        await index.ensure_fresh(db_session)
+        
+        assert rooms[0].id in set(index._room_ids)
+        assert rooms[1].id not in set(index._room_ids)
+
+
+class TestCooccurrenceIndex:
+    """Tests for the item-item co-occurrence index."""
+    
+    def test_csr_rows_are_symmetric_and_sorted(self):
+        """Test that co-occurring rooms link both ways with cosine-normalized scores."""
+        a, b, c = uuid4(), uuid4(), uuid4()
+        u1, u2, u3 = uuid4(), uuid4(), uuid4()
+        index = CooccurrenceIndex()
+        
+        index.add_interactions([(u1, a), (u1, b), (u2, a), (u2, b), (u3, a), (u3, c)])
+        
+        assert index.nnz == 4
+        assert index.candidates([a], 5) == [(b, pytest.approx(2 / np.sqrt(6))), (c, pytest.approx(1 / np.sqrt(3)))]
+        assert index.candidates([c], 5) == [(a, pytest.approx(1 / np.sqrt(3)))]
+        indptr, _, all_data = index.csr
+        for row in range(len(indptr) - 1):
+            data = all_data[indptr[row]:indptr[row + 1]]
+            assert list(data) == sorted(data, reverse=True)
+    
+    def test_incremental_add_matches_full_build(self):
+        """Test that folding in interactions in chunks equals building at once."""
+        rng = np.random.default_rng(0)
+        rooms = [uuid4() for _ in range(30)]
+        users = [uuid4() for _ in range(50)]
+        pairs = [(users[u], rooms[r]) for u, r in zip(rng.integers(0, 50, 400), rng.integers(0, 30, 400))]
+        
+        full = CooccurrenceIndex()
+        full.add_interactions(pairs)
+        incremental = CooccurrenceIndex()
+        for i in range(0, len(pairs), 37):
+            incremental.add_interactions(pairs[i:i + 37])
+        assert incremental.add_interactions(pairs[:10]) == 0
+        
+        for room in rooms:
+            assert incremental.candidates([room], 10) == full.candidates([room], 10)
+    
+    def test_candidates_keep_best_score_across_seeds(self):
+        """Test that a room reachable from several seeds appears once with its best score."""
+        a, b, c = uuid4(), uuid4(), uuid4()
+        index = CooccurrenceIndex()
+        index.add_interactions([(uuid4(), a), *((user, room) for user in [uuid4(), uuid4()] for room in (b, c))])
+        index.add_interactions([(user, room) for user in [uuid4()] for room in (a, c)])
+        
+        hits = index.candidates([a, b], 5)
+        
+        assert [room for room, _ in hits].count(c) == 1
+        assert dict(hits)[c] == max(score for room, score in index.candidates([b], 5) if room == c)
+        assert index.candidates([uuid4()], 5) == []
+    
+    def test_merge_candidates(self):
+        """Test that merging keeps primary order and the higher score."""
+        merged = merge_candidates([("a", 0.9), ("b", 0.2)], [("b", 0.5), ("c", 0.4)])
+        
+        assert merged == [("a", 0.9), ("b", 0.5), ("c", 0.4)]
+
+
+class TestUserPreferenceVector:
+    """Tests for stored user preference vectors."""
+    
+    def test_event_weights(self):
+        """Test event weights including the rating adjustment."""
+        assert AIService._event_weight(EventType.VIEW_ROOM, None) == 1.0
+        assert AIService._event_weight(EventType.BOOK_ROOM, None) == 5.0
+        assert AIService._event_weight(EventType.RATE_ROOM, 5) == 6.0
+        assert AIService._event_weight(EventType.RATE_ROOM, 1) == 2.0
+    
+    def test_rollup_weights_match_event_weights(self):
+        """Test that a rollup row weighs as much as the events it counts."""
+        assert AIService._rollup_weight(EventType.BOOK_ROOM, 3, 0) == 15.0
+        assert AIService._rollup_weight(EventType.RATE_ROOM, 2, 6) == (
+            AIService._event_weight(EventType.RATE_ROOM, 5)
+            + AIService._event_weight(EventType.RATE_ROOM, 1)
+        )
+    
+    def test_normalize_preference(self):
+        """Test that the stored mean vector is returned with unit length."""
+        preference = UserPreferenceVector(
+            embedding=[3.0, 4.0] + [0.0] * 382,
+            weight_sum=2.0,
+            event_count=2,
+        )
+        
+        user_vector = AIService._normalize_preference(preference)
+        
+        assert np.isclose(np.linalg.norm(user_vector), 1.0)
+        assert np.isclose(user_vector[0], 0.6)
+    
+    def test_normalize_preference_without_weight(self):
+        """Test that events on rooms without embeddings give no user vector."""
+        preference = UserPreferenceVector(embedding=None, weight_sum=0.0, event_count=4)
+        
+        assert AIService._normalize_preference(preference) is None
+
+
+class TestVectorizedReranking:
+    """Tests for the vectorized re-ranking stage."""
+    
+    WEIGHTS = {
+        "similarity": 0.65,
+        "rating": 0.10,
+        "popularity": 0.10,
+        "price_match": 0.10,
+        "freshness": 0.05,
+    }
+    
+    def test_matches_scalar_formula(self):
+        """Test that vectorized scores equal the per-room formula."""
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        created = [now - timedelta(days=10), now - timedelta(days=400)]
+        
+        scores = score_candidates(
+            similarity=np.array([0.9, 0.5]),
+            avg_rating=np.array([4.0, np.nan]),
+            reservation_count=np.array([5.0, 10.0]),
+            max_reservation_count=10.0,
+            price=np.array([30000.0, 50000.0]),
+            user_avg_price=30000.0,
+            created_at=np.array([c.timestamp() for c in created]),
+            weights=self.WEIGHTS,
+            now=now,
+        )
+        
+        first = 0.65 * 0.9 + 0.10 * 0.8 + 0.10 * 0.5 + 0.10 * 1.0 + 0.05 * (1 - 10 / 365)
+        # 50000 vs 30000 is beyond the 50% price tolerance, 400 days is past freshness decay
+        second = 0.65 * 0.5 + 0.10 * 0.0 + 0.10 * 1.0 + 0.10 * 0.0 + 0.05 * 0.0
+        assert np.allclose(scores, [first, second])
+    
+    def test_no_price_preference_or_popularity(self):
+        """Test defaults when the user has no bookings and no room is reserved."""
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        
+        scores = score_candidates(
+            similarity=np.array([1.0]),
+            avg_rating=np.array([np.nan]),
+            reservation_count=np.array([0.0]),
+            max_reservation_count=0.0,
+            price=np.array([25000.0]),
+            user_avg_price=None,
+            created_at=np.array([now.timestamp()]),
+            weights=self.WEIGHTS,
+            now=now,
+        )
+        
+        assert np.allclose(scores, [0.65 + 0.10 + 0.05])
 
 
 @pytest_asyncio.fixture
@@ -171,6 +664,10 @@ async def cold_start_setup(db_session: AsyncSession):
     
     await db_session.commit()
     
+    # Fixtures insert reviews/reservations directly, so rebuild the read model
+    await RoomStatsService(db_session).reconcile()
+    await db_session.commit()
+    
     # Create a new user with no events (cold start user)
     cold_user = User(
         id=uuid4(),
@@ -381,6 +878,274 @@ class TestPersonalizedRecommendations:
         
         scores = [r.final_score for r in result.recommendations]
         assert scores == sorted(scores, reverse=True)
+    
+    @pytest.mark.asyncio
+    async def test_repeat_request_served_from_cache(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that results are reused until the user logs a new event."""
+        rooms, user = personalized_setup
+        
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        misses = recommendation_cache.misses
+        first = await ai_service.get_recommendations(user_id=user.id, limit=8)
+        second = await ai_service.get_recommendations(user_id=user.id, limit=8)
+        
+        assert second.recommendations == first.recommendations
+        assert recommendation_cache.misses == misses + 1
+        
+        from app.schemas.ai import UserEventCreate
+        
+        await ai_service.log_event(
+            user.id, UserEventCreate(room_id=rooms[2].id, event_type=EventType.CLICK_ROOM)
+        )
+        third = await ai_service.get_recommendations(user_id=user.id, limit=8)
+        
+        assert recommendation_cache.misses == misses + 2
+        assert third.user_event_count == first.user_event_count + 1
+    
+    @pytest.mark.asyncio
+    async def test_cached_ranking_filtered_by_current_availability(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that a room booked after its ranking was cached is filtered out."""
+        rooms, user = personalized_setup
+        
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        first = await ai_service.get_recommendations(user_id=user.id, limit=1)
+        booked_room_id = first.recommendations[0].room_id
+        
+        start = datetime.now(timezone.utc) + timedelta(days=3)
+        db_session.add(Reservation(
+            id=uuid4(),
+            user_id=user.id,
+            room_id=booked_room_id,
+            start_time=start,
+            end_time=start + timedelta(hours=2),
+            duration_hours=Decimal("2"),
+            subtotal=Decimal("50000"),
+            discount_amount=Decimal("0"),
+            total_amount=Decimal("50000"),
+            status=ReservationStatus.CONFIRMED,
+        ))
+        await db_session.commit()
+        
+        misses = recommendation_cache.misses
+        result = await ai_service.get_recommendations(
+            user_id=user.id, limit=1, start=start, end=start + timedelta(hours=1)
+        )
+        
+        assert recommendation_cache.misses == misses
+        assert len(result.recommendations) == 1
+        assert result.recommendations[0].room_id != booked_room_id
+    
+    @pytest.mark.asyncio
+    async def test_pgvector_ann_fallback_matches_in_memory_index(
+        self, db_session: AsyncSession, personalized_setup, monkeypatch
+    ):
+        """Test that the HNSW-backed pgvector path ranks like the in-memory index."""
+        from app.core.config import settings
+        
+        rooms, user = personalized_setup
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        preference = await ai_service._get_user_preference(user.id)
+        user_vector = AIService._normalize_preference(preference)
+        
+        in_memory = await ai_service._get_similar_rooms(user_vector, 5)
+        monkeypatch.setattr(settings, "VECTOR_INDEX_ENABLED", False)
+        from_pgvector = await ai_service._get_similar_rooms(user_vector, 5)
+        
+        assert [room.id for room, _ in from_pgvector] == [room.id for room, _ in in_memory]
+        assert np.allclose(
+            [sim for _, sim in from_pgvector], [sim for _, sim in in_memory], atol=1e-4
+        )
+    
+    @pytest.mark.asyncio
+    async def test_cooccurrence_candidates_merged(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that rooms co-booked with the user's rooms become candidates."""
+        rooms, user = personalized_setup
+        racing_sim = next(room for room in rooms if room.name == "Racing Sim")
+        vip_room = next(room for room in rooms if room.category == RoomCategory.VIP)
+        
+        # Other users who liked the same VIP room also booked the simulator
+        now = datetime.now(timezone.utc)
+        for _ in range(3):
+            other = User(
+                id=uuid4(),
+                email=f"{uuid4().hex[:8]}@example.com",
+                name="Other User",
+                password_hash=get_password_hash("pass123"),
+                role=UserRole.USER,
+            )
+            db_session.add(other)
+            await db_session.flush()
+            for room in (vip_room, racing_sim):
+                db_session.add(UserEvent(
+                    id=uuid4(), user_id=other.id, room_id=room.id,
+                    event_type=EventType.BOOK_ROOM, created_at=now,
+                ))
+        await db_session.commit()
+        
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        user_rooms = await ai_service._get_user_interacted_rooms(user.id)
+        
+        # Nothing is merged until the index has been loaded in the background
+        assert await ai_service._merge_cooccurrence_candidates([], user_rooms) == []
+        await get_cooccurrence_index().refresh(db_session)
+        merged = await ai_service._merge_cooccurrence_candidates([], user_rooms)
+        
+        scores = {room.id: score for room, score in merged}
+        assert racing_sim.id in scores
+        assert scores[racing_sim.id] > 0
+    
+    @pytest.mark.asyncio
+    async def test_rebuild_includes_rolled_up_history(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that rebuilds count days whose raw events retention dropped, once."""
+        rooms, user = personalized_setup
+        ps5_room = rooms[2]
+        today = datetime.now(timezone.utc).date()
+        db_session.add_all([
+            # Only left in the rollup
+            UserEventDailyCount(day=today - timedelta(days=400), user_id=user.id,
+                                room_id=ps5_room.id, event_type=EventType.BOOK_ROOM,
+                                event_count=2, rating_sum=0),
+            # Also still in the raw events, so must not be counted twice
+            UserEventDailyCount(day=today, user_id=user.id, room_id=rooms[0].id,
+                                event_type=EventType.VIEW_ROOM, event_count=1, rating_sum=0),
+        ])
+        await db_session.commit()
+        
+        preference = await AIService(db_session, FakeEmbeddingProvider())._rebuild_user_preference(user.id)
+        
+        # 7 raw events weighing 22, plus 2 rolled-up bookings weighing 10
+        assert preference.event_count == 9
+        assert preference.weight_sum == 32.0
+    
+    @pytest.mark.asyncio
+    async def test_reembedding_rooms_rebuilds_preferences(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that stored preference vectors follow new room embeddings."""
+        rooms, user = personalized_setup
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        before = np.array((await ai_service._get_user_preference(user.id)).embedding)
+        await db_session.commit()
+        
+        # The fixture's embeddings weren't built from room profiles, so all are rewritten
+        result = await ai_service.generate_room_embeddings(room_ids=[room.id for room in rooms])
+        await db_session.commit()
+        assert result.updated_count == len(rooms)
+        
+        vectors = await ai_service._get_room_vectors({rooms[0].id, rooms[1].id})
+        preference = await ai_service._get_user_preference(user.id)
+        # VIP Elite: view + click + book + 5-star rating = 14, VIP Standard: 8
+        expected = (14 * vectors[rooms[0].id] + 8 * vectors[rooms[1].id]) / 22
+        
+        assert not np.allclose(preference.embedding, before, atol=1e-3)
+        assert np.allclose(preference.embedding, expected, atol=1e-3)
+
+
+class TestPrecomputedRecommendations:
+    """Tests for the nightly precomputed recommendations."""
+    
+    @pytest.mark.asyncio
+    async def test_endpoint_serves_precomputed_ranking(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that a fresh precomputed ranking is served, matching the live one."""
+        from sqlalchemy import update
+        from app.models.ai import UserRecommendation
+        from app.services.recommendation_precompute import RecommendationPrecomputeService
+        
+        rooms, user = personalized_setup
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        live = await ai_service.get_recommendations(user_id=user.id, limit=3)
+        recommendation_cache.clear()
+        
+        service = RecommendationPrecomputeService(db_session)
+        catalog = await service.load_catalog()
+        assert await service.precompute_batch(catalog, None, 100) == [user.id]
+        await db_session.execute(
+            update(UserRecommendation).values(reason="precomputed")
+        )
+        await db_session.commit()
+        
+        served = await ai_service.get_recommendations(user_id=user.id, limit=3)
+        
+        assert [r.room_id for r in served.recommendations] == [r.room_id for r in live.recommendations]
+        assert all(r.reason == "precomputed" for r in served.recommendations)
+    
+    @pytest.mark.asyncio
+    async def test_availability_filter_applied_live(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that rooms booked after the precompute are filtered out."""
+        from app.services.recommendation_precompute import RecommendationPrecomputeService
+        
+        rooms, user = personalized_setup
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        await ai_service._get_user_preference(user.id)
+        
+        service = RecommendationPrecomputeService(db_session)
+        assert await service.precompute_batch(await service.load_catalog(), None, 100) == [user.id]
+        await db_session.commit()
+        
+        first = await ai_service.get_recommendations(user_id=user.id, limit=1)
+        booked_room_id = first.recommendations[0].room_id
+        
+        start = datetime.now(timezone.utc) + timedelta(days=3)
+        db_session.add(Reservation(
+            id=uuid4(),
+            user_id=user.id,
+            room_id=booked_room_id,
+            start_time=start,
+            end_time=start + timedelta(hours=2),
+            duration_hours=Decimal("2"),
+            subtotal=Decimal("50000"),
+            discount_amount=Decimal("0"),
+            total_amount=Decimal("50000"),
+            status=ReservationStatus.CONFIRMED,
+        ))
+        await db_session.commit()
+        
+        result = await ai_service.get_recommendations(
+            user_id=user.id, limit=1, start=start, end=start + timedelta(hours=1)
+        )
+        
+        assert booked_room_id not in [r.room_id for r in result.recommendations]
+    
+    @pytest.mark.asyncio
+    async def test_new_events_bypass_stale_ranking(
+        self, db_session: AsyncSession, personalized_setup
+    ):
+        """Test that an event logged after the precompute switches to the live pipeline."""
+        from sqlalchemy import update
+        from app.models.ai import UserRecommendation
+        from app.schemas.ai import UserEventCreate
+        from app.services.recommendation_precompute import RecommendationPrecomputeService
+        
+        rooms, user = personalized_setup
+        ai_service = AIService(db_session, FakeEmbeddingProvider())
+        await ai_service._get_user_preference(user.id)
+        
+        service = RecommendationPrecomputeService(db_session)
+        assert await service.precompute_batch(await service.load_catalog(), None, 100) == [user.id]
+        await db_session.execute(update(UserRecommendation).values(reason="precomputed"))
+        await db_session.commit()
+        
+        served = await ai_service.get_recommendations(user_id=user.id, limit=3)
+        assert all(r.reason == "precomputed" for r in served.recommendations)
+        
+        await ai_service.log_event(user.id, UserEventCreate(room_id=rooms[0].id, event_type=EventType.VIEW_ROOM))
+        await db_session.commit()
+        
+        live = await ai_service.get_recommendations(user_id=user.id, limit=3)
+        assert live.user_event_count == served.user_event_count + 1
+        assert all(r.reason != "precomputed" for r in live.recommendations)
 
 
 class TestEventLogging:
@@ -460,3 +1225,132 @@ class TestEventLogging:
         
         assert event.event_type == EventType.RATE_ROOM
         assert event.rating_value == 5
+    
+    @pytest.mark.asyncio
+    async def test_log_event_updates_preference_vector(self, db_session: AsyncSession):
+        """Test that logging events keeps the stored preference vector current."""
+        provider = FakeEmbeddingProvider()
+        user = User(
+            id=uuid4(),
+            email="pref@example.com",
+            name="Preference",
+            password_hash=get_password_hash("pass123"),
+            role=UserRole.USER,
+        )
+        room = Room(
+            id=uuid4(),
+            name="Preference Room",
+            category=RoomCategory.VIP,
+            capacity=4,
+            base_price_per_hour=Decimal("30000"),
+            status=RoomStatus.ACTIVE,
+        )
+        db_session.add(user)
+        db_session.add(room)
+        await db_session.flush()
+        room_vector = await provider.get_embedding("Preference Room VIP")
+        db_session.add(RoomEmbedding(room_id=room.id, embedding=room_vector))
+        await db_session.commit()
+        
+        from app.schemas.ai import UserEventCreate
+        
+        ai_service = AIService(db_session, provider)
+        for event_type in [EventType.VIEW_ROOM, EventType.CLICK_ROOM, EventType.BOOK_ROOM]:
+            await ai_service.log_event(
+                user.id, UserEventCreate(room_id=room.id, event_type=event_type)
+            )
+        
+        preference = await ai_service._get_user_preference(user.id)
+        
+        assert preference.event_count == 3
+        assert preference.weight_sum == 8.0
+        assert np.allclose(AIService._normalize_preference(preference), room_vector, atol=1e-5)
+
+
+class TestEventBuffer:
+    """Tests for the write-behind event buffer."""
+    
+    def test_add_rejects_when_full(self):
+        """Test that a batch that doesn't fit is rejected as a whole."""
+        from app.schemas.ai import UserEventCreate
+        
+        buffer = EventBuffer(max_size=3, flush_interval_ms=1000, flush_batch_size=3)
+        events = [UserEventCreate(room_id=uuid4(), event_type=EventType.VIEW_ROOM) for _ in range(2)]
+        
+        buffer.add(uuid4(), events)
+        with pytest.raises(EventBufferFullError):
+            buffer.add(uuid4(), events)
+        
+        assert buffer.size == 2
+        assert buffer.stats()["pending"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_flush_writes_events_in_bulk(self, db_session: AsyncSession, test_user, test_room):
+        """Test that a flush stores all pending events and updates preferences."""
+        from contextlib import asynccontextmanager
+        from app.schemas.ai import UserEventCreate
+        
+        @asynccontextmanager
+        async def session_factory():
+            yield db_session
+        
+        buffer = EventBuffer(
+            max_size=100, flush_interval_ms=1000, flush_batch_size=100,
+            session_factory=session_factory,
+        )
+        buffer.add(test_user.id, [
+            UserEventCreate(room_id=test_room.id, event_type=EventType.VIEW_ROOM),
+            UserEventCreate(room_id=test_room.id, event_type=EventType.CLICK_ROOM),
+        ])
+        
+        assert await buffer.flush() == 2
+        assert buffer.size == 0
+        
+        result = await db_session.execute(
+            select(UserEvent).where(UserEvent.user_id == test_user.id)
+        )
+        assert len(result.scalars().all()) == 2
+        
+        preference = await AIService(db_session, FakeEmbeddingProvider())._get_user_preference(test_user.id)
+        assert preference.event_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_flush_drops_rejected_events_only(
+        self, db_session: AsyncSession, test_user, admin_user, test_room
+    ):
+        """Test that events the database rejects don't block other users' events."""
+        from contextlib import asynccontextmanager
+        from app.schemas.ai import UserEventCreate
+        
+        @asynccontextmanager
+        async def session_factory():
+            yield db_session
+        
+        buffer = EventBuffer(
+            max_size=100, flush_interval_ms=1000, flush_batch_size=100,
+            session_factory=session_factory,
+        )
+        buffer.add(test_user.id, [UserEventCreate(room_id=test_room.id, event_type=EventType.VIEW_ROOM)])
+        buffer.add(admin_user.id, [UserEventCreate(room_id=uuid4(), event_type=EventType.VIEW_ROOM)])
+        
+        assert await buffer.flush() == 1
+        assert buffer.size == 0
+        assert buffer.stats()["rejected"] == 1
+        
+        result = await db_session.execute(select(UserEvent.user_id))
+        assert result.scalars().all() == [test_user.id]
+    
+    @pytest.mark.asyncio
+    async def test_batch_endpoint_rejects_unknown_rooms(self, client, test_user, test_room):
+        """Test that the batch endpoint validates room IDs before queueing."""
+        from app.core.security import create_access_token
+        
+        token = create_access_token({"sub": str(test_user.id), "role": test_user.role.value})
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await client.post("/api/ai/events/batch", headers=headers, json={"events": [
+            {"room_id": str(test_room.id), "event_type": "VIEW_ROOM"},
+            {"room_id": str(uuid4()), "event_type": "VIEW_ROOM"},
+        ]})
+        
+        assert response.status_code == 422
+        assert get_event_buffer().size == 0
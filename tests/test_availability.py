@@ -11,7 +11,13 @@ from app.models.room import Room, RoomCategory, RoomStatus
 from app.models.reservation import Reservation, ReservationStatus
 from app.models.user import User, UserRole
 from app.core.security import get_password_hash
-from app.services.room import RoomService
+from app.services.reservation import ReservationConflictError, flush_checking_overlap
+from app.services.reservation_index import (
+    ReservationIntervalIndex,
+    get_reservation_index,
+    track_reservation_change,
+)
+from app.services.room import RoomService, availability_bitmap, mark_booked_slots
 
 
 @pytest_asyncio.fixture
@@ -266,3 +272,320 @@ class TestRoomAvailability:
         
         assert result.is_available is True
         assert len(result.conflicting_reservations) == 0
+    
+    @pytest.mark.asyncio
+    async def test_unavailable_room_ids_single_query(
+        self, db_session: AsyncSession, room_with_reservation, test_room
+    ):
+        """Test that the shared filter reports only rooms with a conflict."""
+        room, _, existing_start, existing_end = room_with_reservation
+        
+        room_service = RoomService(db_session)
+        unavailable = await room_service.get_unavailable_room_ids(
+            [room.id, test_room.id], existing_start, existing_end
+        )
+        
+        assert unavailable == {room.id}
+        assert await room_service.get_unavailable_room_ids([], existing_start, existing_end) == set()
+
+
+class TestDailySlotGrid:
+    """Tests for the hourly schedule grid."""
+    
+    def _slots(self, hours: range):
+        day = datetime(2026, 10, 17, tzinfo=timezone.utc)
+        return [day + timedelta(hours=hour) for hour in hours]
+    
+    def test_sweep_marks_overlapping_slots(self):
+        """Test that partial, adjacent and overlapping intervals mark the right hours."""
+        slots = self._slots(range(10, 16))
+        day = slots[0] - timedelta(hours=10)
+        intervals = [
+            (day + timedelta(hours=9), day + timedelta(hours=10, minutes=30)),   # covers 10:00
+            (day + timedelta(hours=12), day + timedelta(hours=13)),              # exactly 12:00
+            (day + timedelta(hours=12, minutes=30), day + timedelta(hours=14)),  # overlaps previous
+        ]
+        
+        booked = mark_booked_slots(slots, timedelta(hours=1), intervals)
+        
+        assert booked == [True, False, True, True, False, False]
+    
+    def test_sweep_matches_pairwise_check(self):
+        """Test the sweep against checking every slot against every interval."""
+        import random
+        rng = random.Random(0)
+        slots = self._slots(range(0, 24))
+        day = slots[0]
+        intervals = sorted(
+            (start, start + timedelta(minutes=rng.randint(15, 300)))
+            for start in (day + timedelta(minutes=rng.randint(-120, 1440)) for _ in range(15))
+        )
+        
+        booked = mark_booked_slots(slots, timedelta(hours=1), intervals)
+        
+        expected = [
+            any(slot < end and slot + timedelta(hours=1) > start for start, end in intervals)
+            for slot in slots
+        ]
+        assert booked == expected
+    
+    @pytest.mark.asyncio
+    async def test_all_rooms_grid_uses_two_queries(
+        self, db_session: AsyncSession, room_with_reservation, test_room
+    ):
+        """Test that the all-rooms grid marks bookings with one rooms and one reservations query."""
+        from sqlalchemy import event
+        
+        room, _, existing_start, existing_end = room_with_reservation
+        statements = []
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            grid = await RoomService(db_session).get_all_rooms_daily_slots(existing_start.date())
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        
+        assert len(statements) == 2
+        by_room = {r.room_id: r for r in grid.rooms}
+        booked_hours = [s.start_hour for s in by_room[room.id].slots if not s.is_available]
+        assert booked_hours == list(range(existing_start.hour, existing_end.hour))
+        assert all(s.is_available for s in by_room[test_room.id].slots)
+    
+    
+    @pytest.mark.asyncio
+    async def test_empty_opening_hours_give_empty_grid(self, db_session: AsyncSession, test_room):
+        """Test that a closing hour at or before the opening hour yields no slots."""
+        grid = await RoomService(db_session).get_daily_slots(
+            test_room.id, datetime.now(timezone.utc).date(), opening_hour=22, closing_hour=10
+        )
+        
+        assert grid.slots == []
+
+class TestAvailabilityCalendar:
+    """Tests for the multi-day availability bitmaps."""
+    
+    def test_bitmap_sets_free_hours(self):
+        """Test that bit i is set for free slot i."""
+        assert availability_bitmap([False] * 12) == 4095
+        assert availability_bitmap([False, False, True, True] + [False] * 8) == 4083
+        assert availability_bitmap([True] * 12) == 0
+    
+    @pytest.mark.asyncio
+    async def test_calendar_marks_booked_hours(
+        self, db_session: AsyncSession, room_with_reservation, test_room
+    ):
+        """Test that the reservation day has its hours cleared and other days are free."""
+        room, _, existing_start, existing_end = room_with_reservation
+        today = existing_start.date()
+        
+        calendar = await RoomService(db_session).get_availability_calendar(
+            today - timedelta(days=1), today + timedelta(days=1)
+        )
+        
+        by_room = {r.room_id: r for r in calendar.rooms}
+        booked_bits = sum(1 << (hour - 10) for hour in range(existing_start.hour, existing_end.hour))
+        assert by_room[room.id].days == [4095, 4095 & ~booked_bits, 4095]
+        assert by_room[test_room.id].days == [4095, 4095, 4095]
+    
+    @pytest.mark.asyncio
+    async def test_single_room_calendar(self, db_session: AsyncSession, room_with_reservation):
+        """Test the single-room calendar and its not-found error."""
+        room, _, existing_start, _ = room_with_reservation
+        room_service = RoomService(db_session)
+        
+        calendar = await room_service.get_availability_calendar(
+            existing_start.date(), existing_start.date(), room_id=room.id
+        )
+        
+        assert [r.room_id for r in calendar.rooms] == [room.id]
+        with pytest.raises(ValueError):
+            await room_service.get_availability_calendar(existing_start.date(), existing_start.date(), room_id=uuid4())
+    
+    @pytest.mark.asyncio
+    async def test_calendar_endpoint_validates_range(self, client):
+        """Test that reversed or too long ranges are rejected and responses are cacheable."""
+        reversed_range = await client.get("/api/rooms/all/calendar?start=2026-10-17&end=2026-10-10")
+        too_long = await client.get("/api/rooms/all/calendar?start=2026-01-01&end=2026-03-31")
+        ok = await client.get("/api/rooms/all/calendar?start=2026-10-17&end=2026-10-23")
+        
+        assert reversed_range.status_code == 400
+        assert too_long.status_code == 400
+        assert ok.status_code == 200
+        assert ok.headers["Cache-Control"].startswith("private, max-age=")
+
+
+class TestReservationIntervalIndex:
+    """Tests for the in-memory reservation interval index."""
+    
+    def _loaded_index(self) -> ReservationIntervalIndex:
+        index = ReservationIntervalIndex()
+        index.horizon = datetime(2026, 10, 17, tzinfo=timezone.utc)
+        return index
+    
+    def test_overlap_matches_database_predicate(self):
+        """Test that overlap queries equal start < end AND end > start over random bookings."""
+        import random
+        rng = random.Random(0)
+        index = self._loaded_index()
+        room_id = uuid4()
+        day = index.horizon
+        bookings = []
+        for _ in range(200):
+            start = day + timedelta(minutes=30 * rng.randint(0, 500))
+            end = start + timedelta(minutes=30 * rng.randint(1, 16))
+            status = rng.choice([ReservationStatus.CONFIRMED, ReservationStatus.PENDING_PAYMENT])
+            reservation_id = uuid4()
+            bookings.append((start, end, reservation_id, status))
+            index.apply(reservation_id, room_id, start, end, status)
+        
+        for _ in range(100):
+            start = day + timedelta(minutes=15 * rng.randint(0, 1000))
+            end = start + timedelta(hours=rng.randint(1, 6))
+            expected = sorted(
+                (b for b in bookings if b[0] < end and b[1] > start and b[3] == ReservationStatus.CONFIRMED),
+                key=lambda b: b[0],
+            )
+            found = index.overlapping(room_id, start, end, {ReservationStatus.CONFIRMED})
+            assert sorted(found) == sorted(expected)
+            assert [b[0] for b in found] == sorted(b[0] for b in found)
+    
+    def test_status_changes_move_and_remove(self):
+        """Test that cancellation removes and rescheduling moves a reservation."""
+        index = self._loaded_index()
+        room_id, other_room_id, reservation_id = uuid4(), uuid4(), uuid4()
+        start = index.horizon + timedelta(hours=14)
+        end = start + timedelta(hours=2)
+        
+        index.apply(reservation_id, room_id, start, end, ReservationStatus.PENDING_PAYMENT)
+        index.apply(reservation_id, other_room_id, start, end, ReservationStatus.CONFIRMED)
+        
+        assert index.overlapping(room_id, start, end) == []
+        assert len(index.overlapping(other_room_id, start, end)) == 1
+        
+        index.apply(reservation_id, other_room_id, start, end, ReservationStatus.CANCELLED)
+        
+        assert index.overlapping(other_room_id, start, end) == []
+        assert index.size == 0
+    
+    def test_not_used_before_horizon(self):
+        """Test that ranges starting before the loaded horizon go to the database."""
+        index = self._loaded_index()
+        
+        assert index.covers(index.horizon)
+        assert not index.covers(index.horizon - timedelta(minutes=1))
+        assert not ReservationIntervalIndex().covers(index.horizon)
+    
+    @pytest.mark.asyncio
+    async def test_index_follows_commits_only(self, db_session: AsyncSession, room_with_reservation):
+        """Test that committed changes reach the index and rolled back ones don't."""
+        room, existing, existing_start, existing_end = room_with_reservation
+        index = get_reservation_index()
+        await index.reload(db_session)
+        
+        assert len(index.overlapping(room.id, existing_start, existing_end)) == 1
+        
+        later_start = existing_end + timedelta(hours=1)
+        reservation = Reservation(
+            id=uuid4(),
+            user_id=existing.user_id,
+            room_id=room.id,
+            start_time=later_start,
+            end_time=later_start + timedelta(hours=1),
+            duration_hours=Decimal("1"),
+            subtotal=Decimal("30000"),
+            discount_amount=Decimal("0"),
+            total_amount=Decimal("30000"),
+            status=ReservationStatus.CONFIRMED,
+        )
+        db_session.add(reservation)
+        await db_session.flush()
+        track_reservation_change(db_session, reservation)
+        await db_session.rollback()
+        
+        assert index.overlapping(room.id, later_start, later_start + timedelta(hours=1)) == []
+        
+        db_session.add(reservation)
+        await db_session.flush()
+        track_reservation_change(db_session, reservation)
+        await db_session.commit()
+        
+        availability = await RoomService(db_session).check_availability(
+            room.id, later_start, later_start + timedelta(hours=1)
+        )
+        assert availability.is_available is False
+        assert availability.conflicting_reservations[0]["reservation_id"] == str(reservation.id)
+
+
+class TestReservationOverlapConstraint:
+    """Tests for the (room_id, period) exclusion constraint on active reservations."""
+    
+    @staticmethod
+    def _reservation(room_id, user_id, start, end, status):
+        return Reservation(
+            id=uuid4(),
+            user_id=user_id,
+            room_id=room_id,
+            start_time=start,
+            end_time=end,
+            duration_hours=Decimal(str((end - start).total_seconds() / 3600)),
+            subtotal=Decimal("30000"),
+            discount_amount=Decimal("0"),
+            total_amount=Decimal("30000"),
+            status=status,
+        )
+    
+    @pytest.mark.asyncio
+    async def test_overlapping_active_reservation_rejected(self, db_session: AsyncSession, room_with_reservation):
+        """Test that the database rejects a pending booking over a confirmed one."""
+        room, existing, existing_start, existing_end = room_with_reservation
+        
+        with pytest.raises(ReservationConflictError):
+            async with db_session.begin_nested():
+                db_session.add(self._reservation(
+                    room.id, existing.user_id,
+                    existing_start + timedelta(hours=1), existing_end + timedelta(hours=1),
+                    ReservationStatus.PENDING_PAYMENT,
+                ))
+                await flush_checking_overlap(db_session)
+    
+    @pytest.mark.asyncio
+    async def test_adjacent_and_inactive_reservations_allowed(self, db_session: AsyncSession, room_with_reservation):
+        """Test that back-to-back and cancelled bookings don't trip the constraint."""
+        room, existing, existing_start, existing_end = room_with_reservation
+        
+        db_session.add(self._reservation(
+            room.id, existing.user_id,
+            existing_end, existing_end + timedelta(hours=1),
+            ReservationStatus.CONFIRMED,
+        ))
+        db_session.add(self._reservation(
+            room.id, existing.user_id,
+            existing_start, existing_end,
+            ReservationStatus.CANCELLED,
+        ))
+        await flush_checking_overlap(db_session)
+        
+        availability = await RoomService(db_session).check_availability(
+            room.id, existing_start - timedelta(hours=1), existing_start, use_index=False
+        )
+        assert availability.is_available is True
+    
+    @pytest.mark.asyncio
+    async def test_pending_reservation_blocks_availability(self, db_session: AsyncSession, test_room, test_user):
+        """Test that availability checks treat PENDING_PAYMENT like the constraint does."""
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+        end = start + timedelta(hours=2)
+        db_session.add(self._reservation(test_room.id, test_user.id, start, end, ReservationStatus.PENDING_PAYMENT))
+        await db_session.commit()
+        room_service = RoomService(db_session)
+        
+        for use_index in (False, True):
+            if use_index:
+                await get_reservation_index().reload(db_session)
+            availability = await room_service.check_availability(test_room.id, start, end, use_index=use_index)
+            assert availability.is_available is False
+            assert await room_service.get_unavailable_room_ids([test_room.id], start, end) == {test_room.id}
@@ -0,0 +1,113 @@
+"""Tests for in-process caches."""
+import asyncio
+
+import pytest
+
+from app.services.cache import TTLCache
+
+
+class TestTTLCache:
+    """Tests for TTLCache."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self):
+        """Test that a burst of requests for one key triggers one computation."""
+        cache = TTLCache(ttl_seconds=60)
+        calls = 0
+        
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return ["room"]
+        
+        results = await asyncio.gather(*[cache.get_or_compute("trending", compute) for _ in range(50)])
+        
+        assert calls == 1
+        assert all(result == ["room"] for result in results)
+        assert cache.misses == 1
+    
+    @pytest.mark.asyncio
+    async def test_entries_expire(self):
+        """Test that values are recomputed after the TTL."""
+        cache = TTLCache(ttl_seconds=0.01)
+        calls = 0
+        
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return calls
+        
+        assert await cache.get_or_compute("key", compute) == 1
+        assert await cache.get_or_compute("key", compute) == 1
+        await asyncio.sleep(0.02)
+        assert await cache.get_or_compute("key", compute) == 2
+    
+    @pytest.mark.asyncio
+    async def test_failure_is_not_cached(self):
+        """Test that a failed computation is raised and retried on the next call."""
+        cache = TTLCache(ttl_seconds=60)
+        
+        async def fail():
+            raise RuntimeError("database unavailable")
+        
+        async def succeed():
+            return "ok"
+        
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("key", fail)
+        assert await cache.get_or_compute("key", succeed) == "ok"
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_fail_waiters(self):
+        """Test that cancelling the first caller leaves the shared computation running."""
+        cache = TTLCache(ttl_seconds=60)
+        calls = 0
+        
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return "ok"
+        
+        leader = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.005)
+        waiter = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await waiter == "ok"
+        assert calls == 1
+        assert cache.get("key") == "ok"
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_computation_is_retried(self):
+        """Test that waiters retry instead of failing when the computation is cancelled."""
+        cache = TTLCache(ttl_seconds=60)
+        calls = 0
+        
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(1 if calls == 1 else 0.005)
+            return calls
+        
+        callers = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0.005)
+        cache._inflight["key"].cancel()
+        
+        assert await asyncio.gather(*callers) == [2, 2, 2]
+        assert calls == 2
+    
+    def test_max_entries(self):
+        """Test that the oldest entries are evicted beyond max_entries."""
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        
+        assert cache.get("a") is None
+        assert cache.get("c") == 3
@@ -0,0 +1,97 @@
+"""Tests for user event partition maintenance and daily rollup."""
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ai import UserEvent, EventType, UserEventDailyCount
+from app.services.event_partitions import (
+    MAINTENANCE_LOCK_ID,
+    EventPartitionService,
+    add_months,
+    run_event_maintenance,
+    partition_name,
+    parse_partition_name,
+)
+
+
+class TestPartitionNaming:
+    """Tests for partition month arithmetic and naming."""
+    
+    def test_add_months_wraps_years(self):
+        """Test month arithmetic across year boundaries."""
+        assert add_months(date(2026, 11, 15), 2) == date(2027, 1, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    
+    def test_partition_name_round_trip(self):
+        """Test that partition names parse back to their month."""
+        assert partition_name(date(2026, 3, 1)) == "user_events_2026_03"
+        assert parse_partition_name("user_events_2026_03") == date(2026, 3, 1)
+        assert parse_partition_name("user_events_default") is None
+
+
+class TestDailyRollup:
+    """Tests for the daily (user, room, event type) rollup."""
+    
+    @pytest.mark.asyncio
+    async def test_rollup_counts_and_is_idempotent(
+        self, db_session: AsyncSession, test_user, test_room
+    ):
+        """Test that rolling up the same days twice replaces, not doubles, counts."""
+        now = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+        yesterday = now - timedelta(days=1)
+        db_session.add_all([
+            UserEvent(id=uuid4(), user_id=test_user.id, room_id=test_room.id,
+                      event_type=EventType.VIEW_ROOM, created_at=now),
+            UserEvent(id=uuid4(), user_id=test_user.id, room_id=test_room.id,
+                      event_type=EventType.VIEW_ROOM, created_at=now),
+            UserEvent(id=uuid4(), user_id=test_user.id, room_id=test_room.id,
+                      event_type=EventType.RATE_ROOM, rating_value=4, created_at=yesterday),
+        ])
+        await db_session.commit()
+        
+        service = EventPartitionService(db_session)
+        start, end = yesterday.date(), now.date() + timedelta(days=1)
+        await service.rollup(start, end)
+        await service.rollup(start, end)
+        await db_session.commit()
+        
+        result = await db_session.execute(
+            select(UserEventDailyCount).where(UserEventDailyCount.user_id == test_user.id)
+        )
+        counts = {(row.day, row.event_type): row for row in result.scalars().all()}
+        
+        assert counts[(now.date(), EventType.VIEW_ROOM)].event_count == 2
+        assert counts[(yesterday.date(), EventType.RATE_ROOM)].event_count == 1
+        assert counts[(yesterday.date(), EventType.RATE_ROOM)].rating_sum == 4
+    
+    @pytest.mark.asyncio
+    async def test_maintenance_skips_partitions_on_plain_table(self, db_session: AsyncSession):
+        """Test that maintenance only rolls up when user_events is not partitioned."""
+        result = await EventPartitionService(db_session).run_maintenance()
+        
+        assert result == {"created_partitions": [], "expired_partitions": []}
+
+
+class TestEventMaintenanceJob:
+    """Tests for the scheduled maintenance entry point."""
+    
+    @pytest.mark.asyncio
+    async def test_runs_when_lock_is_free(self, db_session: AsyncSession):
+        """Test that maintenance runs and releases the advisory lock."""
+        result = await run_event_maintenance(db_session.bind)
+        
+        assert result == {"created_partitions": [], "dropped_partitions": []}
+        assert await run_event_maintenance(db_session.bind) is not None
+    
+    @pytest.mark.asyncio
+    async def test_skips_when_another_process_holds_lock(self, db_session: AsyncSession):
+        """Test that only one process does maintenance at a time."""
+        async with db_session.bind.connect() as other:
+            await other.execute(select(func.pg_advisory_lock(MAINTENANCE_LOCK_ID)))
+            
+            assert await run_event_maintenance(db_session.bind) is None
+            
+            await other.execute(select(func.pg_advisory_unlock(MAINTENANCE_LOCK_ID)))
@@ -0,0 +1,175 @@
+"""Tests for the room stats read model."""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.room import Room, RoomCategory, RoomStatus
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.review import Review
+from app.models.user import User, UserRole
+from app.core.security import get_password_hash
+from app.services.room import RoomService
+from app.services.room_stats import RoomStatsService
+
+
+@pytest_asyncio.fixture
+async def room_with_history(db_session: AsyncSession):
+    """Create a room with reservations and reviews inserted directly."""
+    user = User(
+        id=uuid4(),
+        email="stats@example.com",
+        name="Stats",
+        password_hash=get_password_hash("pass123"),
+        role=UserRole.USER,
+    )
+    room = Room(
+        id=uuid4(),
+        name="Stats Room",
+        category=RoomCategory.VIP,
+        capacity=4,
+        base_price_per_hour=Decimal("30000"),
+        status=RoomStatus.ACTIVE,
+    )
+    db_session.add(user)
+    db_session.add(room)
+    await db_session.flush()
+    
+    now = datetime.now(timezone.utc)
+    reservations = []
+    for day, status in enumerate([
+        ReservationStatus.CONFIRMED,
+        ReservationStatus.COMPLETED,
+        ReservationStatus.CANCELLED,
+        ReservationStatus.PENDING_PAYMENT,
+    ], start=1):
+        reservation = Reservation(
+            id=uuid4(),
+            user_id=user.id,
+            room_id=room.id,
+            # One day apart, active reservations of a room can't overlap
+            start_time=now + timedelta(days=day),
+            end_time=now + timedelta(days=day, hours=2),
+            duration_hours=Decimal("2"),
+            subtotal=Decimal("60000"),
+            discount_amount=Decimal("0"),
+            total_amount=Decimal("60000"),
+            status=status,
+        )
+        db_session.add(reservation)
+        reservations.append(reservation)
+    await db_session.flush()
+    
+    for reservation, rating in zip(reservations[:2], [5, 4]):
+        db_session.add(Review(
+            id=uuid4(),
+            user_id=user.id,
+            room_id=room.id,
+            reservation_id=reservation.id,
+            rating=rating,
+        ))
+    await db_session.commit()
+    
+    return room, reservations
+
+
+class TestRoomStats:
+    """Tests for RoomStatsService."""
+    
+    @pytest.mark.asyncio
+    async def test_reconcile_counts_reviews_and_reservations(
+        self, db_session: AsyncSession, room_with_history
+    ):
+        """Test that reconciliation matches a direct aggregation."""
+        room, _ = room_with_history
+        service = RoomStatsService(db_session)
+        
+        await service.reconcile()
+        stats = await service.get_stats([room.id])
+        
+        assert stats[room.id]["review_count"] == 2
+        assert stats[room.id]["avg_rating"] == 4.5
+        # Only CONFIRMED and COMPLETED count towards popularity
+        assert stats[room.id]["reservation_count"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_record_review_updates_average(
+        self, db_session: AsyncSession, room_with_history
+    ):
+        """Test that a new review updates the average without re-aggregating."""
+        room, _ = room_with_history
+        service = RoomStatsService(db_session)
+        await service.reconcile()
+        
+        await service.record_review(room.id, 3)
+        stats = await service.get_stats([room.id])
+        
+        assert stats[room.id]["review_count"] == 3
+        assert stats[room.id]["avg_rating"] == pytest.approx(4.0)
+    
+    @pytest.mark.asyncio
+    async def test_status_changes_update_popularity(
+        self, db_session: AsyncSession, room_with_history
+    ):
+        """Test that confirming and cancelling reservations adjust the rolling count."""
+        room, reservations = room_with_history
+        service = RoomStatsService(db_session)
+        await service.reconcile()
+        pending = reservations[3]
+        
+        await service.record_reservation_status_change(
+            pending, ReservationStatus.PENDING_PAYMENT, ReservationStatus.CONFIRMED
+        )
+        stats = await service.get_stats([room.id])
+        assert stats[room.id]["reservation_count"] == 3
+        
+        await service.record_reservation_status_change(
+            pending, ReservationStatus.CONFIRMED, ReservationStatus.CANCELLED
+        )
+        stats = await service.get_stats([room.id])
+        assert stats[room.id]["reservation_count"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_room_listing_reads_ratings_in_one_query(
+        self, db_session: AsyncSession, room_with_history
+    ):
+        """Test that the listing batches ratings, so its query count doesn't grow with the page."""
+        from sqlalchemy import event
+        
+        room, _ = room_with_history
+        await RoomStatsService(db_session).reconcile()
+        for i in range(5):
+            db_session.add(Room(
+                id=uuid4(),
+                name=f"Unrated Room {i}",
+                category=RoomCategory.REGULAR,
+                capacity=4,
+                base_price_per_hour=Decimal("20000"),
+                status=RoomStatus.ACTIVE,
+            ))
+        await db_session.commit()
+        statements = []
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            rooms, total = await RoomService(db_session).get_rooms(page_size=100)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        
+        # count, rooms page, images, units, room_stats
+        assert len(statements) == 5
+        assert total == 6
+        by_id = {r.id: r for r in rooms}
+        assert by_id[room.id].avg_rating == 4.5
+        assert by_id[room.id].review_count == 2
+        assert all(r.review_count == 0 and r.avg_rating is None for r in rooms if r.id != room.id)
+        
+        single = await RoomService(db_session).get_room_by_id(room.id)
+        assert single.avg_rating == 4.5
@@ -0,0 +1,50 @@
+"""Tests for the startup timing report and lazy AI imports."""
+import subprocess
+import sys
+
+from app.core.startup import StartupReport
+
+
+class TestStartupReport:
+    """Tests for import timing."""
+    
+    def test_tracks_first_time_imports(self):
+        """Test that new imports are timed with self and cumulative time."""
+        report = StartupReport()
+        sys.modules.pop("colorsys", None)
+        
+        report.track_imports()
+        try:
+            import colorsys  # noqa: F401
+            import sys as already_imported  # noqa: F401
+        finally:
+            report.stop_tracking_imports()
+        
+        assert "colorsys" in report.imports
+        assert "sys" not in report.imports
+        own, total = report.imports["colorsys"]
+        assert 0 <= own <= total
+        assert "imports" in report.phases
+    
+    def test_stop_restores_import(self):
+        """Test that tracking can be stopped and the summary is serializable."""
+        import builtins
+        original = builtins.__import__
+        report = StartupReport()
+        
+        report.track_imports()
+        report.stop_tracking_imports()
+        
+        assert builtins.__import__ is original
+        summary = report.summary(top=3)
+        assert set(summary) == {"phases_ms", "modules_imported", "slowest_imports"}
+    
+    def test_app_import_does_not_load_model_stack(self):
+        """Test that importing the app leaves torch and sentence-transformers unloaded."""
+        code = (
+            "import sys, app.main; "
+            "print(any(m in sys.modules for m in ('torch', 'sentence_transformers', 'transformers', 'onnxruntime')))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        
+        assert result.stdout.strip().splitlines()[-1] == "False"